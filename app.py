@@ -1,30 +1,153 @@
 import json
 import traceback
-from langchain_google_genai import ChatGoogleGenerativeAI
 from playwright.async_api import Page
-from dotenv import load_dotenv
 import asyncio
 import os
 import re
-from typing import List, Union
+from contextlib import closing, nullcontext
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple, Union
 
 from logger import *
 from models import DiscussionEntry, StudentSubmissionData
+from auth_session import probe_session, restore_session, save_session
+from checkpoint import RESUME_MODE_INCREMENTAL, RESUME_MODE_OFF, CrawlCheckpoint
+from entry_table import EntryParquetWriter
+from html_archive import capture_submission_html, html_archive_path, write_html_archive
+from lean_profile import LeanScrapeProfile
+from page_readiness import (
+    SUBMISSION_STATE_MAIN_CONTENT, SUBMISSION_STATE_NO_SUBMISSION, detect_submission_state, read_navigation_snapshot,
+    wait_for_student_ready,
+)
+from perf import span, write_perf_report
+from pipeline import ScrapeAnalyzePipeline
 from prompts import AUTH_TASK
+from report_io import COMPILED_REPORT_JSONL_NAME, JsonlReportWriter, save_student_data, write_jsonl_report
 # Assuming these are your imports from browser_use for the authenticator
 from browser_use import Agent, Controller 
 from browser_use.browser.browser import Browser, BrowserConfig
+from browser_use.browser.context import BrowserContext
 from playwright.async_api import Page, FrameLocator, Locator
 
-from submission_analizer import run_submission_analysis
-from utils import OUTPUT_FOLDER_NAME, sanitize_filename
+from speedgrader import (
+    CONTENT_SELECTORS, DATE_SELECTORS_MAP, ENTRY_SELECTOR, ENTRY_SELECTOR_FALLBACK, EXTRACT_SUBMISSION_SCRIPT,
+    IFRAME_HOLDER_SELECTOR, IFRAME_SELECTOR, MAIN_CONTENT_CONTAINER_SELECTOR, NAME_SELECTORS,
+    NEXT_BUTTON_SELECTOR, NO_SUBMISSION_INDICATOR_SELECTOR, READ_ROSTER_SCRIPT, SUBMISSION_DESCRIPTION_SELECTOR,
+    build_speedgrader_json_url, build_student_url, extraction_script_config, roster_script_config, submission_hint,
+)
+from submission_analizer import SubmissionAnalyzer, create_analyzer_llm, create_submission_analyzer, run_submission_analysis
+from utils import (
+    ANALYZED_CSV_NAME, ANALYZED_PARQUET_NAME, AUTH_MODEL_NAME, CRAWL_CONCURRENCY, CRAWL_MODE, CRAWL_RESUME_MODE, EXTRACTION_MODE, HTML_ARCHIVE, LEAN_SCRAPE, OUTPUT_FOLDER_NAME, PARQUET_OUTPUT, PERF_REPORT_NAME, PIPELINE_ANALYSIS,
+    SPEEDGRADER_URL,
+)
 
 # from langchain_google_genai import ChatGoogleGenerativeAI # If your Agent uses it
-load_dotenv()
 
 
 # --- Core Extraction Function ---
-async def extract_data_for_current_student(page: Page) -> StudentSubmissionData:
+def _clean_student_name(raw_name: str) -> str:
+    return re.split(r'\(ID:|\sAttempt\s\d', raw_name)[0].strip()
+
+
+async def extract_data_for_current_student(
+    page: Page,
+    single_pass: bool = EXTRACTION_MODE == "single_pass",
+    submission_state: Optional[str] = None,
+) -> StudentSubmissionData:
+    """
+    Extracts the current SpeedGrader student. The single-pass mode does the whole DOM walk in one
+    in-page script per frame; if that script fails we fall back to the per-selector locator path.
+    Pass `submission_state` when the caller already resolved it (e.g. via wait_for_student_ready).
+    """
+    with span("extract"):
+        # Resolve on whichever of no-submission / iframe / main content appears first instead of stacking timeouts
+        if submission_state is None:
+            with span("extract.detect_state"):
+                submission_state = await detect_submission_state(page)
+        if single_pass:
+            try:
+                with span("extract.single_pass"):
+                    return await _extract_data_single_pass(page)
+            except Exception as e_single_pass:
+                log_warning(f"Single-pass extraction failed ({e_single_pass}). Falling back to locator-based extraction.")
+        with span("extract.locators"):
+            return await _extract_data_with_locators(page, submission_state)
+
+
+async def _extract_data_single_pass(page: Page) -> StudentSubmissionData:
+    log_info(f"Attempting single-pass extraction for student at URL: {page.url}")
+    current_student_id = "ID not found"
+    current_student_name = "Name not found"
+
+    student_id_match = re.search(r'student_id=(\d+)', page.url)
+    if student_id_match: current_student_id = student_id_match.group(1)
+    if current_student_id == "ID not found": log_warning("Student ID not found in URL.")
+
+    payload = await page.evaluate(EXTRACT_SUBMISSION_SCRIPT, extraction_script_config(read_page_state=True))
+
+    if payload["raw_name"]:
+        current_student_name = _clean_student_name(payload["raw_name"])
+    if current_student_name == "Name not found": log_warning(f"Student Name not found for ID {current_student_id}.")
+
+    if payload["no_submission"]:
+        log_info(f"Student {current_student_id} ({current_student_name}): Confirmed no submission via indicator '{NO_SUBMISSION_INDICATOR_SELECTOR}'.")
+        return StudentSubmissionData(
+            student_id=current_student_id,
+            student_name=current_student_name,
+            entries=[],
+            status="This student does not have a submission for this assignment (explicit indicator)."
+        )
+
+    if payload["iframe_present"] and not payload["iframe_ready"]:
+        # Cross-origin or still-loading iframe: run the same script inside the frame itself
+        iframe_element = await page.query_selector(IFRAME_SELECTOR)
+        frame = await iframe_element.content_frame() if iframe_element else None
+        if frame:
+            await page.frame_locator(IFRAME_SELECTOR).locator('body').wait_for(state="visible", timeout=10000)
+            frame_payload = await frame.evaluate(EXTRACT_SUBMISSION_SCRIPT, extraction_script_config(read_page_state=False))
+            payload.update({k: frame_payload[k] for k in ("search_root", "entry_count", "entries")}, scope="iframe")
+        else:
+            # The script returned before scanning anything, so let the locator path wait for the frame instead
+            raise RuntimeError(f"Iframe '{IFRAME_SELECTOR}' was visible but its frame could not be resolved")
+
+    iframe_focused = payload["scope"] == "iframe"
+    entry_count = payload["entry_count"]
+    if not entry_count:
+        status_msg = f"No discussion entry elements found in the determined content area ({payload['search_root']}) for student {current_student_id}."
+        if iframe_focused:
+            status_msg = f"Submission iframe was focused, but no discussion entries found within it (search root: {payload['search_root']}) for student {current_student_id}."
+        log_warning(status_msg)
+        return StudentSubmissionData(student_id=current_student_id, student_name=current_student_name, entries=[], status=status_msg)
+
+    author_entry = current_student_name if current_student_name != "Name not found" else "Student name not resolved"
+    extracted_entries: List[DiscussionEntry] = []
+    for i, raw_entry in enumerate(payload["entries"]):
+        if raw_entry["post_date"] or raw_entry["content"]:
+            extracted_entries.append(DiscussionEntry(
+                author=author_entry,
+                post_date=raw_entry["post_date"] or "Date not found",
+                content=raw_entry["content"] or "Content not found",
+            ))
+        else:
+            log_error(f"Entry {i+1}: SKIPPED. No valid date OR content found for student {current_student_id}.")
+
+    if not extracted_entries:
+        status_msg = f"Found {entry_count} entry elements for student {current_student_id}, but NO meaningful data could be extracted."
+        log_error(status_msg)
+        return StudentSubmissionData(student_id=current_student_id, student_name=current_student_name, entries=[], status=status_msg)
+
+    final_status_message = f"Successfully extracted {len(extracted_entries)} entries for student {current_student_id}."
+    final_status_message += " (from iframe)" if iframe_focused else " (from main page content)"
+    log_success(final_status_message)
+    return StudentSubmissionData(
+        student_id=current_student_id,
+        student_name=current_student_name,
+        entries=extracted_entries,
+        status=final_status_message
+    )
+
+
+async def _extract_data_with_locators(page: Page, submission_state: str) -> StudentSubmissionData:
     log_info(f"Attempting to extract data for student at URL: {page.url}")
     current_student_id = "ID not found"
     current_student_name = "Name not found"
@@ -38,8 +161,7 @@ async def extract_data_for_current_student(page: Page) -> StudentSubmissionData:
         if current_student_id != "ID not found": log_success(f"Student ID: {current_student_id}")
         else: log_warning("Student ID not found in URL.")
 
-        name_selectors = ["span.ui-selectmenu-status span.ui-selectmenu-item-header", "#speedgrader_selected_student_label"]
-        for selector in name_selectors:
+        for selector in NAME_SELECTORS:
             name_element_locator = page.locator(selector).first
             if await name_element_locator.count() > 0:
                 try:
@@ -47,22 +169,20 @@ async def extract_data_for_current_student(page: Page) -> StudentSubmissionData:
                     if await name_element_locator.is_visible(timeout=1000): # Short timeout for name
                         raw_name = await name_element_locator.text_content()
                         if raw_name:
-                            current_student_name = re.split(r'\(ID:|\sAttempt\s\d', raw_name)[0].strip()
+                            current_student_name = _clean_student_name(raw_name)
                             break
                     else:
-                        log_debug(f"Name element for selector '{selector}' not visible quickly.")
+                        log_debug("Name element for selector '%s' not visible quickly.", selector)
                 except Exception as e_name_vis:
-                    log_debug(f"Error checking visibility for name selector '{selector}': {e_name_vis}")
+                    log_debug("Error checking visibility for name selector '%s': %s", selector, e_name_vis)
             
         if current_student_name != "Name not found": log_success(f"Student Name: {current_student_name}")
         else: log_warning(f"Student Name not found for ID {current_student_id}.")
 
         # --- "No Submission" Check (from the last reliable iteration) ---
-        no_submission_indicator_sel = "div#this_student_does_not_have_a_submission"
-        no_submission_indicator = page.locator(no_submission_indicator_sel)
-        
-        try:
-            await no_submission_indicator.wait_for(state="visible", timeout=2000)
+        no_submission_indicator_sel = NO_SUBMISSION_INDICATOR_SELECTOR
+
+        if submission_state == SUBMISSION_STATE_NO_SUBMISSION:
             log_info(f"Student {current_student_id} ({current_student_name}): Confirmed no submission via indicator '{no_submission_indicator_sel}'.")
             return StudentSubmissionData(
                 student_id=current_student_id,
@@ -70,8 +190,7 @@ async def extract_data_for_current_student(page: Page) -> StudentSubmissionData:
                 entries=[],
                 status="This student does not have a submission for this assignment (explicit indicator)."
             )
-        except Exception: 
-            log_info(f"Indicator '{no_submission_indicator_sel}' not visible. Assuming a submission exists for {current_student_id} ({current_student_name}).")
+        log_info(f"Indicator '{no_submission_indicator_sel}' not visible (state: {submission_state}). Assuming a submission exists for {current_student_id} ({current_student_name}).")
         # --- End "No Submission" Check ---
 
         # 3. IFRAME DETECTION AND SCOPE SWITCHING (from the last reliable iteration, slightly adjusted for clarity)
@@ -79,50 +198,54 @@ async def extract_data_for_current_student(page: Page) -> StudentSubmissionData:
         iframe_focused = False
         log_info(f"Initial submission_scope is main page ({page.url}).")
         
-        iframe_holder_locator = page.locator('div#iframe_holder')
-        iframe_sel_to_check = 'iframe#speedgrader_iframe'
+        iframe_holder_locator = page.locator(IFRAME_HOLDER_SELECTOR)
+        iframe_sel_to_check = IFRAME_SELECTOR
         
-        try:
-            await iframe_holder_locator.wait_for(state="visible", timeout=5000) # Check if iframe container is visible
-            log_debug(f"iframe_holder 'div#iframe_holder' is visible for {current_student_id}.")
+        if submission_state == SUBMISSION_STATE_MAIN_CONTENT: # Only resolved when no submission iframe was visible
+            log_debug("Submission state is '%s'; skipping iframe focus for %s.", submission_state, current_student_id)
+        else:
+            try:
+                # Resolve immediately when the state race saw the iframe body; on "unknown" they give it a last chance
+                await iframe_holder_locator.wait_for(state="visible", timeout=5000) # Check if iframe container is visible
+                log_debug("iframe_holder 'div#iframe_holder' is visible for %s.", current_student_id)
             
-            iframe_locator_on_page = page.locator(iframe_sel_to_check) # Now locate the iframe
-            if await iframe_locator_on_page.count() > 0:
-                log_info(f"Iframe element(s) FOUND for selector '{iframe_sel_to_check}'. Using first.")
-                iframe_element = iframe_locator_on_page.first
-                try:
-                    await iframe_element.wait_for(state="visible", timeout=5000) # Wait for iframe itself to be visible
-                    current_frame_scope = iframe_element.frame_locator(':scope')
-                    # Wait for body inside iframe to ensure content is loaded and visible
-                    await current_frame_scope.locator('body').wait_for(state="visible", timeout=10000) 
+                iframe_locator_on_page = page.locator(iframe_sel_to_check) # Now locate the iframe
+                if await iframe_locator_on_page.count() > 0:
+                    log_info(f"Iframe element(s) FOUND for selector '{iframe_sel_to_check}'. Using first.")
+                    iframe_element = iframe_locator_on_page.first
+                    try:
+                        await iframe_element.wait_for(state="visible", timeout=5000) # Wait for iframe itself to be visible
+                        current_frame_scope = iframe_element.frame_locator(':scope')
+                        # Wait for body inside iframe to ensure content is loaded and visible
+                        await current_frame_scope.locator('body').wait_for(state="visible", timeout=10000) 
                     
-                    log_success(f"Successfully focused on iframe '{iframe_sel_to_check}'. New submission_scope is this FrameLocator.")
-                    submission_scope = current_frame_scope # Switch scope to the iframe
-                    iframe_focused = True
-                except Exception as e_iframe_focus:
-                    log_warning(f"Error focusing/interacting with iframe '{iframe_sel_to_check}': {e_iframe_focus}.")
-            else:
-                log_warning(f"iframe_holder was visible, but iframe '{iframe_sel_to_check}' count was 0.")
-        except Exception as e_iframe_holder:
-            log_warning(f"iframe_holder 'div#iframe_holder' was NOT visible or error: {e_iframe_holder}. Assuming content (if any) is on main page.")
+                        log_success(f"Successfully focused on iframe '{iframe_sel_to_check}'. New submission_scope is this FrameLocator.")
+                        submission_scope = current_frame_scope # Switch scope to the iframe
+                        iframe_focused = True
+                    except Exception as e_iframe_focus:
+                        log_warning(f"Error focusing/interacting with iframe '{iframe_sel_to_check}': {e_iframe_focus}.")
+                else:
+                    log_warning(f"iframe_holder was visible, but iframe '{iframe_sel_to_check}' count was 0.")
+            except Exception as e_iframe_holder:
+                log_warning(f"iframe_holder 'div#iframe_holder' was NOT visible or error: {e_iframe_holder}. Assuming content (if any) is on main page.")
         
         if not iframe_focused:
             log_warning(f"No specific iframe focused for {current_student_id}. Content search will be on main page.")
         
         # --- SECTION 4: LOCATE THE MAIN CONTENT AREA (FROM OLD ROBUST FUNCTION) ---
         log_info(f"Current submission_scope for content search: {type(submission_scope)}")
-        main_content_container_sel = 'div#content.ic-Layout-contentMain'
-        submission_description_sel = 'div.submission_description'
+        main_content_container_sel = MAIN_CONTENT_CONTAINER_SELECTOR
+        submission_description_sel = SUBMISSION_DESCRIPTION_SELECTOR
         search_root_locator: Union[Page, FrameLocator, Locator] = submission_scope # Default
         
         # Note: .first is a property, not a method call
         main_content_loc = submission_scope.locator(main_content_container_sel).first 
         
         # Using the old robust logic: count > 0 and is_visible(timeout=...)
-        if await main_content_loc.count() > 0 and await main_content_loc.is_visible(timeout=7000):
+        if await main_content_loc.count() > 0 and await main_content_loc.is_visible():
             log_success(f"'{main_content_container_sel}' is VISIBLE in current scope.")
             submission_desc_loc = main_content_loc.locator(submission_description_sel).first
-            if await submission_desc_loc.count() > 0 and await submission_desc_loc.is_visible(timeout=5000):
+            if await submission_desc_loc.count() > 0 and await submission_desc_loc.is_visible():
                 log_success(f"'{submission_description_sel}' is VISIBLE. Using it as search_root_locator.")
                 search_root_locator = submission_desc_loc
             else:
@@ -135,13 +258,13 @@ async def extract_data_for_current_student(page: Page) -> StudentSubmissionData:
         log_info(f"Final search_root_locator type: {type(search_root_locator)}")
 
         # --- SECTION 5: FIND ALL DISCUSSION ENTRIES (FROM OLD ROBUST FUNCTION) ---
-        entry_selector = 'div.discussion_entry.communication_message'
-        entry_selector_fallback = 'article.discussion-entry, div.comment_holder > div.comment'
+        entry_selector = ENTRY_SELECTOR
+        entry_selector_fallback = ENTRY_SELECTOR_FALLBACK
         
         # search_root_locator can be Page, FrameLocator, or Locator. All have .locator()
         discussion_entry_locators = await search_root_locator.locator(entry_selector).all()
         if not discussion_entry_locators:
-            log_debug(f"No entries found with primary selector '{entry_selector}'. Trying fallback...")
+            log_debug("No entries found with primary selector '%s'. Trying fallback...", entry_selector)
             discussion_entry_locators = await search_root_locator.locator(entry_selector_fallback).all()
 
         if not discussion_entry_locators:
@@ -156,45 +279,41 @@ async def extract_data_for_current_student(page: Page) -> StudentSubmissionData:
 
         # --- DETAILED PARSING LOOP (FROM OLD ROBUST FUNCTION) ---
         for i, entry_loc_item in enumerate(discussion_entry_locators): 
-            log_step(i + 1, f"Processing entry element {i + 1}/{len(discussion_entry_locators)}")
-            try:
-                # Ensure element is attached before trying to get HTML. Short timeout.
-                await entry_loc_item.wait_for(state="attached", timeout=2000) 
-                entry_html_snippet_handle = await entry_loc_item.evaluate_handle('(element) => element.outerHTML.slice(0, 1200)')
-                log_debug(f"Entry {i+1} HTML SNIPPET:\n{await entry_html_snippet_handle.json_value()}")
-            except Exception as e_entry_html: 
-                log_warning(f"Could not get HTML snippet for entry {i+1}: {e_entry_html}")
+            log_step(i + 1, "Processing entry element %d/%d", i + 1, len(discussion_entry_locators))
+            if log_enabled(DEBUG): # The snippet costs a browser round trip per entry; only pay it when it is logged
+                try:
+                    # Ensure element is attached before trying to get HTML. Short timeout.
+                    await entry_loc_item.wait_for(state="attached", timeout=2000) 
+                    log_debug("Entry %d HTML SNIPPET:\n%s", i + 1, await entry_loc_item.evaluate('(element) => element.outerHTML.slice(0, 1200)'))
+                except Exception as e_entry_html: 
+                    log_warning(f"Could not get HTML snippet for entry {i+1}: {e_entry_html}")
 
             author_entry = current_student_name if current_student_name != "Name not found" else "Student name not resolved"
-            log_debug(f"Entry {i+1}: Author determined as '{author_entry}'")
+            log_debug("Entry %d: Author determined as '%s'", i + 1, author_entry)
 
             post_date_entry = "Date not found"
             content_entry = "Content not found"
 
             # Date Extraction (Old Robust Logic)
-            date_sels_map = {
-                'div.header div.post_date.time_ago_date': ['data-timestamp', 'title', 'text'],
-                '.discussion-header-content time': ['datetime', 'title', 'text'],
-                '.posted_at time': ['datetime', 'title', 'text'],
-            }
+            date_sels_map = DATE_SELECTORS_MAP
             date_found_for_this_entry = False
             for date_sel_str_item, attr_priority_item in date_sels_map.items():
                 if date_found_for_this_entry: break
-                log_debug(f"Entry {i+1}: Trying date selector '{date_sel_str_item}'")
+                log_debug("Entry %d: Trying date selector '%s'", i + 1, date_sel_str_item)
                 date_element_loc = entry_loc_item.locator(date_sel_str_item).first # .first is a property
                 
                 if await date_element_loc.count() > 0: 
-                    log_debug(f"Entry {i+1}:   FOUND element for date selector '{date_sel_str_item}'.")
+                    log_debug("Entry %d:   FOUND element for date selector '%s'.", i + 1, date_sel_str_item)
                     try:
                         # No explicit wait_for here, as per old robust logic (relying on count > 0)
                         for attr_type in attr_priority_item:
                             val = None
                             if attr_type == 'text':
                                 val = await date_element_loc.text_content()
-                                log_debug(f"Entry {i+1}:     '{date_sel_str_item}' -> text_content(): '{val}'")
+                                log_debug("Entry %d:     '%s' -> text_content(): '%s'", i + 1, date_sel_str_item, val)
                             else:
                                 val = await date_element_loc.get_attribute(attr_type)
-                                log_debug(f"Entry {i+1}:     '{date_sel_str_item}' -> get_attribute('{attr_type}'): '{val}'")
+                                log_debug("Entry %d:     '%s' -> get_attribute('%s'): '%s'", i + 1, date_sel_str_item, attr_type, val)
                             
                             if val and val.strip():
                                 post_date_entry = val.strip()
@@ -204,34 +323,32 @@ async def extract_data_for_current_student(page: Page) -> StudentSubmissionData:
                     except Exception as e_date_extract:
                         log_warning(f"Entry {i+1}:     Error processing date element for '{date_sel_str_item}': {e_date_extract}")
                 else:
-                    log_debug(f"Entry {i+1}:   NO element found for date selector '{date_sel_str_item}'.")
+                    log_debug("Entry %d:   NO element found for date selector '%s'.", i + 1, date_sel_str_item)
             if not date_found_for_this_entry: log_warning(f"Entry {i+1}: DATE extraction FAILED.")
 
             # Content Extraction (Old Robust Logic - using text_content())
-            content_sels_list = [
-                'div.content div.message.user_content.enhanced', '.message_body', '.entry_content'
-            ]
+            content_sels_list = CONTENT_SELECTORS
             content_found_for_this_entry = False
             for content_sel_str_item in content_sels_list:
                 if content_found_for_this_entry: break
-                log_debug(f"Entry {i+1}: Trying content selector '{content_sel_str_item}'")
+                log_debug("Entry %d: Trying content selector '%s'", i + 1, content_sel_str_item)
                 content_element_loc = entry_loc_item.locator(content_sel_str_item).first # .first is a property
 
                 if await content_element_loc.count() > 0:
-                    log_debug(f"Entry {i+1}:   FOUND element for content selector '{content_sel_str_item}'.")
+                    log_debug("Entry %d:   FOUND element for content selector '%s'.", i + 1, content_sel_str_item)
                     try:
                         # Using text_content() as per old robust logic
                         extracted_text = await content_element_loc.text_content() 
-                        log_debug(f"Entry {i+1}:     Raw text (len {len(extracted_text or '')}): '{(extracted_text or '')[:200]}...'")
+                        log_debug("Entry %d:     Raw text (len %d): '%.200s...'", i + 1, len(extracted_text or ''), extracted_text or '')
                         if extracted_text and extracted_text.strip():
                             content_entry = extracted_text.strip()
                             log_success(f"Entry {i+1}:   CONTENT extracted (len {len(content_entry)}) using '{content_sel_str_item}'.")
                             content_found_for_this_entry = True; break
-                        else: log_debug(f"Entry {i+1}:     Content element found but text is empty/whitespace.")
+                        else: log_debug("Entry %d:     Content element found but text is empty/whitespace.", i + 1)
                     except Exception as e_content_extract:
                         log_warning(f"Entry {i+1}:     Error processing content element for '{content_sel_str_item}': {e_content_extract}")
                 else:
-                    log_debug(f"Entry {i+1}:   NO element found for content selector '{content_sel_str_item}'.")
+                    log_debug("Entry %d:   NO element found for content selector '%s'.", i + 1, content_sel_str_item)
             if not content_found_for_this_entry: log_warning(f"Entry {i+1}: CONTENT extraction FAILED.")
             
             if post_date_entry != "Date not found" or content_entry != "Content not found":
@@ -268,8 +385,272 @@ async def extract_data_for_current_student(page: Page) -> StudentSubmissionData:
         return StudentSubmissionData(student_id=current_student_id, student_name=current_student_name, status="Extraction failed with critical error.", error=str(e))
 
                 
+# --- Output Helpers ---
+def emit_student(
+    student_data: StudentSubmissionData,
+    report_writer: Optional[JsonlReportWriter] = None,
+    pipeline: Optional[ScrapeAnalyzePipeline] = None,
+) -> None:
+    """Hands a finished student to the streaming compiled report and the analysis pipeline."""
+    if report_writer:
+        report_writer.append(student_data)
+    if pipeline:
+        pipeline.submit(student_data)
+
+
+def persist_student(
+    student_data: StudentSubmissionData,
+    checkpoint: Optional[CrawlCheckpoint],
+    output_dir: str = OUTPUT_FOLDER_NAME,
+    submission_hint: Optional[str] = None,
+    report_writer: Optional[JsonlReportWriter] = None,
+    pipeline: Optional[ScrapeAnalyzePipeline] = None,
+    html_snapshot: Optional[dict] = None,
+) -> None:
+    """
+    Emits the student (compiled report, analysis pipeline), saves the per-student file (unless the
+    checkpoint already holds identical content) and records it in the checkpoint. `html_snapshot`,
+    if captured, is archived next to the per-student file for offline re-parsing.
+    """
+    with span("persist"):
+        emit_student(student_data, report_writer, pipeline)
+        if checkpoint and checkpoint.is_unchanged(student_data):
+            log_info(f"Student {student_data.student_id} unchanged since the last checkpoint. Keeping existing file.")
+            saved_path = checkpoint.students[student_data.student_id]["file"]
+            checkpoint.record(student_data, saved_path, submission_hint)
+        else:
+            saved_path = save_student_data(student_data, output_dir)
+            if checkpoint and saved_path:
+                checkpoint.record(student_data, saved_path, submission_hint)
+        if html_snapshot and saved_path:
+            write_html_archive(html_archive_path(saved_path), html_snapshot)
+    log_event(
+        "student_saved", student_id=student_data.student_id, student_name=student_data.student_name,
+        entries=len(student_data.entries), failed=bool(student_data.error),
+    )
+
+
+def emit_checkpointed_student(
+    student_data: StudentSubmissionData,
+    report_writer: Optional[JsonlReportWriter] = None,
+    pipeline: Optional[ScrapeAnalyzePipeline] = None,
+) -> None:
+    """Emits a student loaded from the checkpoint; the event keeps progress totals in step with the roster."""
+    emit_student(student_data, report_writer, pipeline)
+    log_event(
+        "student_saved", student_id=student_data.student_id, student_name=student_data.student_name,
+        entries=len(student_data.entries), failed=bool(student_data.error), skipped=True,
+    )
+
+
+# --- Crawl Strategies ---
+async def read_student_roster(page: Page) -> List[Dict[str, str]]:
+    """Reads the SpeedGrader roster once (student dropdown, then `student_id=` links)."""
+    try:
+        roster = await page.evaluate(READ_ROSTER_SCRIPT, roster_script_config())
+    except Exception as e_roster:
+        log_error(f"Failed to read student roster: {e_roster}")
+        return []
+    log_info(f"Read roster of {len(roster)} students from SpeedGrader.")
+    return roster
+
+
+async def read_submission_hints(page: Page, speedgrader_url: str) -> Dict[str, str]:
+    """
+    Per-student submission hints from SpeedGrader's JSON endpoint, fetched once with the page's
+    cookies. Incremental crawls skip students whose hint matches their checkpoint.
+    """
+    json_url = build_speedgrader_json_url(speedgrader_url)
+    try:
+        response = await page.request.get(json_url, timeout=30000)
+        body = await response.text()
+        speedgrader_data = json.loads(body[len("while(1);"):] if body.startswith("while(1);") else body)
+    except Exception as e_hints:
+        log_warning(f"Could not read submission hints from {json_url}: {e_hints}")
+        return {}
+    hints = {str(sub["user_id"]): submission_hint(sub) for sub in speedgrader_data.get("submissions", []) if sub.get("user_id")}
+    log_info(f"Read submission hints for {len(hints)} students.")
+    return hints
+
+
+async def crawl_students_sequential(
+    page: Page,
+    output_dir: str = OUTPUT_FOLDER_NAME,
+    checkpoint: Optional[CrawlCheckpoint] = None,
+    report_writer: Optional[JsonlReportWriter] = None,
+    pipeline: Optional[ScrapeAnalyzePipeline] = None,
+) -> List[str]:
+    """
+    Visits students one at a time by clicking the Next Student button. Students the checkpoint says
+    can be skipped are still visited (the button is the only way forward) but loaded from their saved
+    files instead of extracted. Returns the student IDs processed.
+    """
+    processed_student_ids: List[str] = []
+    next_button_selector = NEXT_BUTTON_SELECTOR
+    # prev_button_selector = "button#prev-student-button, button[aria-label='Previous Student']" # For reference
+
+    processed_student_ids_this_run = set()
+    submission_state: Optional[str] = None # Resolved by the readiness wait after each navigation
+
+    # MAX_STUDENTS = 3 # For testing, uncomment and set a small number
+    # students_done_count = 0
+
+    while True: # students_done_count < MAX_STUDENTS:
+        current_url_for_check = page.url # For checking if URL changes after click
+
+        log_info(f"Processing page: {current_url_for_check}")
+
+        # First student: wait for the page to stabilize (next button usable, student page ready)
+        if submission_state is None:
+            try:
+                next_button_loc_check = page.locator(next_button_selector).first
+                await next_button_loc_check.wait_for(state="visible", timeout=15000)
+                log_debug("Next button visible. Waiting for student page readiness...")
+                submission_state, _ = await wait_for_student_ready(page)
+            except Exception as e_wait_stable:
+                log_error(f"Page did not stabilize for student at {current_url_for_check}: {e_wait_stable}")
+                # Decide: break or try to extract? For now, try to extract.
+                log_warning("Attempting extraction despite potential page instability.")
+
+        # No submission hints here, so only the resume mode can skip a student
+        url_student_id = re.search(r'student_id=(\d+)', page.url)
+        skipped = bool(checkpoint and url_student_id and checkpoint.can_skip(url_student_id.group(1)))
+        if skipped:
+            log_info(f"Student {url_student_id.group(1)} already captured ({checkpoint.mode} mode). Loading the saved file.")
+            student_data = checkpoint.load_student(url_student_id.group(1))
+            html_snapshot = None
+        else:
+            student_data = await extract_data_for_current_student(page, submission_state=submission_state)
+            html_snapshot = await capture_submission_html(page) if HTML_ARCHIVE and submission_state != SUBMISSION_STATE_NO_SUBMISSION else None
+        submission_state = None
+
+        # Check for loop conditions or inability to get ID
+        if student_data.student_id == "ID not found":
+            log_error("Student ID could not be determined. Breaking loop to prevent processing unknown student.")
+            emit_student(student_data, report_writer, pipeline) # Save what we have
+            break
+        if student_data.student_id in processed_student_ids_this_run:
+            log_warning(f"Student ID {student_data.student_id} re-encountered. This could mean the page didn't advance. Breaking loop.")
+            emit_student(student_data, report_writer, pipeline) # Save what we have before breaking
+            break
+
+        processed_student_ids_this_run.add(student_data.student_id)
+        processed_student_ids.append(student_data.student_id)
+        # students_done_count += 1
+
+        if skipped:
+            emit_checkpointed_student(student_data, report_writer, pipeline)
+        else:
+            persist_student(student_data, checkpoint, output_dir, report_writer=report_writer, pipeline=pipeline, html_snapshot=html_snapshot)
+
+        # Navigate to the next student
+        next_button_locator = page.locator(next_button_selector).first
+        if not await next_button_locator.is_visible(timeout=5000) or not await next_button_locator.is_enabled(timeout=5000):
+            log_info("Next student button is not visible or enabled. Assuming end of student list.")
+            break
+
+        log_info("Clicking 'Next Student' button...")
+        try:
+            previous_snapshot = await read_navigation_snapshot(page)
+            with span("next_click"):
+                await next_button_locator.click(timeout=10000)
+            # Wait for the URL, student label, iframe src and submission content to switch over
+            log_debug("Waiting for student page to advance from %s...", current_url_for_check)
+            submission_state, _ = await wait_for_student_ready(page, previous=previous_snapshot)
+            log_success(f"Advanced to: {page.url}")
+        except Exception as e_nav:
+            log_error(f"Error clicking 'Next Student' or waiting for new page: {e_nav}")
+            if page.url == current_url_for_check:
+                 log_error("URL did not change. Potential stuck page. Breaking loop.")
+            traceback.print_exc()
+            break
+
+    return processed_student_ids
+
+
+async def crawl_students_parallel(
+    context: BrowserContext,
+    speedgrader_url: str,
+    roster: List[Dict[str, str]],
+    concurrency: int = CRAWL_CONCURRENCY,
+    output_dir: str = OUTPUT_FOLDER_NAME,
+    checkpoint: Optional[CrawlCheckpoint] = None,
+    submission_hints: Optional[Dict[str, str]] = None,
+    report_writer: Optional[JsonlReportWriter] = None,
+    pipeline: Optional[ScrapeAnalyzePipeline] = None,
+    tab_slots: Optional[asyncio.Semaphore] = None,
+) -> List[str]:
+    """
+    Opens up to `concurrency` tabs in the authenticated context and navigates each one straight to
+    `...speed_grader?assignment_id=X&student_id=Y`. Students the checkpoint says can be skipped are
+    loaded from their saved files without navigating. `tab_slots`, shared between concurrent crawls,
+    caps how many students are loading at once across all of them. Returns the student IDs in roster order.
+    """
+    session = await context.get_session()
+    playwright_context = session.context
+    submission_hints = submission_hints or {}
+    pending: asyncio.Queue = asyncio.Queue()
+    results: List[Optional[str]] = [None] * len(roster)
+    for roster_idx, student in enumerate(roster):
+        if checkpoint and checkpoint.can_skip(student["student_id"], submission_hints.get(student["student_id"])):
+            emit_checkpointed_student(checkpoint.load_student(student["student_id"]), report_writer, pipeline)
+            results[roster_idx] = student["student_id"]
+            continue
+        pending.put_nowait((roster_idx, student))
+    if len(roster) - pending.qsize():
+        log_info(f"Skipping {len(roster) - pending.qsize()} students already captured ({checkpoint.mode} mode).")
+    if pending.empty():
+        return [student_id for student_id in results if student_id is not None]
+    tab_count = max(1, min(concurrency, pending.qsize()))
+    log_info(f"Starting parallel crawl of {pending.qsize()} students across {tab_count} tabs.")
+
+    async def tab_worker(tab_num: int):
+        tab = await playwright_context.new_page()
+        try:
+            while True:
+                try:
+                    roster_idx, student = pending.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                async with tab_slots or nullcontext(): # Shared with the other assignments in a batch run
+                    with log_context(student_id=student["student_id"], phase="extract"):
+                        student_url = build_student_url(speedgrader_url, student["student_id"])
+                        log_info(f"[Tab {tab_num}] Navigating to student {student['student_id']} ({student['student_name']}).")
+                        submission_state = None
+                        try:
+                            with span("navigate"):
+                                await tab.goto(student_url, wait_until="domcontentloaded", timeout=30000)
+                            submission_state, _ = await wait_for_student_ready(tab, expected_student_id=student["student_id"])
+                        except Exception as e_nav:
+                            log_warning(f"[Tab {tab_num}] Page did not settle for student {student['student_id']}: {e_nav}. Attempting extraction anyway.")
+
+                        student_data = await extract_data_for_current_student(tab, submission_state=submission_state)
+                        html_snapshot = await capture_submission_html(tab) if HTML_ARCHIVE and submission_state != SUBMISSION_STATE_NO_SUBMISSION else None
+                        if student_data.student_id == "ID not found":
+                            student_data.student_id = student["student_id"]
+                        persist_student(
+                            student_data, checkpoint, output_dir, submission_hints.get(student["student_id"]), report_writer, pipeline, html_snapshot,
+                        )
+                        results[roster_idx] = student_data.student_id
+        finally:
+            await tab.close()
+
+    await asyncio.gather(*(tab_worker(n + 1) for n in range(tab_count)))
+    return [student_id for student_id in results if student_id is not None]
+
+
 # --- Main Execution Logic ---
-browser_manager = Browser()
+# Clients are built on first use so importing this module (e.g. from cli.py or the benchmarks) stays cheap
+@lru_cache(maxsize=None)
+def get_browser_manager() -> Browser:
+    return Browser()
+
+
+@lru_cache(maxsize=None)
+def get_auth_llm():
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(model=AUTH_MODEL_NAME)
+
 # controller = Controller() # Only if authenticator agent needs to register actions not defined elsewhere
 
 sensitive_data = {
@@ -277,40 +658,127 @@ sensitive_data = {
     "ms_password": os.getenv("MS_PASSWORD", "4Future$100%!"),
 }
 
-model = ChatGoogleGenerativeAI(model='gemini-2.0-flash-lite') # Keep for authenticator
-model_analyzer = ChatGoogleGenerativeAI(model='gemma-3-27b-it')
+
+
+async def authenticate(context: BrowserContext, speedgrader_url: str) -> bool:
+    """
+    Reuses the saved storage state when a quick SpeedGrader probe shows it is still valid;
+    otherwise runs the browser_use login agent and saves the fresh session for next time.
+    """
+    playwright_context = (await context.get_session()).context
+    saved_origins = await restore_session(playwright_context)
+    if saved_origins is not None:
+        if await probe_session(await context.get_current_page(), speedgrader_url, saved_origins):
+            return True
+
+    authenticator_agent = Agent(
+        task=AUTH_TASK.format(
+            url=speedgrader_url,
+            ms_email="ms_email",
+            ms_password="ms_password",
+        ),
+        llm=get_auth_llm(), # If your agent uses an LLM
+        message_context="You are a browser automation agent for login.",
+        browser_context=context,
+        sensitive_data=sensitive_data,
+        # controller=controller, # If agent uses registered actions
+    )
+    try:
+        await authenticator_agent.run()
+        log_success("Authentication and navigation to SpeedGrader complete.")
+    except Exception as auth_err:
+        log_error(f"Authenticator agent failed: {auth_err}")
+        traceback.print_exc()
+        return False
+
+    await save_session(playwright_context)
+    return True
+
+
+async def crawl_assignment(
+    context: BrowserContext,
+    page: Page,
+    speedgrader_url: str,
+    output_dir: str = OUTPUT_FOLDER_NAME,
+    analyzer: Optional[SubmissionAnalyzer] = None,
+    close_analyzer: bool = True,
+    tab_slots: Optional[asyncio.Semaphore] = None,
+) -> Tuple[List[str], Optional[ScrapeAnalyzePipeline]]:
+    """
+    Crawls one assignment whose SpeedGrader is open in `page` into `output_dir`. With an `analyzer`,
+    students are analyzed as they are emitted by a started pipeline the caller must `finish()`.
+    Returns the processed student IDs and that pipeline (None when not pipelined). If the crawl
+    raises, the pipeline is finished (cancelled when the crawl was cancelled) before re-raising.
+    """
+    checkpoint = CrawlCheckpoint(speedgrader_url, output_dir, mode=CRAWL_RESUME_MODE)
+    report_path = os.path.join(output_dir, COMPILED_REPORT_JSONL_NAME)
+    roster = await read_student_roster(page) if CRAWL_MODE == "parallel" else []
+    log_event("crawl_started", speedgrader_url=speedgrader_url, total_students=len(roster) or None)
+    pipeline = None
+    if analyzer:
+        # Part 2 runs alongside the crawl: analyzer workers classify each student as it is emitted
+        pipeline = ScrapeAnalyzePipeline(
+            analyzer,
+            os.path.join(output_dir, ANALYZED_CSV_NAME),
+            entry_writer=EntryParquetWriter(os.path.join(output_dir, ANALYZED_PARQUET_NAME), speedgrader_url) if PARQUET_OUTPUT else None,
+            close_analyzer=close_analyzer,
+        )
+        pipeline.start()
+    # The compiled report is streamed to JSONL as each student finishes
+    try:
+        with JsonlReportWriter(report_path) as report_writer, log_context(phase="crawl"), span("crawl"), closing(checkpoint):
+            if roster:
+                submission_hints = await read_submission_hints(page, speedgrader_url) if CRAWL_RESUME_MODE == RESUME_MODE_INCREMENTAL else {}
+                processed_student_ids = await crawl_students_parallel(
+                    context, speedgrader_url, roster, output_dir=output_dir,
+                    checkpoint=checkpoint, submission_hints=submission_hints, report_writer=report_writer, pipeline=pipeline,
+                    tab_slots=tab_slots,
+                )
+            else:
+                if CRAWL_MODE == "parallel":
+                    log_warning("Student roster could not be read. Falling back to the sequential Next Student crawl.")
+                processed_student_ids = await crawl_students_sequential(
+                    page, output_dir=output_dir, checkpoint=checkpoint, report_writer=report_writer, pipeline=pipeline,
+                )
+    except Exception:
+        if pipeline:
+            # Keep what the crawl emitted: analyze the queued students, write the CSV and close the Parquet file
+            log_warning("Crawl failed; finishing the analysis of the students captured so far.")
+            with log_context(phase="analyze"), span("analysis.drain"):
+                await pipeline.finish()
+        raise
+    except BaseException: # Cancelled or interrupted: stop the workers instead of waiting on the LLM
+        if pipeline:
+            await pipeline.cancel()
+        raise
+    if CRAWL_RESUME_MODE != RESUME_MODE_OFF:
+        # Rewrite the report in roster order, including students captured by earlier (possibly crashed) runs
+        write_jsonl_report(checkpoint.iter_compiled_report(processed_student_ids), report_path)
+    return processed_student_ids, pipeline
 
 
 async def main():
-    all_students_data: List[StudentSubmissionData] = []
-    
+    run_id = configure_logging()
+    log_info(f"Starting run {run_id}.")
     if not os.path.exists(OUTPUT_FOLDER_NAME):
         os.makedirs(OUTPUT_FOLDER_NAME)
         log_info(f"Created output folder: ./{OUTPUT_FOLDER_NAME}/")
 
+    browser_manager = get_browser_manager()
+    model_analyzer = create_analyzer_llm()
     async with await browser_manager.new_context(
         # viewport={"width": 1920, "height": 1080}, # Example: set viewport
         # user_agent="Mozilla/5.0 ...", # Example: set user agent
     ) as context: # This is browser_use.BrowserContext
+        playwright_context = (await context.get_session()).context
+        lean_profile = LeanScrapeProfile() if LEAN_SCRAPE else None
+        if lean_profile:
+            lean_profile.observe(playwright_context) # Learn typical response sizes while logging in
+
         # 1. Authentication and Navigation
-        authenticator_agent = Agent(
-            task=AUTH_TASK.format(
-                url="https://usu.instructure.com/courses/780705/gradebook/speed_grader?assignment_id=4809230&student_id=1812493",
-                ms_email="ms_email",
-                ms_password="ms_password",
-            ),
-            llm=model, # If your agent uses an LLM
-            message_context="You are a browser automation agent for login.",
-            browser_context=context,
-            sensitive_data=sensitive_data,
-            # controller=controller, # If agent uses registered actions
-        )
-        try:
-            await authenticator_agent.run()
-            log_success("Authentication and navigation to SpeedGrader complete.")
-        except Exception as auth_err:
-            log_error(f"Authenticator agent failed: {auth_err}")
-            traceback.print_exc()
+        with log_context(phase="auth"), span("auth"):
+            authenticated = await authenticate(context, SPEEDGRADER_URL)
+        if not authenticated:
             await browser_manager.close()
             return
 
@@ -320,115 +788,48 @@ async def main():
             await browser_manager.close()
             return
 
-        log_info("Starting Playwright data extraction loop...")
-        next_button_selector = "button#next-student-button, button[aria-label='Next Student'], button[data-testid='next-student-button']"
-        # prev_button_selector = "button#prev-student-button, button[aria-label='Previous Student']" # For reference
-        
-        processed_student_ids_this_run = set()
-        
-        # 2. Student Data Extraction Loop 
-        # MAX_STUDENTS = 3 # For testing, uncomment and set a small number
-        # students_done_count = 0
-
-        while True: # students_done_count < MAX_STUDENTS:
-            current_url_for_check = page.url # For checking if URL changes after click
-            
-            log_info(f"Processing page: {current_url_for_check}")
-
-            # Wait for page to stabilize (next button usable, network idle)
-            try:
-                next_button_loc_check = page.locator(next_button_selector).first
-                await next_button_loc_check.wait_for(state="visible", timeout=15000)
-                log_debug("Next button visible. Waiting for network idle...")
-                await page.wait_for_load_state('networkidle', timeout=30000) # Increased timeout
-                log_debug("Page network idle.")
-            except Exception as e_wait_stable:
-                log_error(f"Page did not stabilize for student at {current_url_for_check}: {e_wait_stable}")
-                # Decide: break or try to extract? For now, try to extract.
-                log_warning("Attempting extraction despite potential page instability.")
+        if lean_profile:
+            await lean_profile.apply(playwright_context)
 
-            student_data = await extract_data_for_current_student(page)
-            
-            # Check for loop conditions or inability to get ID
-            if student_data.student_id == "ID not found":
-                log_error("Student ID could not be determined. Breaking loop to prevent processing unknown student.")
-                all_students_data.append(student_data) # Save what we have
-                break
-            if student_data.student_id in processed_student_ids_this_run:
-                log_warning(f"Student ID {student_data.student_id} re-encountered. This could mean the page didn't advance. Breaking loop.")
-                all_students_data.append(student_data) # Save what we have before breaking
-                break
-            
-            processed_student_ids_this_run.add(student_data.student_id)
-            all_students_data.append(student_data)
-            # students_done_count += 1
-
-            # Save individual student data
-            s_id = sanitize_filename(student_data.student_id)
-            s_name = sanitize_filename(student_data.student_name if student_data.student_name != "Name not found" else "UnknownName")
-            individual_filename = os.path.join(OUTPUT_FOLDER_NAME, f"student_{s_id}_{s_name}.json")
-            try:
-                with open(individual_filename, "w", encoding='utf-8') as f_out:
-                    json.dump(student_data.model_dump(), f_out, indent=2, ensure_ascii=False)
-                log_success(f"Saved data for {s_name} ({s_id}) to {individual_filename}")
-            except Exception as e_save_ind:
-                log_error(f"Failed to save individual file {individual_filename}: {e_save_ind}")
-
-            # Navigate to the next student
-            next_button_locator = page.locator(next_button_selector).first
-            if not await next_button_locator.is_visible(timeout=5000) or not await next_button_locator.is_enabled(timeout=5000):
-                log_info("Next student button is not visible or enabled. Assuming end of student list.")
-                break
-            
-            log_info("Clicking 'Next Student' button...")
-            try:
-                await next_button_locator.click(timeout=10000)
-                # Wait for URL to change AND network to be idle (more robust)
-                log_debug(f"Waiting for URL to change from {current_url_for_check} and network to settle...")
-                await page.wait_for_function(
-                    f"() => window.location.href !== '{current_url_for_check}' && window.location.href.includes('student_id=')",
-                    timeout=20000 # Wait for URL to change
-                )
-                log_success(f"URL changed to: {page.url}")
-                await page.wait_for_load_state('networkidle', timeout=30000) # Then wait for content
-                log_success("Network idle after advancing to next student.")
-            except Exception as e_nav:
-                log_error(f"Error clicking 'Next Student' or waiting for new page: {e_nav}")
-                if page.url == current_url_for_check:
-                     log_error("URL did not change. Potential stuck page. Breaking loop.")
-                traceback.print_exc()
-                break
-        
-        log_success(f"Finished iterating. Processed {len(all_students_data)} student records.")
+        # 2. Student Data Extraction (and, when pipelined, analysis alongside it)
+        log_info(f"Starting Playwright data extraction ({CRAWL_MODE} crawl, resume mode: {CRAWL_RESUME_MODE})...")
+        analyzer = create_submission_analyzer(llm_instance=model_analyzer, max_entries=4) if PIPELINE_ANALYSIS else None
+        processed_student_ids, pipeline = await crawl_assignment(context, page, SPEEDGRADER_URL, OUTPUT_FOLDER_NAME, analyzer)
 
-        # 3. Save compiled report
-        if all_students_data:
-            compiled_report_path = os.path.join(OUTPUT_FOLDER_NAME, "ALL_students_compiled_report.json")
-            try:
-                data_to_save = [s.model_dump() for s in all_students_data]
-                with open(compiled_report_path, "w", encoding='utf-8') as f_all:
-                    json.dump(data_to_save, f_all, indent=2, ensure_ascii=False)
-                log_success(f"Saved compiled report to: {compiled_report_path}")
-            except Exception as e_save_all:
-                log_error(f"Failed to save compiled report {compiled_report_path}: {e_save_all}")
-        else:
-            log_warning("No student data was collected to compile a report.")
+        log_success(f"Finished iterating. Processed {len(processed_student_ids)} student records.")
+        if lean_profile:
+            lean_profile.log_summary()
 
         await browser_manager.close()
         log_info("--- Finished Part 1: Data Extraction. Browser closed. ---")
 
         # Part 2: Analysis and CSV Generation
+        if pipeline:
+            # Already running since the first student; wait for the queue to drain and assemble the CSV
+            with log_context(phase="analyze"), span("analysis.drain"):
+                await pipeline.finish()
+            log_info("--- Finished Part 2: Pipelined Submission Analysis and CSV Generation ---")
+            return
+
         # This part runs after the browser is closed and the JSON report is (presumably) generated.
         log_info("--- Starting Part 2: Submission Analysis and CSV Generation ---")
       
         # 4. Analyze and generate CSV
-        run_submission_analysis(llm_instance=model_analyzer)
+        with log_context(phase="analyze"), span("analysis"):
+            await run_submission_analysis(llm_instance=model_analyzer)
         log_info("--- Finished Part 2: Submission Analysis and CSV Generation ---")
     
 
-if __name__ == '__main__':
+def run_scrape():
+    """Scrape + analysis entry point shared by `python app.py` and `python cli.py scrape`."""
     try:
         asyncio.run(main())
     except Exception as e_main_run:
         log_error(f"Critical error in main execution: {e_main_run}")
-        traceback.print_exc()
\ No newline at end of file
+        traceback.print_exc()
+    finally:
+        write_perf_report(os.path.join(OUTPUT_FOLDER_NAME, PERF_REPORT_NAME))
+
+
+if __name__ == '__main__':
+    run_scrape()
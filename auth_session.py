@@ -0,0 +1,78 @@
+# --- Persisted Authenticated Session ---
+import json
+import os
+from typing import List, Optional
+from urllib.parse import urlparse
+
+from playwright.async_api import BrowserContext as PlaywrightBrowserContext, Page
+
+from logger import log_info, log_success, log_warning
+from speedgrader import NAME_SELECTORS, NEXT_BUTTON_SELECTOR
+from utils import SESSION_STATE_PATH
+
+SESSION_PROBE_TIMEOUT_MS = 15000
+
+
+async def restore_session(context: PlaywrightBrowserContext, state_path: str = SESSION_STATE_PATH) -> Optional[List[dict]]:
+    """
+    Loads the cookies saved by `save_session` and returns the saved localStorage origins for
+    `probe_session` to apply, or None if there is nothing usable.
+    """
+    if not os.path.exists(state_path):
+        log_info(f"No saved session at {state_path}.")
+        return None
+    try:
+        with open(state_path, "r", encoding="utf-8") as f_state:
+            storage_state = json.load(f_state)
+        await context.add_cookies(storage_state.get("cookies", []))
+    except Exception as e_restore:
+        log_warning(f"Could not restore saved session from {state_path}: {e_restore}")
+        return None
+    log_info(f"Restored {len(storage_state.get('cookies', []))} cookies from saved session {state_path}.")
+    return storage_state.get("origins", [])
+
+
+async def probe_session(page: Page, speedgrader_url: str, origins: Optional[List[dict]] = None) -> bool:
+    """
+    Opens SpeedGrader and checks we were not bounced to a login page. Only then is the saved
+    localStorage of the Canvas origin written (once, followed by a reload), so it never overwrites
+    Canvas' own later updates and never leaks into a fresh agent login.
+    """
+    try:
+        await page.goto(speedgrader_url, wait_until="domcontentloaded", timeout=SESSION_PROBE_TIMEOUT_MS)
+        if urlparse(page.url).hostname != urlparse(speedgrader_url).hostname or "speed_grader" not in page.url:
+            log_warning(f"Saved session expired (redirected to {urlparse(page.url).hostname}).")
+            return False
+        page_origin = await page.evaluate("window.location.origin")
+        saved = next((o for o in origins or [] if o.get("origin") == page_origin), None)
+        if saved and saved.get("localStorage"):
+            await page.evaluate(
+                "(items) => { for (const item of items) window.localStorage.setItem(item.name, item.value); }",
+                saved["localStorage"],
+            )
+            await page.reload(wait_until="domcontentloaded", timeout=SESSION_PROBE_TIMEOUT_MS)
+        await page.locator(f"{NEXT_BUTTON_SELECTOR}, {', '.join(NAME_SELECTORS)}").first.wait_for(
+            state="visible", timeout=SESSION_PROBE_TIMEOUT_MS
+        )
+    except Exception as e_probe:
+        log_warning(f"Saved session probe failed: {e_probe}")
+        return False
+    log_success("Saved session is still valid. Skipping the authenticator agent.")
+    return True
+
+
+async def save_session(context: PlaywrightBrowserContext, state_path: str = SESSION_STATE_PATH) -> None:
+    try:
+        os.makedirs(os.path.dirname(state_path) or ".", exist_ok=True)
+        storage_state = await context.storage_state()
+        # Holds live session cookies: created as 0600 from the start, then swapped in atomically
+        tmp_path = f"{state_path}.tmp"
+        if os.path.exists(tmp_path): # Left by an interrupted save, possibly with other permissions
+            os.remove(tmp_path)
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f_state:
+            json.dump(storage_state, f_state)
+        os.replace(tmp_path, state_path)
+        log_success(f"Saved authenticated session to {state_path}.")
+    except Exception as e_save:
+        log_warning(f"Could not save authenticated session to {state_path}: {e_save}")
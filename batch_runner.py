@@ -0,0 +1,115 @@
+# --- Multi-Assignment Batch Runner ---
+import asyncio
+import os
+import traceback
+from typing import Dict, List, Optional, Tuple
+
+from app import authenticate, crawl_assignment, get_browser_manager
+from lean_profile import LeanScrapeProfile
+from logger import configure_logging, log_context, log_error, log_info, log_success, log_warning
+from page_readiness import wait_for_student_ready
+from perf import span
+from speedgrader import build_assignment_url
+from submission_analizer import SubmissionAnalyzer, create_analyzer_llm, create_submission_analyzer, run_submission_analysis
+from utils import (
+    BATCH_JOB_CONCURRENCY, CRAWL_CONCURRENCY, LEAN_SCRAPE, OUTPUT_FOLDER_NAME, PIPELINE_ANALYSIS, SPEEDGRADER_URL,
+    assignment_output_dir,
+)
+
+BatchJob = Tuple[str, str] # (course_id, assignment_id)
+
+
+async def _run_job(
+    context,
+    job: BatchJob,
+    analyzer: Optional[SubmissionAnalyzer],
+    model_analyzer,
+    tab_slots: asyncio.Semaphore,
+) -> int:
+    """Crawls and analyzes one assignment in its own tab and output folder. Returns the students processed."""
+    course_id, assignment_id = job
+    speedgrader_url = build_assignment_url(SPEEDGRADER_URL, course_id, assignment_id)
+    output_dir = assignment_output_dir(course_id, assignment_id)
+    os.makedirs(output_dir, exist_ok=True)
+    log_info(f"Starting assignment {assignment_id} of course {course_id} -> ./{output_dir}/")
+
+    page = await (await context.get_session()).context.new_page()
+    try:
+        try:
+            await page.goto(speedgrader_url, wait_until="domcontentloaded", timeout=30000)
+            await wait_for_student_ready(page)
+        except Exception as e_open:
+            log_warning(f"SpeedGrader for assignment {assignment_id} did not settle: {e_open}. Continuing anyway.")
+        processed_student_ids, pipeline = await crawl_assignment(
+            context, page, speedgrader_url, output_dir, analyzer, close_analyzer=False, tab_slots=tab_slots,
+        )
+    finally:
+        await page.close()
+
+    if pipeline:
+        with log_context(phase="analyze"), span("analysis.drain"):
+            await pipeline.finish()
+    else:
+        with log_context(phase="analyze"), span("analysis"):
+            await run_submission_analysis(llm_instance=model_analyzer, output_dir=output_dir, speedgrader_url=speedgrader_url)
+    log_success(f"Finished assignment {assignment_id} of course {course_id}: {len(processed_student_ids)} students.")
+    return len(processed_student_ids)
+
+
+async def run_batch(jobs: List[BatchJob], job_concurrency: int = BATCH_JOB_CONCURRENCY) -> Dict[BatchJob, Optional[int]]:
+    """
+    Authenticates once and crawls every (course_id, assignment_id) job over the same browser context.
+    Up to `job_concurrency` assignments run at once and share one budget of CRAWL_CONCURRENCY loading
+    tabs; a single analyzer (cache, local classifier, dedupe index) serves all of them. Returns the
+    students processed per job, or None for jobs that failed.
+    """
+    run_id = configure_logging()
+    log_info(f"Starting batch run {run_id} over {len(jobs)} assignments ({job_concurrency} at a time).")
+    os.makedirs(OUTPUT_FOLDER_NAME, exist_ok=True)
+    results: Dict[BatchJob, Optional[int]] = {}
+    if not jobs:
+        log_warning("No batch jobs given.")
+        return results
+
+    browser_manager = get_browser_manager()
+    model_analyzer = create_analyzer_llm()
+    analyzer = create_submission_analyzer(llm_instance=model_analyzer, max_entries=4) if PIPELINE_ANALYSIS else None
+    async with await browser_manager.new_context() as context:
+        playwright_context = (await context.get_session()).context
+        lean_profile = LeanScrapeProfile() if LEAN_SCRAPE else None
+        if lean_profile:
+            lean_profile.observe(playwright_context)
+
+        with log_context(phase="auth"), span("auth"):
+            authenticated = await authenticate(context, build_assignment_url(SPEEDGRADER_URL, *jobs[0]))
+        if not authenticated:
+            await browser_manager.close()
+            return results
+        if lean_profile:
+            await lean_profile.apply(playwright_context)
+
+        tab_slots = asyncio.Semaphore(CRAWL_CONCURRENCY)
+        job_slots = asyncio.Semaphore(max(1, job_concurrency))
+
+        async def run_one(job: BatchJob):
+            async with job_slots:
+                with log_context(course_id=job[0], assignment_id=job[1]):
+                    try:
+                        results[job] = await _run_job(context, job, analyzer, model_analyzer, tab_slots)
+                    except Exception as e_job:
+                        log_error(f"Assignment {job[1]} of course {job[0]} failed: {e_job}")
+                        traceback.print_exc()
+                        results[job] = None
+
+        await asyncio.gather(*(run_one(job) for job in jobs))
+        if lean_profile:
+            lean_profile.log_summary()
+        await browser_manager.close()
+
+    if analyzer:
+        analyzer.close()
+    failed = [job for job in jobs if results.get(job) is None]
+    log_success(f"Batch finished: {len(jobs) - len(failed)}/{len(jobs)} assignments, {sum(n or 0 for n in results.values())} students.")
+    if failed:
+        log_warning(f"Failed assignments: {', '.join(f'{c}:{a}' for c, a in failed)}")
+    return results
@@ -0,0 +1,124 @@
+# --- Canvas REST API Mock Server ---
+import json
+import threading
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import parse_qs, urlencode, urlparse
+
+from benchmarks.fixture_server import fixture_student, fixture_student_ids
+
+COURSE_ID = "1"
+ASSIGNMENT_ID = "1"
+TOPIC_ID = 7
+TEACHER_ID = 1
+MOCK_TOKEN = "mock-canvas-token"
+
+
+def students_with_entries(student_ids: List[str]) -> Dict[str, list]:
+    """Fixture entries per student; every fourth student has not posted (like the no-submission layout)."""
+    return {sid: (fixture_student(sid)["entries"] if i % 4 != 3 else []) for i, sid in enumerate(student_ids)}
+
+
+class _CanvasHandler(BaseHTTPRequestHandler):
+    server: "CanvasMockServer"
+
+    def do_GET(self):
+        if self.headers.get("Authorization") != f"Bearer {MOCK_TOKEN}":
+            self._send_json({"errors": [{"message": "Invalid access token."}]}, status=401)
+            return
+        parts = urlparse(self.path)
+        query = parse_qs(parts.query)
+        course = f"/api/v1/courses/{COURSE_ID}"
+        if parts.path == f"{course}/assignments/{ASSIGNMENT_ID}":
+            self._send_json({"id": int(ASSIGNMENT_ID), "name": "Discussion", "discussion_topic": {"id": TOPIC_ID}})
+        elif parts.path == f"{course}/users":
+            self._send_users(query)
+        elif parts.path == f"{course}/discussion_topics/{TOPIC_ID}/view":
+            if self.server.view_not_ready > 0: # Canvas answers 503 while it builds the cached view
+                self.server.view_not_ready -= 1
+                self._send_json({"message": "not ready"}, status=503, headers={"Retry-After": "0"})
+                return
+            self._send_json(self.server.topic_view)
+        else:
+            self._send_json({"errors": [{"message": "The specified resource does not exist."}]}, status=404)
+
+    def _send_users(self, query: Dict[str, list]):
+        per_page = int(query.get("per_page", ["10"])[0])
+        page = int(query.get("page", ["1"])[0])
+        users = self.server.users[(page - 1) * per_page:page * per_page]
+        headers = {}
+        if page * per_page < len(self.server.users):
+            host, port = self.server.server_address[:2]
+            next_query = urlencode({**{k: v[0] for k, v in query.items()}, "page": page + 1})
+            headers["Link"] = f'<http://{host}:{port}/api/v1/courses/{COURSE_ID}/users?{next_query}>; rel="next"'
+        self._send_json(users, headers=headers)
+
+    def _send_json(self, body, status: int = 200, headers: Dict[str, str] = None):
+        self.server.requests_served += 1
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class CanvasMockServer(ThreadingHTTPServer):
+    """
+    Local stand-in for the three Canvas endpoints the API backend uses, built from the same fixture
+    students as FixtureServer: paginated course users, the assignment (with its discussion topic) and
+    the topic's full view. Replies are nested under other students' entries, there is a teacher post
+    and a deleted entry, and the first view request gets a 503 like a cold Canvas cache.
+    """
+
+    def __init__(self, student_count: int = 40, port: int = 0, view_not_ready: int = 1):
+        super().__init__(("127.0.0.1", port), _CanvasHandler)
+        self.student_ids = fixture_student_ids(student_count)
+        self.entries = students_with_entries(self.student_ids)
+        self.users = [{"id": int(sid), "name": fixture_student(sid)["student_name"]} for sid in self.student_ids]
+        self.topic_view = self._build_view()
+        self.view_not_ready = view_not_ready
+        self.requests_served = 0
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+        self.server_close()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _build_view(self) -> dict:
+        entry_id = 1000
+        teacher_post = {"id": entry_id, "user_id": TEACHER_ID, "created_at": "2025-05-01T14:00:00Z", "message": "<p>Welcome!</p>", "replies": []}
+        view = [teacher_post, {"id": entry_id + 1, "deleted": True, "created_at": "2025-05-01T14:05:00Z", "replies": []}]
+        entry_id += 2
+        previous_top_level = teacher_post
+        for sid, entries in self.entries.items():
+            for n, entry in enumerate(entries):
+                entry_id += 1
+                api_entry = {
+                    "id": entry_id,
+                    "user_id": int(sid),
+                    "created_at": entry["post_date"],
+                    "message": f"<p>{escape(entry['content'])}</p>",
+                    "replies": [],
+                }
+                if n == 0:
+                    view.append(api_entry)
+                    previous_top_level = api_entry
+                else: # Later posts are replies somewhere in the thread
+                    previous_top_level["replies"].append(api_entry)
+        return {"participants": [{"id": TEACHER_ID, "display_name": "Teacher"}] + self.users, "view": view}
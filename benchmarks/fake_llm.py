@@ -0,0 +1,96 @@
+# --- Deterministic Fake Chat Model ---
+import asyncio
+import collections
+import re
+import threading
+import time
+import zlib
+from typing import List
+
+import google.api_core.exceptions
+from langchain_core.messages import AIMessage, BaseMessage
+
+_BATCH_ID_PATTERN = re.compile(r"^\[([^\]\n]+)\]\n(.*?)(?=\n\n\[|\n\n[A-Z]|\Z)", re.M | re.S)
+_SINGLE_TEXT_PATTERN = re.compile(r"Text:\n(.*?)\n\nFor example", re.S)
+
+
+def fake_label(content: str) -> str:
+    """Stable label for a text: ~70% positive, ~25% negative, ~5% offensive."""
+    bucket = zlib.crc32(content.strip().encode("utf-8")) % 20
+    return "offensive" if bucket == 0 else "negative" if bucket <= 5 else "positive"
+
+
+def fake_completion(prompt: str) -> str:
+    """The model's answer to either the single-entry or the batched classification prompt."""
+    batch = _BATCH_ID_PATTERN.findall(prompt)
+    if batch:
+        items = ", ".join(f'{{"entry_id": "{entry_id}", "label": "{fake_label(text)}"}}' for entry_id, text in batch)
+        return f'```json\n{{"classifications": [{items}]}}\n```'
+    match = _SINGLE_TEXT_PATTERN.search(prompt)
+    return f"```{fake_label(match.group(1) if match else prompt)}```"
+
+
+class QuotaWindow:
+    """At most `limit` calls per sliding `window_s` seconds, like a provider quota (0 = unlimited)."""
+
+    def __init__(self, limit: int = 0, window_s: float = 1.0):
+        self.limit = limit
+        self.window_s = window_s
+        self._calls = collections.deque()
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        if not self.limit:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            while self._calls and now - self._calls[0] >= self.window_s:
+                self._calls.popleft()
+            if len(self._calls) >= self.limit:
+                return False
+            self._calls.append(now)
+            return True
+
+
+class FakeChatModel:
+    """
+    Stand-in for ChatGoogleGenerativeAI with the parts SubmissionAnalyzer uses (`model`, `invoke`,
+    `ainvoke`). Answers both the single-entry and the batched prompt, sleeps `latency_s` per call
+    and raises ResourceExhausted (with a server retry delay) on every `rate_limit_every`-th call
+    and whenever more than `quota_per_second` calls arrive within a second.
+    """
+
+    def __init__(
+        self,
+        model: str = "fake-chat",
+        latency_s: float = 0.05,
+        rate_limit_every: int = 0,
+        retry_after_s: int = 1,
+        quota_per_second: int = 0,
+    ):
+        self.model = model
+        self.latency_s = latency_s
+        self.rate_limit_every = rate_limit_every
+        self.retry_after_s = retry_after_s
+        self.quota = QuotaWindow(quota_per_second)
+        self.calls = 0
+        self.rate_limited = 0
+
+    def _respond(self, messages: List[BaseMessage]) -> AIMessage:
+        self.calls += 1
+        if (self.rate_limit_every and self.calls % self.rate_limit_every == 0) or not self.quota.allow():
+            self.rate_limited += 1
+            raise google.api_core.exceptions.ResourceExhausted(
+                f"429 Resource has been exhausted (fake). retry_delay {{\n  seconds: {self.retry_after_s}\n}}"
+            )
+        prompt = messages[-1].content
+        tokens = len(prompt) // 4
+        return AIMessage(content=fake_completion(prompt), usage_metadata={"input_tokens": tokens, "output_tokens": 8, "total_tokens": tokens + 8})
+
+    def invoke(self, messages: List[BaseMessage]) -> AIMessage:
+        time.sleep(self.latency_s)
+        return self._respond(messages)
+
+    async def ainvoke(self, messages: List[BaseMessage]) -> AIMessage:
+        await asyncio.sleep(self.latency_s)
+        return self._respond(messages)
@@ -0,0 +1,145 @@
+# --- SpeedGrader Fixture Server ---
+import os
+import threading
+import zlib
+from datetime import datetime, timedelta, timezone
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from string import Template
+from typing import Dict, List
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+SPEEDGRADER_PATH = "/courses/1/gradebook/speed_grader"
+ASSIGNMENT_ID = "1"
+
+# Every SpeedGrader state the extractor has to handle, assigned to students round-robin
+LAYOUT_NO_SUBMISSION = "no_submission"
+LAYOUT_IFRAME = "iframe"
+LAYOUT_MAIN_CONTENT = "main_content"
+LAYOUT_FALLBACK = "fallback"
+LAYOUTS = [LAYOUT_IFRAME, LAYOUT_MAIN_CONTENT, LAYOUT_FALLBACK, LAYOUT_NO_SUBMISSION]
+
+_SENTENCES = [
+    "I really enjoyed reading your post about data warehouses.",
+    "I agree that data quality matters more than the amount of data collected.",
+    "That is a great question, and I think most organizations underestimate it.",
+    "I am not sure the example you gave supports your conclusion.",
+    "Thanks for sharing your real-world experience with reporting tools.",
+    "The chapter on data cubes changed how I think about aggregation.",
+    "I disagree with the idea that dashboards replace analysts.",
+    "Your point about privacy regulations is something we discussed at work too.",
+    "This was honestly a waste of time and the reading made no sense.",
+    "I like how you connected the reading to your own job.",
+]
+_FIRST_NAMES = ["Avery", "Jordan", "Riley", "Casey", "Morgan", "Quinn", "Taylor", "Harper", "Rowan", "Emerson"]
+_LAST_NAMES = ["Nguyen", "Garcia", "Smith", "Okafor", "Larsen", "Patel", "Kim", "Rossi", "Haddad", "Novak"]
+_BASE_DATE = datetime(2025, 5, 1, 9, 0, tzinfo=timezone(timedelta(hours=-6)))
+
+
+def _template(name: str) -> Template:
+    with open(os.path.join(FIXTURES_DIR, name), "r", encoding="utf-8") as f_template:
+        return Template(f_template.read())
+
+
+def fixture_student_ids(count: int) -> List[str]:
+    return [str(100000 + i) for i in range(count)]
+
+
+def fixture_student(student_id: str) -> Dict[str, object]:
+    """Deterministic name and 1-4 entries for `student_id` (no network, no randomness between runs)."""
+    seed = zlib.crc32(student_id.encode("utf-8"))
+    entries = []
+    for n in range(1 + seed % 4):
+        sentence_count = 2 + (seed >> (n + 3)) % 4
+        content = " ".join(_SENTENCES[(seed + n * 7 + k * 3) % len(_SENTENCES)] for k in range(sentence_count))
+        content += f" (Reply {n + 1} from student {student_id}.)" # Unique, so analyzer runs are not all duplicate hits
+        post_date = _BASE_DATE + timedelta(hours=(seed % 97) + n * 5, minutes=(seed >> n) % 60)
+        entries.append({"post_date": post_date.isoformat(), "content": content})
+    name = f"{_FIRST_NAMES[seed % len(_FIRST_NAMES)]} {_LAST_NAMES[(seed >> 4) % len(_LAST_NAMES)]}"
+    return {"student_id": student_id, "student_name": name, "entries": entries}
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    server: "FixtureServer"
+
+    def do_GET(self):
+        parts = urlparse(self.path)
+        student_id = parse_qs(parts.query).get("student_id", [""])[0]
+        if parts.path == SPEEDGRADER_PATH and student_id in self.server.layouts:
+            body = self.server.render_speedgrader(student_id)
+        elif parts.path == "/iframe_submission" and student_id in self.server.layouts:
+            body = self.server.render_entries_page("iframe_submission.html", student_id, "entry.html")
+        else:
+            self.send_error(404)
+            return
+        payload = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass # Keep benchmark output readable
+
+
+class FixtureServer(ThreadingHTTPServer):
+    """
+    Local SpeedGrader look-alike on 127.0.0.1 serving `student_count` students, cycling through
+    the no-submission, iframe, main-content and fallback-selector layouts. Use as a context manager.
+    """
+
+    def __init__(self, student_count: int = 40, port: int = 0):
+        super().__init__(("127.0.0.1", port), _FixtureHandler)
+        self.student_ids = fixture_student_ids(student_count)
+        self.layouts = {sid: LAYOUTS[i % len(LAYOUTS)] for i, sid in enumerate(self.student_ids)}
+        self._templates = {}
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+        self.server_close()
+
+    def speedgrader_url(self, student_id: str) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{SPEEDGRADER_PATH}?assignment_id={ASSIGNMENT_ID}&student_id={student_id}"
+
+    def _get_template(self, name: str) -> Template:
+        if name not in self._templates:
+            self._templates[name] = _template(name)
+        return self._templates[name]
+
+    def _render_entries(self, student_id: str, entry_template: str) -> str:
+        template = self._get_template(entry_template)
+        return "\n".join(
+            template.substitute(post_date=escape(entry["post_date"]), content=escape(entry["content"]))
+            for entry in fixture_student(student_id)["entries"]
+        )
+
+    def render_entries_page(self, page_template: str, student_id: str, entry_template: str) -> str:
+        return self._get_template(page_template).substitute(entries=self._render_entries(student_id, entry_template))
+
+    def render_speedgrader(self, student_id: str) -> str:
+        student = fixture_student(student_id)
+        index = self.student_ids.index(student_id)
+        next_id = self.student_ids[min(index + 1, len(self.student_ids) - 1)]
+        header = self._get_template("speedgrader_header.html").substitute(
+            student_name=escape(student["student_name"]),
+            roster_options="".join(
+                f'<option value="{sid}">{escape(fixture_student(sid)["student_name"])}</option>' for sid in self.student_ids
+            ),
+            next_url=self.speedgrader_url(next_id),
+        )
+        layout = self.layouts[student_id]
+        entry_template = "entry_fallback.html" if layout == LAYOUT_FALLBACK else "entry.html"
+        return self._get_template(f"speedgrader_{layout}.html").substitute(
+            header=header,
+            student_name=escape(student["student_name"]),
+            student_id=student_id,
+            entries=self._render_entries(student_id, entry_template) if layout != LAYOUT_NO_SUBMISSION else "",
+        )
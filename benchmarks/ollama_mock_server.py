@@ -0,0 +1,93 @@
+# --- Ollama Chat API Mock Server ---
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.fake_llm import QuotaWindow, fake_completion
+
+
+class _OllamaHandler(BaseHTTPRequestHandler):
+    server: "OllamaMockServer"
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json({"models": [{"name": self.server.model, "model": self.server.model}]})
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        if self.path != "/api/chat":
+            self._send_json({"error": "not found"}, status=404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", "0"))) or b"{}")
+        self.server.requests_served += 1
+        if not self.server.quota.allow():
+            self.server.rate_limited += 1
+            self._send_json({"error": "too many requests"}, status=429)
+            return
+        time.sleep(self.server.latency_s)
+        prompt = (body.get("messages") or [{}])[-1].get("content", "")
+        reply = {
+            "model": body.get("model", self.server.model),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "message": {"role": "assistant", "content": fake_completion(prompt)},
+            "done": True,
+            "done_reason": "stop",
+            "prompt_eval_count": len(prompt) // 4,
+            "eval_count": 8,
+        }
+        if not body.get("stream", True):
+            self._send_json(reply)
+            return
+        # Streamed replies are NDJSON: the content chunk, then a final "done" record with the counts
+        chunk = {**reply, "done": False}
+        for key in ("done_reason", "prompt_eval_count", "eval_count"):
+            chunk.pop(key)
+        final = {**reply, "message": {"role": "assistant", "content": ""}}
+        self._send_body("\n".join(json.dumps(record) for record in (chunk, final)) + "\n", "application/x-ndjson")
+
+    def _send_json(self, body, status: int = 200):
+        self._send_body(json.dumps(body), "application/json; charset=utf-8", status)
+
+    def _send_body(self, text: str, content_type: str, status: int = 200):
+        payload = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class OllamaMockServer(ThreadingHTTPServer):
+    """
+    Local stand-in for an Ollama server's /api/chat (streamed or not) that answers the classification
+    prompts like FakeChatModel, sleeps `latency_s` per request and returns 429 above `quota_per_second`.
+    Point an `ollama:<model>@<base_url>` LLM backend at `base_url`.
+    """
+
+    def __init__(self, model: str = "llama3.1", latency_s: float = 0.05, quota_per_second: int = 0, port: int = 0):
+        super().__init__(("127.0.0.1", port), _OllamaHandler)
+        self.model = model
+        self.latency_s = latency_s
+        self.quota = QuotaWindow(quota_per_second)
+        self.requests_served = 0
+        self.rate_limited = 0
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+        self.server_close()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
@@ -0,0 +1,294 @@
+# --- Offline Benchmarks ---
+# Usage (from the repository root):
+#   python -m benchmarks.run                      # extraction + analyzer
+#   python -m benchmarks.run --skip-extraction    # analyzer only (no browser needed)
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import orjson
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_llm import FakeChatModel
+from benchmarks.fixture_server import FixtureServer, fixture_student, fixture_student_ids
+from logger import log_error, log_info, log_success
+from models import StudentSubmissionData
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def bench_extraction(student_count: int, extraction_mode: str) -> Dict[str, object]:
+    """Per-student latency of readiness waits + extraction against the local fixture server."""
+    from playwright.async_api import async_playwright
+    from app import extract_data_for_current_student
+    from page_readiness import wait_for_student_ready
+
+    latencies: List[float] = []
+    ready_latencies: List[float] = []
+    mismatches = 0
+    with FixtureServer(student_count) as server:
+        async with async_playwright() as playwright:
+            browser = await playwright.chromium.launch(headless=True)
+            page = await browser.new_page()
+            started = time.perf_counter()
+            for student_id in server.student_ids:
+                student_start = time.perf_counter()
+                await page.goto(server.speedgrader_url(student_id), wait_until="domcontentloaded")
+                state, _ = await wait_for_student_ready(page, expected_student_id=student_id)
+                ready_latencies.append(time.perf_counter() - student_start)
+                student_data = await extract_data_for_current_student(
+                    page, single_pass=extraction_mode == "single_pass", submission_state=state,
+                )
+                latencies.append(time.perf_counter() - student_start)
+                expected = fixture_student(student_id)
+                if student_data.student_id != student_id or (
+                    server.layouts[student_id] != "no_submission" and len(student_data.entries) != len(expected["entries"])
+                ):
+                    mismatches += 1
+            elapsed = time.perf_counter() - started
+            await browser.close()
+    return {
+        "benchmark": f"extraction[{extraction_mode}]",
+        "students": student_count,
+        "students_per_minute": round(student_count / elapsed * 60, 1),
+        "latency_p50_s": round(statistics.median(latencies), 4),
+        "latency_p95_s": round(_percentile(latencies, 95), 4),
+        "ready_p50_s": round(statistics.median(ready_latencies), 4),
+        "mismatches": mismatches,
+    }
+
+
+async def bench_analyzer(student_count: int, latency_s: float, rate_limit_every: int, batch_size: int, rpm: int) -> Dict[str, object]:
+    """Analyzer throughput over fixture students with the fake chat model (no cache, local model or dedupe)."""
+    from rate_limiter import AdaptiveRateLimiter
+    from submission_analizer import CSV_CHUNK_SIZE, SubmissionAnalyzer
+
+    llm = FakeChatModel(latency_s=latency_s, rate_limit_every=rate_limit_every)
+    analyzer = SubmissionAnalyzer(llm_instance=llm, max_entries=4, batch_size=batch_size)
+    analyzer.rate_limiter = AdaptiveRateLimiter(llm.model, rpm)
+    students = [StudentSubmissionData(**fixture_student(sid)) for sid in fixture_student_ids(student_count)]
+    started = time.perf_counter()
+    for i in range(0, len(students), CSV_CHUNK_SIZE):
+        await analyzer.analyze_students(students[i:i + CSV_CHUNK_SIZE])
+    elapsed = time.perf_counter() - started
+    return {
+        "benchmark": f"analyzer[batch={batch_size}]",
+        "students": student_count,
+        "entries": analyzer.summaries_attempted_count,
+        "entries_per_second": round(analyzer.summaries_attempted_count / elapsed, 1),
+        "llm_calls": llm.calls,
+        "rate_limited": llm.rate_limited,
+        "successful": analyzer.summaries_successful_count,
+        "elapsed_s": round(elapsed, 3),
+    }
+
+
+async def bench_router(student_count: int, latency_s: float, quota_per_second: int, backend_count: int) -> Dict[str, object]:
+    """
+    One quota-bound fake model vs an LLMRouter over `backend_count` of them (one entry per request),
+    plus an Ollama backend on the local mock server when langchain-ollama is installed.
+    """
+    from benchmarks.ollama_mock_server import OllamaMockServer
+    from llm_router import LLMBackend, LLMRouter, create_backend
+    from rate_limiter import AdaptiveRateLimiter
+    from submission_analizer import CSV_CHUNK_SIZE, SubmissionAnalyzer
+
+    students = [StudentSubmissionData(**fixture_student(sid)) for sid in fixture_student_ids(student_count)]
+    results = {"benchmark": f"router[backends={backend_count}]", "students": student_count}
+    with OllamaMockServer(latency_s=latency_s, quota_per_second=quota_per_second) as ollama_server:
+        for label, count in (("single", 1), ("router", backend_count)):
+            models = [FakeChatModel(model=f"fake-{i}", latency_s=latency_s, quota_per_second=quota_per_second) for i in range(count)]
+            # Limiters generous enough that the providers' quotas (429s) are what bounds throughput
+            backends = [LLMBackend(f"fake-{i}", model, AdaptiveRateLimiter(f"fake-{i}", 60000), 8) for i, model in enumerate(models)]
+            if label == "router":
+                try:
+                    backends.append(create_backend(f"ollama:{ollama_server.model}@{ollama_server.base_url};rpm=60000;concurrency=4"))
+                except ImportError:
+                    log_info("langchain-ollama is not installed; routing over the fake models only.")
+            llm = LLMRouter(backends) if label == "router" else models[0]
+            analyzer = SubmissionAnalyzer(llm_instance=llm, max_entries=4, batch_size=1)
+            if label == "single":
+                analyzer.rate_limiter = backends[0].rate_limiter
+            started = time.perf_counter()
+            for i in range(0, len(students), CSV_CHUNK_SIZE):
+                await analyzer.analyze_students(students[i:i + CSV_CHUNK_SIZE])
+            elapsed = time.perf_counter() - started
+            results[f"entries_per_second_{label}"] = round(analyzer.summaries_attempted_count / elapsed, 1)
+            results[f"rate_limited_{label}"] = sum(model.rate_limited for model in models) + (ollama_server.rate_limited if label == "router" else 0)
+            results[f"successful_{label}"] = analyzer.summaries_successful_count
+        results["ollama_requests"] = ollama_server.requests_served
+    return results
+
+
+async def bench_api_ingest(student_count: int) -> Dict[str, object]:
+    """Canvas REST API backend against the local mock server (paginated users + one topic view)."""
+    from benchmarks.canvas_mock_server import ASSIGNMENT_ID, COURSE_ID, MOCK_TOKEN, CanvasMockServer
+    from canvas_api import CanvasApiClient, ingest_assignment
+
+    with CanvasMockServer(student_count) as server, tempfile.TemporaryDirectory() as output_dir:
+        started = time.perf_counter()
+        async with CanvasApiClient(server.base_url, token=MOCK_TOKEN) as client:
+            students = await ingest_assignment(server.base_url, COURSE_ID, ASSIGNMENT_ID, output_dir, client)
+        elapsed = time.perf_counter() - started
+        mismatches = sum(
+            1 for student_data in students
+            if [(e.post_date, e.content) for e in student_data.entries]
+            != [(e["post_date"], e["content"]) for e in server.entries[student_data.student_id]]
+        )
+        mismatches += abs(len(students) - student_count)
+    return {
+        "benchmark": "api_ingest",
+        "students": student_count,
+        "students_per_second": round(student_count / elapsed, 1),
+        "requests": server.requests_served,
+        "mismatches": mismatches,
+        "elapsed_s": round(elapsed, 3),
+    }
+
+
+def bench_reparse(student_count: int, workers: int) -> Dict[str, object]:
+    """Offline re-extraction of fixture pages archived with empty entries, as after a selector miss."""
+    from html_archive import html_archive_path, write_html_archive
+    from reparse import reparse_archive
+
+    with FixtureServer(student_count) as server, tempfile.TemporaryDirectory() as output_dir:
+        for student_id in server.student_ids:
+            student = fixture_student(student_id)
+            json_path = os.path.join(output_dir, f"student_{student_id}.json")
+            with open(json_path, "w", encoding="utf-8") as f_student:
+                json.dump(StudentSubmissionData(student_id=student_id, student_name=student["student_name"]).model_dump(), f_student)
+            in_frame = server.layouts[student_id] == "iframe"
+            write_html_archive(html_archive_path(json_path), {
+                "url": server.speedgrader_url(student_id),
+                "page_html": server.render_speedgrader(student_id),
+                "frame_html": server.render_entries_page("iframe_submission.html", student_id, "entry.html") if in_frame else None,
+            })
+        started = time.perf_counter()
+        counts = reparse_archive(output_dir, workers=workers)
+        elapsed = time.perf_counter() - started
+        mismatches = 0
+        for student_id in server.student_ids:
+            with open(os.path.join(output_dir, f"student_{student_id}.json"), "r", encoding="utf-8") as f_student:
+                entries = json.load(f_student).get("entries", []) # Compact files omit empty lists
+            expected = fixture_student(student_id)["entries"] if server.layouts[student_id] != "no_submission" else []
+            if [(e["post_date"], e["content"]) for e in entries] != [(e["post_date"], e["content"]) for e in expected]:
+                mismatches += 1
+    return {
+        "benchmark": f"reparse[workers={workers or os.cpu_count()}]",
+        "students": student_count,
+        "students_per_second": round(student_count / elapsed, 1),
+        "changed": counts["changed"],
+        "mismatches": mismatches,
+        "elapsed_s": round(elapsed, 3),
+    }
+
+
+def bench_serialization(student_count: int) -> Dict[str, object]:
+    """Writing and reloading per-student files: indented json vs compact files parsed with orjson, plus the slotted StudentRecord view."""
+    from report_io import iter_compact_records, write_jsonl_report
+    from serialization import dump_student, student_from_record
+
+    students = [StudentSubmissionData(**fixture_student(sid)) for sid in fixture_student_ids(student_count)]
+    students += [StudentSubmissionData(student_id=f"{sid}0", student_name="Name not found") for sid in fixture_student_ids(student_count // 4)]
+    with tempfile.TemporaryDirectory() as output_dir:
+        started = time.perf_counter()
+        legacy_bytes = 0
+        for student_data in students:
+            legacy_path = os.path.join(output_dir, f"legacy_{student_data.student_id}.json")
+            with open(legacy_path, "w", encoding="utf-8") as f_out:
+                json.dump(student_data.model_dump(), f_out, indent=2, ensure_ascii=False)
+            legacy_bytes += os.path.getsize(legacy_path)
+        legacy_write_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        compact_bytes = 0
+        for student_data in students:
+            compact_path = os.path.join(output_dir, f"compact_{student_data.student_id}.json")
+            with open(compact_path, "wb") as f_out:
+                f_out.write(dump_student(student_data))
+            compact_bytes += os.path.getsize(compact_path)
+        compact_write_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for student_data in students:
+            with open(os.path.join(output_dir, f"legacy_{student_data.student_id}.json"), "r", encoding="utf-8") as f_in:
+                StudentSubmissionData(**json.load(f_in))
+        legacy_read_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        loaded = []
+        for student_data in students:
+            with open(os.path.join(output_dir, f"compact_{student_data.student_id}.json"), "rb") as f_in:
+                loaded.append(student_from_record(orjson.loads(f_in.read())))
+        compact_read_s = time.perf_counter() - started
+        mismatches = sum(loaded_data.model_dump() != student_data.model_dump() for loaded_data, student_data in zip(loaded, students))
+
+        report_path = os.path.join(output_dir, "report.jsonl")
+        write_jsonl_report(students, report_path)
+        started = time.perf_counter()
+        records = list(iter_compact_records(report_path))
+        records_read_s = time.perf_counter() - started
+        mismatches += sum(record.to_model() != student_data for record, student_data in zip(records, students))
+    return {
+        "benchmark": "serialization",
+        "students": len(students),
+        "bytes_legacy": legacy_bytes,
+        "bytes_compact": compact_bytes,
+        "write_ms_legacy": round(legacy_write_s * 1000, 1),
+        "write_ms_compact": round(compact_write_s * 1000, 1),
+        "read_ms_legacy": round(legacy_read_s * 1000, 1),
+        "read_ms_compact": round(compact_read_s * 1000, 1),
+        "read_ms_records": round(records_read_s * 1000, 1),
+        "mismatches": mismatches,
+    }
+
+
+async def main(args: argparse.Namespace) -> List[Dict[str, object]]:
+    results = []
+    if not args.skip_extraction:
+        for mode in (["single_pass", "locators"] if args.extraction_mode == "both" else [args.extraction_mode]):
+            try:
+                results.append(await bench_extraction(args.students, mode))
+            except Exception as e_bench:
+                log_error(f"Extraction benchmark ({mode}) failed: {e_bench}")
+    results.append(await bench_api_ingest(args.students))
+    results.append(bench_reparse(args.students, args.reparse_workers))
+    results.append(bench_serialization(args.students))
+    for batch_size in sorted({1, args.batch_size}):
+        results.append(await bench_analyzer(args.students, args.llm_latency, args.rate_limit_every, batch_size, args.rpm))
+    results.append(await bench_router(args.students, args.llm_latency, args.backend_quota, args.router_backends))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline extraction and analyzer benchmarks.")
+    parser.add_argument("--students", type=int, default=40)
+    parser.add_argument("--extraction-mode", choices=["single_pass", "locators", "both"], default="both")
+    parser.add_argument("--skip-extraction", action="store_true", help="Only run the analyzer benchmark")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Seconds per fake LLM call")
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="Inject a 429 on every Nth fake LLM call (0 = never)")
+    parser.add_argument("--batch-size", type=int, default=10, help="Batched analyzer run to compare with one request per entry")
+    parser.add_argument("--rpm", type=int, default=6000, help="Requests/min given to the analyzer's rate limiter")
+    parser.add_argument("--backend-quota", type=int, default=20, help="Requests/second each fake backend accepts in the router benchmark")
+    parser.add_argument("--router-backends", type=int, default=3, help="Fake backends behind the LLM router")
+    parser.add_argument("--reparse-workers", type=int, default=0, help="Processes for the offline re-parse benchmark (0 = one per CPU)")
+    parser.add_argument("--json", help="Also write the results to this file")
+    cli_args = parser.parse_args()
+
+    bench_results = asyncio.run(main(cli_args))
+    for result in bench_results:
+        log_success(" | ".join(f"{key}={value}" for key, value in result.items()))
+    if cli_args.json:
+        with open(cli_args.json, "w", encoding="utf-8") as f_results:
+            json.dump(bench_results, f_results, indent=2)
+        log_info(f"Wrote benchmark results to {cli_args.json}")
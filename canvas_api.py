@@ -0,0 +1,196 @@
+# --- Canvas REST API Ingestion ---
+import asyncio
+import json
+import os
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import httpx
+from bs4 import BeautifulSoup
+
+from logger import log_event, log_success, log_warning
+from models import DiscussionEntry, StudentSubmissionData
+from report_io import COMPILED_REPORT_JSONL_NAME, save_student_data, write_jsonl_report
+from utils import CANVAS_API_MAX_CONNECTIONS, CANVAS_API_TOKEN, SESSION_STATE_PATH
+
+API_PREFIX = "/api/v1"
+PER_PAGE = 100 # Canvas' maximum page size
+MAX_RETRIES = 4
+RETRY_STATUSES = {429, 503} # Throttled, or the topic view is still being cached server-side
+
+
+def canvas_base_url(speedgrader_url: str) -> str:
+    parts = urlparse(speedgrader_url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def _session_cookies(base_url: str, state_path: str = SESSION_STATE_PATH) -> Dict[str, str]:
+    """Cookies for the Canvas host from the browser session saved after login (used when no API token is set)."""
+    if not os.path.exists(state_path):
+        return {}
+    try:
+        with open(state_path, "r", encoding="utf-8") as f_state:
+            cookies = json.load(f_state).get("cookies", [])
+    except (OSError, json.JSONDecodeError) as e_state:
+        log_warning(f"Could not read saved session {state_path}: {e_state}")
+        return {}
+    host = urlparse(base_url).hostname or ""
+    return {c["name"]: c["value"] for c in cookies if _domain_matches(host, c.get("domain", ""))}
+
+
+def _domain_matches(host: str, cookie_domain: str) -> bool:
+    """The host itself or one of its subdomains, never a host that merely ends with the same letters."""
+    domain = cookie_domain.lstrip(".").lower()
+    return bool(domain) and (host == domain or host.endswith("." + domain))
+
+
+def _message_text(message_html: Optional[str]) -> str:
+    """Plain text of an entry's HTML message, like the textContent the DOM scrapers read."""
+    return BeautifulSoup(message_html or "", "html.parser").get_text().strip()
+
+
+def _decode(response: httpx.Response):
+    # Cookie-authenticated JSON responses carry Canvas' anti-hijacking prefix
+    text = response.text
+    return json.loads(text[len("while(1);"):] if text.startswith("while(1);") else text)
+
+
+def _next_link(response: httpx.Response) -> Optional[str]:
+    next_page = response.links.get("next")
+    return next_page.get("url") if next_page else None
+
+
+class CanvasApiClient:
+    """
+    Pooled async client for the Canvas REST API. Authenticates with an API token if one is set,
+    otherwise with the cookies of the saved browser session. Use as an async context manager.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        token: str = CANVAS_API_TOKEN,
+        max_connections: int = CANVAS_API_MAX_CONNECTIONS,
+        timeout_s: float = 30.0,
+    ):
+        headers = {"Accept": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        self.requests_made = 0
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            cookies=None if token else _session_cookies(base_url),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=timeout_s,
+            follow_redirects=True,
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def _get(self, url: str, params: Optional[dict] = None) -> httpx.Response:
+        for attempt in range(MAX_RETRIES + 1):
+            response = await self._client.get(url, params=params)
+            self.requests_made += 1
+            if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                break
+            delay = float(response.headers.get("Retry-After", 2 ** attempt))
+            log_warning(f"Canvas API returned {response.status_code} for {url}; retrying in {delay:.0f}s.")
+            await asyncio.sleep(delay)
+        response.raise_for_status()
+        return response
+
+    async def get_json(self, path: str, params: Optional[dict] = None):
+        return _decode(await self._get(API_PREFIX + path, params))
+
+    async def get_paginated(self, path: str, params: Optional[dict] = None) -> List[dict]:
+        """Every item of a paginated list endpoint, following the Link: rel="next" headers."""
+        items: List[dict] = []
+        response = await self._get(API_PREFIX + path, {"per_page": PER_PAGE, **(params or {})})
+        while True:
+            items.extend(_decode(response))
+            next_url = _next_link(response)
+            if not next_url:
+                return items
+            response = await self._get(next_url) # Canvas' next link already carries every query parameter
+
+
+def _flatten_entries(entries: List[dict]) -> List[dict]:
+    """Top-level entries and all their nested replies, skipping deleted ones."""
+    flat = []
+    for entry in entries:
+        if not entry.get("deleted"):
+            flat.append(entry)
+        flat.extend(_flatten_entries(entry.get("replies", [])))
+    return flat
+
+
+async def fetch_assignment_students(client: CanvasApiClient, course_id: str, assignment_id: str) -> List[StudentSubmissionData]:
+    """
+    Every student in the course with their entries in the assignment's discussion, from three kinds of
+    requests (assignment, paginated course users, discussion full view) instead of one page per student.
+    """
+    assignment = await client.get_json(f"/courses/{course_id}/assignments/{assignment_id}")
+    topic = assignment.get("discussion_topic") or {}
+    if not topic.get("id"):
+        raise ValueError(f"Assignment {assignment_id} in course {course_id} is not a graded discussion.")
+    users, topic_view = await asyncio.gather(
+        client.get_paginated(f"/courses/{course_id}/users", {"enrollment_type[]": "student"}),
+        client.get_json(f"/courses/{course_id}/discussion_topics/{topic['id']}/view"),
+    )
+
+    entries_by_user: Dict[str, List[dict]] = {}
+    for entry in _flatten_entries(topic_view.get("view", [])):
+        entries_by_user.setdefault(str(entry.get("user_id")), []).append(entry)
+
+    students = []
+    for user in users:
+        student_id = str(user["id"])
+        student_name = user.get("name") or "Name not found"
+        user_entries = sorted(entries_by_user.get(student_id, []), key=lambda e: e.get("created_at") or "")
+        entries = [
+            DiscussionEntry(author=student_name, post_date=e.get("created_at") or "Date not found", content=_message_text(e.get("message")) or "Content not found")
+            for e in user_entries
+        ]
+        status = (
+            f"Successfully extracted {len(entries)} entries for student {student_id}. (from the Canvas API)"
+            if entries else "This student does not have a submission for this assignment (no discussion entries in the Canvas API)."
+        )
+        students.append(StudentSubmissionData(student_id=student_id, student_name=student_name, entries=entries, status=status))
+    return students
+
+
+async def ingest_assignment(
+    base_url: str,
+    course_id: str,
+    assignment_id: str,
+    output_dir: str,
+    client: Optional[CanvasApiClient] = None,
+) -> List[StudentSubmissionData]:
+    """
+    Fetches one assignment through the API and writes the same per-student JSON files and compiled
+    report as a SpeedGrader crawl, so the analyzer and `cli.py report` work on it unchanged.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    if client is None:
+        async with CanvasApiClient(base_url) as own_client:
+            return await ingest_assignment(base_url, course_id, assignment_id, output_dir, own_client)
+    requests_before = client.requests_made
+    students = await fetch_assignment_students(client, course_id, assignment_id)
+    log_event("crawl_started", course_id=course_id, assignment_id=assignment_id, total_students=len(students))
+    for student_data in students:
+        save_student_data(student_data, output_dir)
+        log_event("student_saved", student_id=student_data.student_id, student_name=student_data.student_name, entries=len(student_data.entries), failed=False)
+    write_jsonl_report(students, os.path.join(output_dir, COMPILED_REPORT_JSONL_NAME))
+    log_success(
+        f"Fetched {len(students)} students ({sum(len(s.entries) for s in students)} entries) for assignment "
+        f"{assignment_id} in {client.requests_made - requests_before} API requests."
+    )
+    return students
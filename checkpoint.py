@@ -0,0 +1,127 @@
+# --- Crawl Checkpointing ---
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional
+
+import orjson
+
+from logger import log_info, log_warning
+from models import StudentSubmissionData
+from serialization import student_from_record
+from utils import OUTPUT_FOLDER_NAME
+
+CHECKPOINT_MANIFEST_NAME = "crawl_checkpoint.json"
+
+RESUME_MODE_OFF = "off"
+RESUME_MODE_RESUME = "resume" # Skip every student already checkpointed (crash recovery)
+RESUME_MODE_INCREMENTAL = "incremental" # Skip students whose submission state is unchanged
+SAVE_EVERY = 25 # Records between manifest rewrites; a crash re-crawls at most this many students
+
+
+def student_state(student_data: StudentSubmissionData) -> Dict[str, object]:
+    """The cheap part of the fingerprint: how many entries and the latest post date."""
+    post_dates = [e.post_date for e in student_data.entries if e.post_date and e.post_date != "Date not found"]
+    return {"entry_count": len(student_data.entries), "latest_post_date": max(post_dates) if post_dates else None}
+
+
+def student_fingerprint(student_data: StudentSubmissionData) -> str:
+    payload = json.dumps(
+        [student_state(student_data), [[e.post_date, e.content] for e in student_data.entries]],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CrawlCheckpoint:
+    """
+    Manifest of students already captured by a crawl, stored next to the per-student files.
+    Each record keeps the per-student file path, a content fingerprint, the entry count / latest
+    post date, and (when available) the SpeedGrader submission hint used to skip unchanged students
+    without navigating to them. The manifest is rewritten every `save_every` records and on `close()`.
+    """
+
+    def __init__(
+        self,
+        speedgrader_url: str,
+        output_dir: str = OUTPUT_FOLDER_NAME,
+        mode: str = RESUME_MODE_RESUME,
+        save_every: int = SAVE_EVERY,
+    ):
+        self.mode = mode
+        self.speedgrader_url = speedgrader_url
+        self.manifest_path = os.path.join(output_dir, CHECKPOINT_MANIFEST_NAME)
+        self.save_every = max(1, save_every)
+        self.students: Dict[str, dict] = {}
+        self._unsaved = 0
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.manifest_path):
+            return
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f_manifest:
+                manifest = json.load(f_manifest)
+        except (OSError, json.JSONDecodeError) as e_load:
+            log_warning(f"Ignoring unreadable checkpoint manifest {self.manifest_path}: {e_load}")
+            return
+        if manifest.get("speedgrader_url") != self.speedgrader_url:
+            log_warning(f"Checkpoint manifest {self.manifest_path} belongs to a different assignment. Starting fresh.")
+            return
+        self.students = manifest.get("students", {})
+        log_info(f"Loaded checkpoint with {len(self.students)} completed students from {self.manifest_path}.")
+
+    def _save(self) -> None:
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f_manifest:
+            json.dump({"speedgrader_url": self.speedgrader_url, "students": self.students}, f_manifest, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.manifest_path) # Atomic, so a crash never leaves a half-written manifest
+        self._unsaved = 0
+
+    def close(self) -> None:
+        """Writes any records not yet in the manifest."""
+        if self._unsaved:
+            self._save()
+
+    def can_skip(self, student_id: str, submission_hint: Optional[str] = None) -> bool:
+        record = self.students.get(student_id)
+        if not record or record.get("error") or not os.path.exists(record["file"]):
+            return False
+        if self.mode == RESUME_MODE_RESUME:
+            return True
+        if self.mode == RESUME_MODE_INCREMENTAL:
+            return submission_hint is not None and record.get("submission_hint") == submission_hint
+        return False
+
+    def is_unchanged(self, student_data: StudentSubmissionData) -> bool:
+        record = self.students.get(student_data.student_id)
+        return bool(record) and os.path.exists(record["file"]) and record["fingerprint"] == student_fingerprint(student_data)
+
+    def record(self, student_data: StudentSubmissionData, file_path: str, submission_hint: Optional[str] = None) -> None:
+        self.students[student_data.student_id] = {
+            "file": file_path,
+            "fingerprint": student_fingerprint(student_data),
+            **student_state(student_data),
+            "submission_hint": submission_hint,
+            "error": student_data.error,
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        }
+        self._unsaved += 1
+        if self._unsaved >= self.save_every:
+            self._save()
+
+    def load_student(self, student_id: str) -> StudentSubmissionData:
+        with open(self.students[student_id]["file"], "rb") as f_student:
+            return student_from_record(orjson.loads(f_student.read()))
+
+    def iter_compiled_report(self, student_order: Optional[List[str]] = None) -> Iterator[StudentSubmissionData]:
+        """All checkpointed students, in `student_order` first (e.g. the roster) and then manifest order."""
+        ordered_ids = [sid for sid in (student_order or []) if sid in self.students]
+        already_ordered = set(ordered_ids)
+        ordered_ids += [sid for sid in self.students if sid not in already_ordered]
+        for sid in ordered_ids:
+            try:
+                yield self.load_student(sid)
+            except (OSError, json.JSONDecodeError, KeyError) as e_student:
+                log_warning(f"Checkpointed file for student {sid} could not be read: {e_student}")
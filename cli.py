@@ -0,0 +1,189 @@
+# --- Command Line Interface ---
+# Usage (from the repository root):
+#   python cli.py scrape     # log in, crawl SpeedGrader and analyze (same as `python app.py`)
+#   python cli.py batch 780705:4809230 780705:4809231   # several assignments, one login and browser
+#   python cli.py fetch      # pull the same data through the Canvas REST API instead of the browser
+#   python cli.py analyze    # re-run the analysis on the existing compiled report
+#   python cli.py report     # summarize the outputs of the last run
+#   python cli.py reparse    # re-extract entries from the archived HTML with the current selectors (no browser)
+# Each subcommand imports only the stack it needs: `report` never loads LangChain, pandas or the
+# browser, and `analyze` never loads browser_use or Playwright.
+import argparse
+import asyncio
+import csv
+import json
+import os
+from collections import Counter
+from typing import List, Optional, Tuple
+
+from logger import configure_logging, log_context, log_error, log_info, log_warning
+from utils import (
+    ANALYZED_CSV_NAME, ANALYZER_MODEL_NAME, BATCH_JOB_CONCURRENCY, LLM_BACKENDS, OUTPUT_FOLDER_NAME, PERF_REPORT_NAME, REPARSE_WORKERS, SPEEDGRADER_URL,
+    assignment_output_dir,
+)
+
+
+def _parse_job(spec: str) -> Tuple[str, str]:
+    """'780705:4809230' -> ('780705', '4809230')."""
+    course_id, separator, assignment_id = spec.strip().partition(":")
+    if not separator or not course_id.isdigit() or not assignment_id.isdigit():
+        raise ValueError(f"Invalid job '{spec}'; expected COURSE_ID:ASSIGNMENT_ID.")
+    return course_id, assignment_id
+
+
+def _read_jobs(args: argparse.Namespace) -> Optional[List[Tuple[str, str]]]:
+    """Jobs from the positional arguments plus --jobs-file (one per line, # comments allowed); None if invalid."""
+    try:
+        jobs = [_parse_job(spec) for spec in args.jobs]
+        if args.jobs_file:
+            with open(args.jobs_file, "r", encoding="utf-8") as f_jobs:
+                jobs += [_parse_job(line) for line in (raw.split("#", 1)[0].strip() for raw in f_jobs) if line]
+    except (OSError, ValueError) as e_jobs:
+        log_error(f"Could not read jobs: {e_jobs}")
+        return None
+    return jobs
+
+
+def scrape_command(args: argparse.Namespace) -> None:
+    from app import run_scrape
+    run_scrape()
+
+
+def batch_command(args: argparse.Namespace) -> None:
+    from batch_runner import run_batch
+    from perf import write_perf_report
+
+    jobs = _read_jobs(args)
+    if jobs is None:
+        return
+    try:
+        asyncio.run(run_batch(jobs, job_concurrency=args.job_concurrency))
+    finally:
+        write_perf_report(os.path.join(OUTPUT_FOLDER_NAME, PERF_REPORT_NAME))
+
+
+def fetch_command(args: argparse.Namespace) -> None:
+    """
+    Pulls entries through the Canvas REST API instead of the browser. Without jobs, fetches the
+    AITA_SPEEDGRADER_URL assignment into the main output folder; jobs go to per-assignment folders.
+    """
+    from canvas_api import CanvasApiClient, canvas_base_url, ingest_assignment
+    from perf import span, write_perf_report
+    from speedgrader import parse_assignment_ids
+
+    jobs = _read_jobs(args)
+    if jobs is None:
+        return
+    targets = [(c, a, assignment_output_dir(c, a)) for c, a in jobs] or [(*parse_assignment_ids(SPEEDGRADER_URL), OUTPUT_FOLDER_NAME)]
+    base_url = canvas_base_url(SPEEDGRADER_URL)
+
+    async def run():
+        async with CanvasApiClient(base_url) as client:
+            with log_context(phase="fetch"), span("fetch"):
+                await asyncio.gather(*(ingest_assignment(base_url, c, a, output_dir, client) for c, a, output_dir in targets))
+        if args.analyze:
+            from submission_analizer import create_analyzer_llm, run_submission_analysis
+            llm = create_analyzer_llm()
+            for course_id, assignment_id, output_dir in targets:
+                with log_context(phase="analyze", course_id=course_id, assignment_id=assignment_id), span("analysis"):
+                    speedgrader_url = f"{base_url}/courses/{course_id}/gradebook/speed_grader?assignment_id={assignment_id}"
+                    await run_submission_analysis(llm_instance=llm, output_dir=output_dir, speedgrader_url=speedgrader_url)
+
+    try:
+        asyncio.run(run())
+    except Exception as e_fetch:
+        log_error(f"Canvas API ingestion failed: {e_fetch}")
+    finally:
+        write_perf_report(os.path.join(OUTPUT_FOLDER_NAME, PERF_REPORT_NAME))
+
+
+def analyze_command(args: argparse.Namespace) -> None:
+    from perf import span, write_perf_report
+    from submission_analizer import create_analyzer_llm, run_submission_analysis
+
+    async def run():
+        with log_context(phase="analyze"), span("analysis"):
+            # An explicit --model or --backends wins over AITA_LLM_BACKENDS
+            backends = args.backends if args.backends is not None else ("" if args.model else LLM_BACKENDS)
+            llm = create_analyzer_llm(args.model or ANALYZER_MODEL_NAME, backends=backends)
+            await run_submission_analysis(llm_instance=llm)
+
+    try:
+        asyncio.run(run())
+    finally:
+        write_perf_report(os.path.join(OUTPUT_FOLDER_NAME, PERF_REPORT_NAME))
+
+
+def report_command(args: argparse.Namespace) -> None:
+    """Student/entry counts from the compiled report, label counts from the CSV and the last perf summary."""
+    from local_classifier import extract_label
+    from report_io import compiled_report_path, iter_compact_records
+
+    report_path = compiled_report_path(OUTPUT_FOLDER_NAME)
+    if os.path.exists(report_path):
+        students = with_entries = entries = without_content = 0
+        for record in iter_compact_records(report_path):
+            students += 1
+            with_entries += bool(record.entries)
+            entries += len(record.entries)
+            without_content += sum(entry.content is None for entry in record.entries)
+        log_info(f"{report_path}: {students} students, {with_entries} with entries, {entries} entries ({without_content} without content).")
+    else:
+        log_warning(f"No compiled report at {report_path}.")
+
+    csv_path = os.path.join(OUTPUT_FOLDER_NAME, ANALYZED_CSV_NAME)
+    if os.path.exists(csv_path):
+        labels = Counter()
+        with open(csv_path, "r", encoding="utf-8", newline="") as f_csv:
+            for row in csv.DictReader(f_csv):
+                for column, value in row.items():
+                    if column.endswith("_summary") and value:
+                        labels[extract_label(value) or "unlabeled"] += 1
+        label_counts = ", ".join(f"{label}={count}" for label, count in labels.most_common())
+        log_info(f"{csv_path}: {label_counts or 'no summaries'}.")
+    else:
+        log_warning(f"No analysis CSV at {csv_path}.")
+
+    perf_path = os.path.join(OUTPUT_FOLDER_NAME, PERF_REPORT_NAME)
+    if os.path.exists(perf_path):
+        with open(perf_path, "r", encoding="utf-8") as f_perf:
+            perf = json.load(f_perf)
+        log_info(f"{perf_path}: {perf['wall_s']}s wall, {perf['total_sleep_s']}s sleeping, {perf['llm_calls']} LLM calls.")
+
+
+def reparse_command(args: argparse.Namespace) -> None:
+    from reparse import reparse_archive
+    reparse_archive(workers=args.workers, dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AITA: scrape Canvas SpeedGrader and analyze discussion entries.")
+    parser.add_argument("--log-level", help="DEBUG, INFO, SUCCESS, WARNING or ERROR (default: AITA_LOG_LEVEL)")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    subcommands.add_parser("scrape", help="Log in, crawl SpeedGrader and analyze the entries").set_defaults(handler=scrape_command)
+    batch_parser = subcommands.add_parser("batch", help="Crawl and analyze several assignments over one authenticated browser")
+    batch_parser.add_argument("jobs", nargs="*", metavar="COURSE_ID:ASSIGNMENT_ID")
+    batch_parser.add_argument("--jobs-file", help="File with one COURSE_ID:ASSIGNMENT_ID per line")
+    batch_parser.add_argument("--job-concurrency", type=int, default=BATCH_JOB_CONCURRENCY, help="Assignments crawled at once")
+    batch_parser.set_defaults(handler=batch_command)
+    fetch_parser = subcommands.add_parser("fetch", help="Pull entries through the Canvas REST API instead of scraping SpeedGrader")
+    fetch_parser.add_argument("jobs", nargs="*", metavar="COURSE_ID:ASSIGNMENT_ID", help="Default: the AITA_SPEEDGRADER_URL assignment")
+    fetch_parser.add_argument("--jobs-file", help="File with one COURSE_ID:ASSIGNMENT_ID per line")
+    fetch_parser.add_argument("--analyze", action="store_true", help="Analyze each fetched assignment afterwards")
+    fetch_parser.set_defaults(handler=fetch_command)
+    analyze_parser = subcommands.add_parser("analyze", help="Analyze the existing compiled report into the CSV/Parquet outputs")
+    analyze_parser.add_argument("--model", help="Chat model for classification (default: AITA_ANALYZER_MODEL)")
+    analyze_parser.add_argument("--backends", help="Route classification over these LLM backends (default: AITA_LLM_BACKENDS)")
+    analyze_parser.set_defaults(handler=analyze_command)
+    subcommands.add_parser("report", help="Summarize the outputs of the last run").set_defaults(handler=report_command)
+    reparse_parser = subcommands.add_parser("reparse", help="Re-extract entries from the archived submission HTML")
+    reparse_parser.add_argument("--workers", type=int, default=REPARSE_WORKERS, help="Parser processes (default: one per CPU)")
+    reparse_parser.add_argument("--dry-run", action="store_true", help="Report how many students would change without writing")
+    reparse_parser.set_defaults(handler=reparse_command)
+    cli_args = parser.parse_args()
+
+    configure_logging(level=cli_args.log_level)
+    try:
+        cli_args.handler(cli_args)
+    except KeyboardInterrupt:
+        log_error("Interrupted.")
@@ -0,0 +1,93 @@
+# --- Near-Duplicate Entry Detection ---
+import re
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from llm_cache import normalize_content
+from logger import log_info
+from utils import DEDUPE, DEDUPE_NUM_PERM, DEDUPE_SHINGLE_SIZE, DEDUPE_THRESHOLD
+
+_MERSENNE_PRIME = np.uint64(4294967311) # Smallest prime above 2**32, so a * hash fits in uint64
+_SEED = 1729
+
+
+def shingles(text: str, size: int = DEDUPE_SHINGLE_SIZE) -> List[str]:
+    words = re.findall(r"\w+", text.lower())
+    if len(words) <= size:
+        return [" ".join(words)]
+    return [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+
+def _choose_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """(bands, rows) whose LSH S-curve crosses 50% collision probability closest to `threshold`."""
+    candidates = [(b, num_perm // b) for b in range(1, num_perm + 1) if num_perm % b == 0]
+    return min(candidates, key=lambda br: abs((1 / br[0]) ** (1 / br[1]) - threshold))
+
+
+class NearDuplicateIndex:
+    """
+    Online MinHash/LSH index over entry texts. `representative()` returns the first text seen
+    whose estimated Jaccard similarity (word shingles) is at least `threshold`, or registers the
+    text as a new representative, so one classification can be reused for the whole group.
+    """
+
+    def __init__(self, threshold: float = DEDUPE_THRESHOLD, num_perm: int = DEDUPE_NUM_PERM, shingle_size: int = DEDUPE_SHINGLE_SIZE):
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(_SEED)
+        self._a = rng.integers(1, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+        self.bands, self.rows = _choose_bands(num_perm, threshold)
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+        self._signatures: List[np.ndarray] = []
+        self._texts: List[str] = []
+        self._exact: Dict[str, int] = {}
+        self.lookups = 0
+        self.duplicates = 0
+
+    def _signature(self, text: str) -> np.ndarray:
+        hashes = np.array([zlib.crc32(s.encode("utf-8")) for s in shingles(text, self.shingle_size)], dtype=np.uint64)
+        return ((np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME).min(axis=0)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def representative(self, text: str) -> str:
+        self.lookups += 1
+        normalized = normalize_content(text)
+        if normalized in self._exact:
+            self.duplicates += 1
+            return self._texts[self._exact[normalized]]
+
+        signature = self._signature(normalized)
+        band_keys = self._band_keys(signature)
+        candidates = {idx for band, key in enumerate(band_keys) for idx in self._buckets[band].get(key, [])}
+        best: Optional[Tuple[float, int]] = None
+        for idx in candidates:
+            similarity = float(np.mean(self._signatures[idx] == signature))
+            if similarity >= self.threshold and (best is None or similarity > best[0]):
+                best = (similarity, idx)
+        if best is not None:
+            self.duplicates += 1
+            self._exact[normalized] = best[1]
+            return self._texts[best[1]]
+
+        idx = len(self._texts)
+        self._texts.append(text)
+        self._signatures.append(signature)
+        self._exact[normalized] = idx
+        for band, key in enumerate(band_keys):
+            self._buckets[band].setdefault(key, []).append(idx)
+        return text
+
+    def log_summary(self) -> None:
+        log_info(
+            f"Near-duplicate detection: {self.duplicates}/{self.lookups} entries matched one of "
+            f"{len(self._texts)} representatives (threshold {self.threshold:.2f}, {self.bands}x{self.rows} LSH bands)."
+        )
+
+
+def create_dedupe_index() -> Optional[NearDuplicateIndex]:
+    return NearDuplicateIndex() if DEDUPE else None
@@ -0,0 +1,80 @@
+# --- Long-Format Parquet Entry Table ---
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from local_classifier import extract_label
+from logger import log_success
+from models import StudentSubmissionData
+from speedgrader import parse_assignment_ids
+from utils import PARQUET_ROW_GROUP_SIZE, SPEEDGRADER_URL
+
+ENTRY_TABLE_SCHEMA = pa.schema([
+    ("course_id", pa.string()),
+    ("assignment_id", pa.string()),
+    ("student_id", pa.string()),
+    ("student_name", pa.string()),
+    ("entry_index", pa.int16()),
+    ("post_date", pa.timestamp("us", tz="UTC")),
+    ("post_date_raw", pa.string()),
+    ("content", pa.string()),
+    ("label", pa.dictionary(pa.int32(), pa.string())),
+    ("summary", pa.string()),
+])
+
+
+def parse_post_date(post_date: Optional[str]) -> Optional[datetime]:
+    """Canvas post dates are ISO 8601 with an offset; anything else (e.g. "Date not found") is null."""
+    try:
+        return datetime.fromisoformat(post_date).astimezone(timezone.utc)
+    except (TypeError, ValueError):
+        return None
+
+
+class EntryParquetWriter:
+    """
+    One row per (student, entry), including entries beyond the CSV's `max_entries` (their
+    label and summary are null). Rows are buffered and flushed as Parquet row groups of
+    `row_group_size`, so the file grows while the analysis runs.
+    """
+
+    def __init__(self, path: str, speedgrader_url: str = SPEEDGRADER_URL, row_group_size: int = PARQUET_ROW_GROUP_SIZE):
+        self.path = path
+        self.course_id, self.assignment_id = parse_assignment_ids(speedgrader_url)
+        self.row_group_size = row_group_size
+        self.rows_written = 0
+        self._buffer: List[dict] = []
+        self._writer = pq.ParquetWriter(path, ENTRY_TABLE_SCHEMA, compression="zstd")
+
+    def append(self, student_data: StudentSubmissionData, row: dict) -> None:
+        """Adds the entries of one student; `row` is its analyzer CSV row, which holds the summaries."""
+        for index, entry in enumerate(student_data.entries, start=1):
+            summary = row.get(f"entry_{index}_summary")
+            self._buffer.append({
+                "course_id": self.course_id,
+                "assignment_id": self.assignment_id,
+                "student_id": student_data.student_id,
+                "student_name": student_data.student_name,
+                "entry_index": index,
+                "post_date": parse_post_date(entry.post_date),
+                "post_date_raw": entry.post_date,
+                "content": entry.content,
+                "label": extract_label(summary) if summary else None,
+                "summary": summary,
+            })
+        if len(self._buffer) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        self._writer.write_table(pa.Table.from_pylist(self._buffer, schema=ENTRY_TABLE_SCHEMA))
+        self.rows_written += len(self._buffer)
+        self._buffer = []
+
+    def close(self) -> None:
+        self._flush()
+        self._writer.close()
+        log_success(f"Wrote {self.rows_written} entry rows to Parquet: {self.path}")
@@ -0,0 +1,63 @@
+# --- Raw Submission HTML Archive ---
+import os
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Optional
+
+import orjson
+import zstandard
+
+from logger import log_debug, log_warning
+from speedgrader import IFRAME_SELECTOR
+from utils import HTML_ARCHIVE_LEVEL
+
+if TYPE_CHECKING:
+    from playwright.async_api import Page
+
+# Stored next to student_<id>_<name>.json: a zstd-compressed JSON envelope holding the page and submission-frame HTML
+HTML_ARCHIVE_SUFFIX = ".html.json.zst"
+
+
+def html_archive_path(student_json_path: str) -> str:
+    return os.path.splitext(student_json_path)[0] + HTML_ARCHIVE_SUFFIX
+
+
+def student_json_path(archive_path: str) -> str:
+    return archive_path[:-len(HTML_ARCHIVE_SUFFIX)] + ".json"
+
+
+async def capture_submission_html(page: "Page") -> Optional[dict]:
+    """
+    The SpeedGrader page HTML plus, when the submission is rendered in the iframe, the frame's HTML.
+    Returns None (and logs) if the page could not be read, so archiving never fails a crawl.
+    """
+    try:
+        snapshot = {
+            "url": page.url,
+            "captured_at": datetime.now(timezone.utc).isoformat(),
+            "page_html": await page.content(),
+            "frame_html": None,
+        }
+        iframe_element = await page.query_selector(IFRAME_SELECTOR)
+        frame = await iframe_element.content_frame() if iframe_element else None
+        if frame:
+            snapshot["frame_html"] = await frame.content()
+        return snapshot
+    except Exception as e_capture:
+        log_warning(f"Could not capture submission HTML at {page.url}: {e_capture}")
+        return None
+
+
+def write_html_archive(path: str, snapshot: dict) -> None:
+    payload = orjson.dumps(snapshot)
+    compressed = zstandard.ZstdCompressor(level=HTML_ARCHIVE_LEVEL).compress(payload)
+    try:
+        with open(path, "wb") as f_archive:
+            f_archive.write(compressed)
+        log_debug("Archived %d bytes of HTML (%d compressed) to %s", len(payload), len(compressed), path)
+    except OSError as e_write:
+        log_warning(f"Could not write HTML archive {path}: {e_write}")
+
+
+def read_html_archive(path: str) -> dict:
+    with open(path, "rb") as f_archive:
+        return orjson.loads(zstandard.ZstdDecompressor().decompress(f_archive.read()))
@@ -0,0 +1,189 @@
+# --- Background Job Runner ---
+import json
+import os
+import signal
+import subprocess
+import sys
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import orjson
+
+from utils import CONSOLE_RUNS_DIR
+
+CLI_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cli.py")
+JOB_FILE_NAME = "job.json"
+EVENTS_FILE_NAME = "events.jsonl"
+CONSOLE_FILE_NAME = "console.log"
+THROUGHPUT_WINDOW_S = 60 # Recent students/min is measured over this many seconds of events
+RECENT_MESSAGES = 50 # Warnings/errors kept for display
+
+
+def start_job(cli_args: List[str], runs_dir: str = CONSOLE_RUNS_DIR) -> dict:
+    """
+    Starts `python cli.py <cli_args>` in its own process group, detached from the caller, with its
+    JSON-lines log (records and progress events) in the job folder. Returns the job record.
+    """
+    job_id = datetime.now().strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+    job_dir = os.path.join(runs_dir, job_id)
+    os.makedirs(job_dir, exist_ok=True)
+    events_path = os.path.join(job_dir, EVENTS_FILE_NAME)
+    console_path = os.path.join(job_dir, CONSOLE_FILE_NAME)
+    env = {**os.environ, "AITA_LOG_JSONL": os.path.abspath(events_path), "PYTHONUNBUFFERED": "1"}
+    with open(console_path, "wb") as f_console:
+        process = subprocess.Popen(
+            [sys.executable, CLI_PATH, *cli_args],
+            cwd=os.path.dirname(CLI_PATH),
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=f_console,
+            stderr=subprocess.STDOUT,
+            start_new_session=True, # Survives Streamlit reruns; stop_job signals the whole group
+        )
+    job = {
+        "job_id": job_id,
+        "args": cli_args,
+        "pid": process.pid,
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "events_path": events_path,
+        "console_path": console_path,
+        "exit_code": None,
+    }
+    _save_job(job_dir, job)
+    return job
+
+
+def _save_job(job_dir: str, job: dict) -> None:
+    with open(os.path.join(job_dir, JOB_FILE_NAME), "w", encoding="utf-8") as f_job:
+        json.dump(job, f_job, indent=2)
+
+
+def list_jobs(runs_dir: str = CONSOLE_RUNS_DIR) -> List[dict]:
+    """Every job started from the console, newest first, with a fresh `status`."""
+    if not os.path.isdir(runs_dir):
+        return []
+    jobs = []
+    for job_id in sorted(os.listdir(runs_dir), reverse=True):
+        job_path = os.path.join(runs_dir, job_id, JOB_FILE_NAME)
+        try:
+            with open(job_path, "r", encoding="utf-8") as f_job:
+                job = json.load(f_job)
+        except (OSError, json.JSONDecodeError):
+            continue
+        job["status"] = job_status(job, os.path.dirname(job_path))
+        jobs.append(job)
+    return jobs
+
+
+def job_status(job: dict, job_dir: Optional[str] = None) -> str:
+    """"running", "finished" or "failed"; reaps the process when it is our child and stores its exit code."""
+    if job.get("exit_code") is not None:
+        return "finished" if job["exit_code"] == 0 else "failed"
+    try:
+        pid, status = os.waitpid(job["pid"], os.WNOHANG)
+    except ChildProcessError: # Started by an earlier console process: only liveness can be checked
+        try:
+            os.kill(job["pid"], 0)
+        except OSError:
+            return "finished"
+        return "running"
+    if pid == 0:
+        return "running"
+    job["exit_code"] = os.waitstatus_to_exitcode(status)
+    if job_dir:
+        _save_job(job_dir, {k: v for k, v in job.items() if k != "status"})
+    return "finished" if job["exit_code"] == 0 else "failed"
+
+
+def stop_job(job: dict) -> None:
+    """SIGINT to the job's process group: the CLI logs the interruption and still writes its perf report."""
+    try:
+        os.killpg(job["pid"], signal.SIGINT)
+    except OSError:
+        pass
+
+
+class EventLogTail:
+    """
+    Incremental reader of a job's JSON-lines log: each `read_new()` returns only the records
+    appended since the last call, and keeps a partially written last line for the next one.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.offset = 0
+        self._partial = b""
+
+    def read_new(self) -> List[dict]:
+        try:
+            with open(self.path, "rb") as f_events:
+                f_events.seek(self.offset)
+                data = f_events.read()
+        except FileNotFoundError:
+            return []
+        self.offset += len(data)
+        lines = (self._partial + data).split(b"\n")
+        self._partial = lines.pop()
+        records = []
+        for line in lines:
+            try:
+                records.append(orjson.loads(line))
+            except orjson.JSONDecodeError:
+                continue
+        return records
+
+
+class RunProgress:
+    """Running totals of one job, updated from the records of its event log as they arrive."""
+
+    def __init__(self):
+        self.total_students: Optional[int] = None
+        self.students_saved = 0 # Includes students loaded from a checkpoint
+        self.students_skipped = 0
+        self.students_failed = 0
+        self.entries = 0
+        self.analysis: Dict[str, Optional[int]] = {"attempted": 0, "successful": 0, "eligible": None}
+        self.rate_limits: Dict[str, dict] = {} # model -> latest rate_limited event plus a count
+        self.phase: Optional[str] = None
+        self.first_ts: Optional[datetime] = None
+        self.last_ts: Optional[datetime] = None
+        self.recent_saves: deque = deque() # Timestamps of student_saved events inside the throughput window
+        self.messages: deque = deque(maxlen=RECENT_MESSAGES)
+
+    def apply(self, records: List[dict]) -> None:
+        for record in records:
+            ts = datetime.fromisoformat(record["ts"])
+            self.first_ts = self.first_ts or ts
+            self.last_ts = ts
+            self.phase = record.get("phase", self.phase)
+            event = record.get("event")
+            if event == "crawl_started" and record.get("total_students"):
+                self.total_students = (self.total_students or 0) + record["total_students"]
+            elif event == "student_saved":
+                self.students_saved += 1
+                self.students_failed += bool(record.get("failed"))
+                self.entries += record.get("entries", 0)
+                if record.get("skipped"):
+                    self.students_skipped += 1
+                else: # Skipped students arrive in a burst and would inflate the throughput
+                    self.recent_saves.append(ts)
+            elif event == "analysis_progress":
+                self.analysis = {key: record.get(key) for key in ("attempted", "successful", "eligible")}
+            elif event == "rate_limited":
+                count = self.rate_limits.get(record["model"], {}).get("count", 0)
+                self.rate_limits[record["model"]] = {**record, "count": count + 1}
+            elif record.get("level") in ("WARNING", "ERROR"):
+                self.messages.append(record)
+        while self.recent_saves and self.last_ts and (self.last_ts - self.recent_saves[0]).total_seconds() > THROUGHPUT_WINDOW_S:
+            self.recent_saves.popleft()
+
+    def students_per_minute(self, recent: bool = False) -> float:
+        """Crawled (not skipped) students over the whole run, or over the last THROUGHPUT_WINDOW_S seconds of events."""
+        saves = len(self.recent_saves) if recent else self.students_saved - self.students_skipped
+        start = self.recent_saves[0] if recent and self.recent_saves else self.first_ts
+        if not saves or not start or not self.last_ts:
+            return 0.0
+        elapsed = (self.last_ts - start).total_seconds()
+        return round(saves / elapsed * 60, 1) if elapsed > 0 else 0.0
@@ -0,0 +1,94 @@
+# --- Lean Scrape Context Profile ---
+from collections import Counter, defaultdict
+from typing import Dict
+from urllib.parse import urlparse
+
+from playwright.async_api import BrowserContext as PlaywrightBrowserContext, Request, Response, Route
+
+from logger import log_debug, log_info, log_success
+from utils import LEAN_BLOCK_STYLESHEETS
+
+# extract_data_for_current_student only reads DOM text, so none of these are needed
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font", "ping"}
+# Analytics / session-replay / monitoring hosts seen on Canvas pages
+BLOCKED_HOST_SUFFIXES = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com",
+    "pendo.io", "heapanalytics.com", "heap.io", "fullstory.com", "hotjar.com", "segment.io", "segment.com",
+    "mixpanel.com", "newrelic.com", "nr-data.net", "sentry.io", "intercom.io", "intercomcdn.com",
+    "facebook.net", "clarity.ms",
+)
+
+
+class LeanScrapeProfile:
+    """
+    Request routing for the scraping context. `observe()` records typical response sizes per resource
+    type while the page loads normally (e.g. during authentication); `apply()` then aborts non-essential
+    resource types and third-party hosts and uses those sizes to estimate the bytes saved.
+    """
+
+    def __init__(self, block_stylesheets: bool = LEAN_BLOCK_STYLESHEETS):
+        self.blocked_types = set(BLOCKED_RESOURCE_TYPES)
+        if block_stylesheets:
+            self.blocked_types.add("stylesheet")
+        self.blocked_requests = 0
+        self.allowed_requests = 0
+        self.blocked_by_type: Counter = Counter()
+        self.blocked_by_host: Counter = Counter()
+        self.estimated_bytes_saved = 0
+        self._observed_bytes: Dict[str, int] = defaultdict(int)
+        self._observed_counts: Dict[str, int] = defaultdict(int)
+
+    def observe(self, context: PlaywrightBrowserContext) -> None:
+        context.on("response", self._on_response)
+
+    async def apply(self, context: PlaywrightBrowserContext) -> None:
+        await context.route("**/*", self._handle_route)
+        log_info(f"Lean scrape profile active. Blocking resource types {sorted(self.blocked_types)} and {len(BLOCKED_HOST_SUFFIXES)} third-party hosts.")
+
+    def _on_response(self, response: Response) -> None:
+        content_length = response.headers.get("content-length")
+        if content_length and content_length.isdigit():
+            resource_type = response.request.resource_type
+            self._observed_bytes[resource_type] += int(content_length)
+            self._observed_counts[resource_type] += 1
+
+    def _block_reason(self, request: Request) -> str:
+        if request.resource_type in self.blocked_types:
+            return request.resource_type
+        host = urlparse(request.url).hostname or ""
+        if any(host == suffix or host.endswith("." + suffix) for suffix in BLOCKED_HOST_SUFFIXES):
+            return host
+        return ""
+
+    async def _handle_route(self, route: Route) -> None:
+        request = route.request
+        reason = self._block_reason(request)
+        if not reason:
+            self.allowed_requests += 1
+            await route.continue_()
+            return
+        self.blocked_requests += 1
+        self.blocked_by_type[request.resource_type] += 1
+        if reason != request.resource_type:
+            self.blocked_by_host[reason] += 1
+        if self._observed_counts[request.resource_type]:
+            self.estimated_bytes_saved += self._observed_bytes[request.resource_type] // self._observed_counts[request.resource_type]
+        log_debug("Lean profile blocked %s request: %.120s", request.resource_type, request.url)
+        await route.abort()
+
+    def stats(self) -> dict:
+        return {
+            "blocked_requests": self.blocked_requests,
+            "allowed_requests": self.allowed_requests,
+            "estimated_bytes_saved": self.estimated_bytes_saved,
+            "blocked_by_type": dict(self.blocked_by_type),
+            "blocked_by_host": dict(self.blocked_by_host),
+        }
+
+    def log_summary(self) -> None:
+        total = self.blocked_requests + self.allowed_requests
+        log_success(
+            f"Lean scrape profile blocked {self.blocked_requests}/{total} requests "
+            f"(~{self.estimated_bytes_saved / 1_048_576:.1f} MiB saved, estimated from observed response sizes). "
+            f"By type: {dict(self.blocked_by_type)}"
+        )
@@ -0,0 +1,127 @@
+# --- Persistent LLM Classification Cache ---
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from typing import Iterator, Optional, Sequence, Tuple
+
+from logger import log_debug, log_info, log_warning
+from utils import LLM_CACHE, LLM_CACHE_ERRORS, LLM_CACHE_MAX_AGE_DAYS, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_PATH
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS classifications (
+    key TEXT PRIMARY KEY,
+    result TEXT NOT NULL,
+    is_error INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    model_name TEXT,
+    content TEXT
+)
+"""
+
+
+def normalize_content(content: str) -> str:
+    """Whitespace differences between crawls should not invalidate a cached label."""
+    return re.sub(r"\s+", " ", content).strip()
+
+
+def cache_key(model_name: str, prompt_template: str, content: str) -> str:
+    payload = json.dumps([model_name, prompt_template, normalize_content(content)], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ClassificationCache:
+    """
+    SQLite cache of LLM results keyed by a hash of (model, prompt template, normalized content).
+    Entries older than `max_age_days` are dropped and the least recently used ones are evicted
+    beyond `max_entries`. Cached error results count as misses unless `cache_errors` is set.
+    """
+
+    def __init__(
+        self,
+        path: str = LLM_CACHE_PATH,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        max_age_days: float = LLM_CACHE_MAX_AGE_DAYS,
+        cache_errors: bool = LLM_CACHE_ERRORS,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.cache_errors = cache_errors
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(classifications)")}
+        for column in ("model_name", "content"): # Caches created before labels were kept for training
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE classifications ADD COLUMN {column} TEXT")
+        self.evict()
+
+    def get(self, model_names: Sequence[str], prompt_templates: Sequence[str], content: str) -> Optional[str]:
+        """The first usable result cached for any of `model_names` under any of `prompt_templates` (one hit or miss per call)."""
+        for model_name in model_names:
+            for prompt_template in prompt_templates:
+                key = cache_key(model_name, prompt_template, content)
+                row = self._conn.execute("SELECT result, is_error FROM classifications WHERE key = ?", (key,)).fetchone()
+                if row is None or (row[1] and not self.cache_errors):
+                    continue
+                self.hits += 1
+                self._conn.execute("UPDATE classifications SET accessed_at = ? WHERE key = ?", (time.time(), key))
+                return row[0]
+        self.misses += 1
+        return None
+
+    def put(self, model_name: str, prompt_template: str, content: str, result: str, is_error: bool = False) -> None:
+        now = time.time()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO classifications (key, result, is_error, created_at, accessed_at, model_name, content) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (cache_key(model_name, prompt_template, content), result, int(is_error), now, now, model_name, normalize_content(content)),
+        )
+        self._conn.commit() # Results survive a crash mid-analysis
+
+    def iter_labeled(self, model_name: str) -> Iterator[Tuple[str, str]]:
+        """(normalized content, result) of every successful result `model_name` produced, e.g. as training data."""
+        yield from self._conn.execute(
+            "SELECT content, result FROM classifications WHERE model_name = ? AND is_error = 0 AND content IS NOT NULL",
+            (model_name,),
+        )
+
+    def evict(self) -> int:
+        expired = self._conn.execute(
+            "DELETE FROM classifications WHERE created_at < ?", (time.time() - self.max_age_days * 86400,)
+        ).rowcount
+        overflow = self._conn.execute(
+            "DELETE FROM classifications WHERE key IN ("
+            "SELECT key FROM classifications ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        ).rowcount
+        self._conn.commit()
+        if expired or overflow:
+            log_debug("LLM cache evicted %d expired and %d least recently used entries.", expired, overflow)
+        return expired + overflow
+
+    def log_summary(self) -> None:
+        lookups = self.hits + self.misses
+        hit_rate = f"{self.hits / lookups:.0%}" if lookups else "n/a"
+        log_info(f"LLM cache: {self.hits} hits, {self.misses} misses (hit rate {hit_rate}) in {self.path}.")
+
+    def close(self) -> None:
+        self._conn.commit()
+        self._conn.close()
+
+
+def open_classification_cache() -> Optional[ClassificationCache]:
+    """The configured cache, or None when disabled or unusable (analysis then always calls the model)."""
+    if not LLM_CACHE:
+        return None
+    try:
+        return ClassificationCache()
+    except sqlite3.Error as e_cache:
+        log_warning(f"LLM cache at {LLM_CACHE_PATH} is unavailable, continuing without it: {e_cache}")
+        return None
@@ -0,0 +1,177 @@
+# --- Multi-Backend LLM Router ---
+import asyncio
+import os
+import time
+from typing import List, Optional, Tuple
+
+import google.api_core.exceptions
+
+from logger import log_debug, log_info, log_warning
+from perf import LLM_CALL_SPAN, span
+from rate_limiter import AdaptiveRateLimiter, get_rate_limiter, model_limits, retry_delay_seconds
+from utils import ANALYZER_CONCURRENCY, OLLAMA_BASE_URL
+
+OLLAMA_DEFAULT_LIMITS: Tuple[int, Optional[int]] = (600, None) # A local server has no quota, only throughput
+OLLAMA_DEFAULT_CONCURRENCY = 2
+ERROR_COOLDOWN_SECONDS = 60 # A backend that failed with a non-rate-limit error is skipped this long
+LOCAL_RETRY_AFTER_SECONDS = 5 # Pause after a 429 that carries no retry delay (e.g. from Ollama)
+OUTPUT_TOKENS_ESTIMATE = 256
+
+
+def _is_rate_limited(e: Exception) -> bool:
+    return isinstance(e, google.api_core.exceptions.ResourceExhausted) or getattr(e, "status_code", None) == 429
+
+
+class LLMBackend:
+    """One chat model (a Gemini/Gemma model with a given API key, or an Ollama model) with its own quota."""
+
+    def __init__(self, name: str, llm, rate_limiter: AdaptiveRateLimiter, concurrency: int):
+        self.name = name
+        self.llm = llm
+        self.rate_limiter = rate_limiter
+        self.concurrency = concurrency
+        self.in_flight = 0 # Includes callers queued for a slot
+        self.unhealthy_until = 0.0
+        self.calls = 0
+        self.rate_limited = 0
+        self.errors = 0
+        self._slots = asyncio.Semaphore(concurrency)
+
+    @property
+    def model_name(self) -> str:
+        return getattr(self.llm, 'model', getattr(self.llm, 'model_name', self.name))
+
+    def is_healthy(self) -> bool:
+        return time.monotonic() >= self.unhealthy_until
+
+    def load(self) -> float:
+        return self.in_flight / self.concurrency
+
+    async def ainvoke(self, messages, estimated_tokens: int):
+        self.in_flight += 1
+        try:
+            async with self._slots:
+                await self.rate_limiter.acquire(estimated_tokens)
+                with span(LLM_CALL_SPAN), span(f"llm.backend.{self.name}"):
+                    response = await self.llm.ainvoke(messages)
+        finally:
+            self.in_flight -= 1
+        usage = getattr(response, 'usage_metadata', None) or {}
+        self.rate_limiter.record_usage(estimated_tokens, usage.get('total_tokens'))
+        self.rate_limiter.on_success()
+        self.calls += 1
+        return response
+
+
+class LLMRouter:
+    """
+    Drop-in for the analyzer's chat model that spreads calls over several backends. Each call goes
+    to the healthy backend that can start soonest under its own rate limiter (then the least loaded,
+    then the one with the most quota left); a rate limit or error fails the call over to the next
+    backend, so throughput is the sum of the backends' quotas. `model` only names the router in logs:
+    results are cached under the model of the backend that answered (see `ainvoke_with_backend`).
+    """
+
+    def __init__(self, backends: List[LLMBackend]):
+        if not backends:
+            raise ValueError("LLMRouter needs at least one backend.")
+        self.backends = backends
+        self.model_names = list(dict.fromkeys(backend.model_name for backend in backends))
+        self.model = ",".join(self.model_names)
+
+    def _ranked(self, estimated_tokens: int, tried: List[LLMBackend]) -> List[LLMBackend]:
+        return sorted(
+            (backend for backend in self.backends if backend not in tried),
+            key=lambda b: (not b.is_healthy(), b.rate_limiter.wait_time(estimated_tokens), b.load(), -b.rate_limiter.headroom()),
+        )
+
+    async def ainvoke(self, messages):
+        response, _ = await self.ainvoke_with_backend(messages)
+        return response
+
+    async def ainvoke_with_backend(self, messages) -> Tuple[object, LLMBackend]:
+        """
+        (response, the backend that produced it). Tries each backend at most once; re-raises the
+        last error (as ResourceExhausted if every backend was rate limited).
+        """
+        estimated_tokens = sum(len(str(m.content)) for m in messages) // 4 + OUTPUT_TOKENS_ESTIMATE
+        tried: List[LLMBackend] = []
+        last_error: Optional[Exception] = None
+        all_rate_limited = True
+        while len(tried) < len(self.backends):
+            backend = self._ranked(estimated_tokens, tried)[0]
+            tried.append(backend)
+            try:
+                return await backend.ainvoke(messages, estimated_tokens), backend
+            except Exception as e:
+                last_error = e
+                if _is_rate_limited(e):
+                    backend.rate_limited += 1
+                    backend.rate_limiter.on_rate_limited(
+                        retry_delay_seconds(e) if isinstance(e, google.api_core.exceptions.ResourceExhausted) else LOCAL_RETRY_AFTER_SECONDS
+                    )
+                else:
+                    all_rate_limited = False
+                    backend.errors += 1
+                    backend.unhealthy_until = time.monotonic() + ERROR_COOLDOWN_SECONDS
+                    log_warning(f"LLM backend '{backend.name}' failed ({type(e).__name__}: {e}); skipping it for {ERROR_COOLDOWN_SECONDS}s.")
+                if len(tried) < len(self.backends):
+                    log_debug("Failing over from LLM backend '%s'.", backend.name)
+        if all_rate_limited and not isinstance(last_error, google.api_core.exceptions.ResourceExhausted):
+            raise google.api_core.exceptions.ResourceExhausted(f"Every LLM backend is rate limited. Last error: {last_error}") from last_error
+        raise last_error
+
+    def log_summary(self) -> None:
+        for backend in self.backends:
+            log_info(
+                f"LLM backend '{backend.name}': {backend.calls} calls, {backend.rate_limited} rate limited, "
+                f"{backend.errors} errors, running at {backend.rate_limiter.requests.per_minute:.0f} requests/min."
+            )
+
+
+def parse_backend_spec(spec: str) -> Tuple[str, str, str, dict]:
+    """
+    `provider:model[@target][;rpm=N][;tpm=N][;concurrency=N]` -> (provider, model, target, options).
+    The target is the name of the env var holding the API key for `google`, or the server URL for `ollama`.
+    """
+    head, *option_parts = [part.strip() for part in spec.split(";")]
+    provider, sep, model = head.partition(":")
+    if not sep or not model:
+        raise ValueError(f"Invalid LLM backend '{spec}': expected provider:model.")
+    model, _, target = model.partition("@")
+    options = {}
+    for option in filter(None, option_parts):
+        key, sep, value = option.partition("=")
+        if not sep or key not in ("rpm", "tpm", "concurrency"):
+            raise ValueError(f"Invalid option '{option}' in LLM backend '{spec}'.")
+        options[key] = int(value)
+    return provider.lower(), model, target, options
+
+
+def create_backend(spec: str) -> LLMBackend:
+    provider, model, target, options = parse_backend_spec(spec)
+    if provider in ("google", "gemini"):
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        api_key = os.getenv(target) if target else None
+        if target and not api_key:
+            raise ValueError(f"LLM backend '{spec}': environment variable {target} is not set.")
+        llm = ChatGoogleGenerativeAI(model=model, google_api_key=api_key) if api_key else ChatGoogleGenerativeAI(model=model)
+        requests_per_minute, tokens_per_minute = model_limits(model)
+        concurrency = ANALYZER_CONCURRENCY
+    elif provider == "ollama":
+        from langchain_ollama import ChatOllama
+        llm = ChatOllama(model=model, base_url=target or OLLAMA_BASE_URL)
+        requests_per_minute, tokens_per_minute = OLLAMA_DEFAULT_LIMITS
+        concurrency = OLLAMA_DEFAULT_CONCURRENCY
+    else:
+        raise ValueError(f"Unknown LLM provider '{provider}' in '{spec}' (expected google or ollama).")
+    name = f"{provider}:{model}" + (f"@{target}" if target else "")
+    limits = (options.get("rpm", requests_per_minute), options.get("tpm", tokens_per_minute))
+    return LLMBackend(name, llm, get_rate_limiter(name, limits), options.get("concurrency", concurrency))
+
+
+def create_llm_router(backend_specs: str) -> LLMRouter:
+    """A router over the comma-separated backend specs of AITA_LLM_BACKENDS."""
+    backends = [create_backend(spec) for spec in backend_specs.split(",") if spec.strip()]
+    log_info(f"LLM router over {len(backends)} backends: {', '.join(b.name for b in backends)}")
+    return LLMRouter(backends)
@@ -0,0 +1,72 @@
+# --- Local Offline Classifier ---
+import re
+from typing import List, Optional, Sequence, Tuple
+
+from llm_cache import ClassificationCache
+from logger import log_info, log_warning
+from utils import LOCAL_CLASSIFIER, LOCAL_CLASSIFIER_MIN_SAMPLES
+
+_LABEL_PATTERN = re.compile(r"\b(positive|negative|offensive)\b", re.IGNORECASE)
+
+
+def extract_label(text: str) -> Optional[str]:
+    """The label in an LLM answer such as "```positive```", or None for errors and unparseable answers."""
+    if not text or text.startswith("Error:"):
+        return None
+    match = _LABEL_PATTERN.search(text)
+    return match.group(1).lower() if match else None
+
+
+class LocalClassifier:
+    """
+    TF-IDF + logistic regression trained on labels the LLM produced in earlier runs. Predicts a
+    whole batch of entries in one vectorized call and reports the probability of its label, so
+    only low-confidence entries need to go to the remote model.
+    """
+
+    def __init__(self):
+        # scikit-learn takes over a second to import; only pay for it once there is enough data to train on
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.pipeline import make_pipeline
+
+        self.model = make_pipeline(
+            TfidfVectorizer(ngram_range=(1, 2), min_df=1, sublinear_tf=True),
+            LogisticRegression(C=10.0, max_iter=1000, class_weight="balanced"), # Weak regularization keeps probabilities usable on small label sets
+        )
+        self.training_size = 0
+
+    def train(self, texts: Sequence[str], labels: Sequence[str]) -> None:
+        self.model.fit(list(texts), list(labels))
+        self.training_size = len(texts)
+
+    def predict(self, texts: Sequence[str]) -> List[Tuple[str, float]]:
+        if not texts:
+            return []
+        probabilities = self.model.predict_proba(list(texts))
+        classes = self.model.classes_
+        return [(classes[row.argmax()], float(row.max())) for row in probabilities]
+
+
+def train_local_classifier(cache: Optional[ClassificationCache], model_names: Sequence[str]) -> Optional[LocalClassifier]:
+    """A classifier trained on the cached labels of `model_names`, or None if disabled or there is too little data."""
+    if not LOCAL_CLASSIFIER or not cache:
+        return None
+    texts, labels = [], []
+    for model_name in model_names:
+        for content, result in cache.iter_labeled(model_name):
+            label = extract_label(result)
+            if label:
+                texts.append(content)
+                labels.append(label)
+    if len(texts) < LOCAL_CLASSIFIER_MIN_SAMPLES or len(set(labels)) < 2:
+        log_info(f"Local classifier needs at least {LOCAL_CLASSIFIER_MIN_SAMPLES} cached labels of 2+ classes (have {len(texts)}); using the LLM only.")
+        return None
+    classifier = LocalClassifier()
+    try:
+        classifier.train(texts, labels)
+    except ValueError as e_train:
+        log_warning(f"Could not train local classifier: {e_train}")
+        return None
+    log_info(f"Local classifier trained on {len(texts)} cached labels from {', '.join(model_names)}.")
+    return classifier
@@ -1,11 +1,116 @@
+import json
+import threading
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+
 from colorama import init, Fore, Style
 
+from utils import LOG_JSONL_PATH, LOG_LEVEL
+
 init(autoreset=True)
 
+# --- Levels ---
+DEBUG = 10
+INFO = 20
+SUCCESS = 25
+WARNING = 30
+ERROR = 40
+_LEVEL_NAMES = {"DEBUG": DEBUG, "INFO": INFO, "SUCCESS": SUCCESS, "WARNING": WARNING, "ERROR": ERROR}
+
+# Run/student/phase fields attached to JSON-lines records; contextvars keep them per asyncio task
+_log_fields: ContextVar[dict] = ContextVar("log_fields", default={})
+
+
+class _LogState:
+    def __init__(self):
+        self.level = _LEVEL_NAMES.get(LOG_LEVEL.upper(), INFO)
+        self.run_id = uuid.uuid4().hex[:12]
+        self.jsonl_path: Optional[str] = LOG_JSONL_PATH or None
+        self.jsonl_file = None
+        self.lock = threading.Lock()
+
+
+_state = _LogState()
+
+
+def configure_logging(level: Optional[str] = None, jsonl_path: Optional[str] = None, run_id: Optional[str] = None) -> str:
+    """Overrides the env-configured level / JSON-lines sink and returns the run id stamped on records."""
+    if level:
+        _state.level = _LEVEL_NAMES.get(level.upper(), _state.level)
+    if jsonl_path is not None and jsonl_path != _state.jsonl_path:
+        if _state.jsonl_file:
+            _state.jsonl_file.close()
+            _state.jsonl_file = None
+        _state.jsonl_path = jsonl_path or None
+    if run_id:
+        _state.run_id = run_id
+    return _state.run_id
+
+
+def log_enabled(level: int) -> bool:
+    """Guard for debug-only work that is expensive by itself (e.g. a browser round trip)."""
+    return level >= _state.level
+
+
+@contextmanager
+def log_context(**fields):
+    """Adds fields such as student_id or phase to every JSON-lines record logged inside the block."""
+    token = _log_fields.set({**_log_fields.get(), **fields})
+    try:
+        yield
+    finally:
+        _log_fields.reset(token)
+
+
+def current_log_fields() -> dict:
+    return _log_fields.get()
+
+
+def _write_jsonl(level_name: str, message: str) -> None:
+    _write_record({
+        "ts": datetime.now(timezone.utc).isoformat(),
+        "level": level_name,
+        "run_id": _state.run_id,
+        **_log_fields.get(),
+        "message": message,
+    })
+
+
+def _write_record(record: dict) -> None:
+    with _state.lock:
+        if _state.jsonl_file is None:
+            _state.jsonl_file = open(_state.jsonl_path, "a", encoding="utf-8")
+        _state.jsonl_file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        _state.jsonl_file.flush()
+
+
+def log_event(event: str, **fields) -> None:
+    """
+    Structured progress record (e.g. student_saved, rate_limited) for whoever tails the JSON-lines
+    sink, such as the Streamlit console. Nothing is printed, and it is a no-op without a sink.
+    """
+    if not _state.jsonl_path:
+        return
+    _write_record({"ts": datetime.now(timezone.utc).isoformat(), "level": "EVENT", "run_id": _state.run_id, **_log_fields.get(), "event": event, **fields})
+
+
+def _emit(level: int, level_name: str, color: str, message, args) -> None:
+    if level < _state.level:
+        return # Disabled: no formatting, no I/O
+    text = str(message) % args if args else str(message)
+    print(f"{color}[{level_name}] {text}{Style.RESET_ALL}")
+    if _state.jsonl_path:
+        _write_jsonl(level_name, text)
+
+
 # --- Define colored logging functions ---
-def log_info(message): print(f"{Fore.CYAN}[INFO] {message}{Style.RESET_ALL}")
-def log_success(message): print(f"{Fore.GREEN}[SUCCESS] {message}{Style.RESET_ALL}")
-def log_warning(message): print(f"{Fore.YELLOW}[WARNING] {message}{Style.RESET_ALL}")
-def log_error(message): print(f"{Fore.RED}[ERROR] {message}{Style.RESET_ALL}")
-def log_debug(message): print(f"{Fore.MAGENTA}[DEBUG] {message}{Style.RESET_ALL}")
-def log_step(step_num, message): print(f"{Fore.BLUE}[STEP {step_num}] {message}{Style.RESET_ALL}")
\ No newline at end of file
+# Extra positional args are %-formatted only when the level is enabled: log_debug("Entry %d: %s", i, sel)
+def log_info(message, *args): _emit(INFO, "INFO", Fore.CYAN, message, args)
+def log_success(message, *args): _emit(SUCCESS, "SUCCESS", Fore.GREEN, message, args)
+def log_warning(message, *args): _emit(WARNING, "WARNING", Fore.YELLOW, message, args)
+def log_error(message, *args): _emit(ERROR, "ERROR", Fore.RED, message, args)
+def log_debug(message, *args): _emit(DEBUG, "DEBUG", Fore.MAGENTA, message, args)
+def log_step(step_num, message, *args): _emit(INFO, f"STEP {step_num}", Fore.BLUE, message, args)
@@ -1,6 +1,6 @@
 # --- Pydantic Models ---
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Literal, Optional, Dict
 
 class DiscussionEntry(BaseModel):
     author: Optional[str] = Field(default="Author not found")
@@ -13,3 +13,15 @@ class StudentSubmissionData(BaseModel):
     entries: List[DiscussionEntry] = []
     status: Optional[str] = None
     error: Optional[str] = None
+
+class EntryClassification(BaseModel):
+    entry_id: str = Field(description="The ID shown in square brackets before the entry, copied exactly")
+    label: Literal["positive", "negative", "offensive"]
+
+    @field_validator("label", mode="before")
+    @classmethod
+    def _normalize_label(cls, value):
+        return value.strip(" `'\"").lower() if isinstance(value, str) else value
+
+class BatchClassification(BaseModel):
+    classifications: List[EntryClassification]
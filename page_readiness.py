@@ -0,0 +1,130 @@
+# --- Page Readiness Detection ---
+import asyncio
+import time
+from typing import Dict, Optional, Tuple
+
+from playwright.async_api import Page
+
+from logger import log_debug, log_info, log_warning
+from perf import record_duration
+from speedgrader import (
+    ENTRY_SELECTOR, ENTRY_SELECTOR_FALLBACK, IFRAME_SELECTOR, IFRAME_SRC_READY_PREDICATE, MAIN_CONTENT_CONTAINER_SELECTOR,
+    NAME_SELECTORS, NAVIGATION_SNAPSHOT_SCRIPT, NO_SUBMISSION_INDICATOR_SELECTOR, STUDENT_LABEL_READY_PREDICATE,
+    STUDENT_URL_READY_PREDICATE,
+)
+
+# Mutually exclusive outcomes of a SpeedGrader student page, in tie-break priority order
+SUBMISSION_STATE_NO_SUBMISSION = "no_submission"
+SUBMISSION_STATE_IFRAME = "iframe"
+SUBMISSION_STATE_MAIN_CONTENT = "main_content"
+SUBMISSION_STATE_UNKNOWN = "unknown"
+_STATE_PRIORITY = [SUBMISSION_STATE_NO_SUBMISSION, SUBMISSION_STATE_IFRAME, SUBMISSION_STATE_MAIN_CONTENT]
+
+SUBMISSION_STATE_TIMEOUT_MS = 20000
+STUDENT_URL_TIMEOUT_MS = 20000
+STUDENT_LABEL_TIMEOUT_MS = 10000
+IFRAME_SRC_TIMEOUT_MS = 10000
+IFRAME_BODY_GRACE_MS = 3000 # How long a visible iframe may keep main-page content from winning
+
+
+async def detect_submission_state(page: Page, timeout_ms: int = SUBMISSION_STATE_TIMEOUT_MS) -> str:
+    """
+    Waits concurrently for the no-submission indicator, a ready submission iframe body and
+    main-page content, and returns whichever state appears first (SUBMISSION_STATE_UNKNOWN on timeout).
+    Main-page content only counts while no submission iframe is visible: SpeedGrader's own chrome
+    matches those selectors before a still-loading iframe has a body. A visible iframe whose body
+    does not appear within IFRAME_BODY_GRACE_MS (blank or hidden frame) falls back to main content.
+    """
+    waiters = {
+        SUBMISSION_STATE_NO_SUBMISSION: page.locator(NO_SUBMISSION_INDICATOR_SELECTOR).wait_for(state="visible", timeout=timeout_ms),
+        SUBMISSION_STATE_IFRAME: page.frame_locator(IFRAME_SELECTOR).first.locator('body').wait_for(state="visible", timeout=timeout_ms),
+        SUBMISSION_STATE_MAIN_CONTENT: page.locator(
+            f"{MAIN_CONTENT_CONTAINER_SELECTOR}, {ENTRY_SELECTOR}, {ENTRY_SELECTOR_FALLBACK}"
+        ).first.wait_for(state="visible", timeout=timeout_ms),
+    }
+    tasks = {asyncio.ensure_future(waiter): state for state, waiter in waiters.items()}
+    pending = set(tasks)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    deadline = started + timeout_ms / 1000
+    main_content_deferred = False
+    try:
+        while pending:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            # A waiter that errored (e.g. frame detached) just drops out of the race
+            resolved = [tasks[task] for task in done if not task.cancelled() and task.exception() is None]
+            if resolved == [SUBMISSION_STATE_MAIN_CONTENT] and await page.locator(IFRAME_SELECTOR).first.is_visible():
+                log_debug("Main-page content matched while the submission iframe is still loading; waiting for the iframe.")
+                main_content_deferred = True
+                deadline = min(deadline, loop.time() + IFRAME_BODY_GRACE_MS / 1000)
+                continue
+            if resolved:
+                state = min(resolved, key=_STATE_PRIORITY.index)
+                log_debug("Submission state resolved as '%s' after %.2fs.", state, loop.time() - started)
+                return state
+        if main_content_deferred:
+            log_debug("Submission iframe body did not appear within %d ms; using main-page content.", IFRAME_BODY_GRACE_MS)
+            return SUBMISSION_STATE_MAIN_CONTENT
+        log_warning(f"No submission state resolved within {timeout_ms} ms.")
+        return SUBMISSION_STATE_UNKNOWN
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def read_navigation_snapshot(page: Page) -> Dict[str, Optional[str]]:
+    """URL, student label and iframe src of the current student, taken before navigating away."""
+    return await page.evaluate(NAVIGATION_SNAPSHOT_SCRIPT, {"nameSelectors": NAME_SELECTORS, "iframeSelector": IFRAME_SELECTOR})
+
+
+async def wait_for_student_ready(
+    page: Page,
+    previous: Optional[Dict[str, Optional[str]]] = None,
+    expected_student_id: Optional[str] = None,
+) -> Tuple[str, Dict[str, float]]:
+    """
+    Waits for the signals that a SpeedGrader student page is actually ready, instead of `networkidle`:
+    the URL points at the (expected or a new) student, the student label changed, the submission
+    iframe `src` was updated, and the submission state resolved. Only the URL phase is fatal.
+    Returns (submission_state, per-phase timings in seconds).
+    """
+    previous = previous or {}
+    timings: Dict[str, float] = {}
+    predicate_arg = {
+        "expectedStudentId": expected_student_id,
+        "previousUrl": previous.get("url"),
+        "previousLabel": previous.get("label"),
+        "previousSrc": previous.get("iframe_src"),
+        "nameSelectors": NAME_SELECTORS,
+        "iframeSelector": IFRAME_SELECTOR,
+        "noSubmissionSelector": NO_SUBMISSION_INDICATOR_SELECTOR,
+    }
+    phases = [
+        ("url", STUDENT_URL_READY_PREDICATE, STUDENT_URL_TIMEOUT_MS),
+        ("label", STUDENT_LABEL_READY_PREDICATE, STUDENT_LABEL_TIMEOUT_MS),
+        ("iframe_src", IFRAME_SRC_READY_PREDICATE, IFRAME_SRC_TIMEOUT_MS),
+    ]
+    for phase_name, predicate, timeout_ms in phases:
+        phase_start = time.perf_counter()
+        try:
+            await page.wait_for_function(predicate, arg=predicate_arg, timeout=timeout_ms)
+        except Exception as e_phase:
+            if phase_name == "url":
+                raise
+            log_warning(f"Readiness phase '{phase_name}' did not resolve within {timeout_ms} ms: {e_phase}")
+        timings[phase_name] = time.perf_counter() - phase_start
+
+    phase_start = time.perf_counter()
+    submission_state = await detect_submission_state(page)
+    timings["submission"] = time.perf_counter() - phase_start
+
+    for phase_name, secs in timings.items():
+        record_duration(f"ready.{phase_name}", secs)
+    log_info("Student page ready in {:.2f}s ({}); state: {}".format(
+        sum(timings.values()), ", ".join(f"{name}={secs:.2f}s" for name, secs in timings.items()), submission_state,
+    ))
+    return submission_state, timings
@@ -0,0 +1,123 @@
+# --- Per-Phase Timing Instrumentation ---
+import asyncio
+import json
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from logger import current_log_fields, log_info, log_success, log_warning
+from utils import PERF_TRACE_PATH
+
+LLM_CALL_SPAN = "llm.call"
+SLEEP_SPANS = ("rate_limit.wait",) # Time spent deliberately waiting rather than working
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class PerfRecorder:
+    """
+    Collects span durations per phase name and, only when `collect_events` is set (a trace path is
+    configured), raw events for a Chrome trace file; those grow with every span of the run.
+    """
+
+    def __init__(self, collect_events: bool = bool(PERF_TRACE_PATH)):
+        self.started = time.perf_counter()
+        self.collect_events = collect_events
+        self.durations: Dict[str, List[float]] = defaultdict(list)
+        self.events: List[dict] = []
+        self._lock = threading.Lock()
+
+    def record(self, name: str, start: float, duration: float) -> None:
+        if not self.collect_events:
+            with self._lock:
+                self.durations[name].append(duration)
+            return
+        try:
+            track = asyncio.current_task().get_name()
+        except RuntimeError: # Not inside a task (sync code or another thread)
+            track = threading.current_thread().name
+        with self._lock:
+            self.durations[name].append(duration)
+            self.events.append({
+                "name": name,
+                "ph": "X",
+                "ts": round((start - self.started) * 1e6),
+                "dur": round(duration * 1e6),
+                "pid": 1,
+                "tid": track,
+                "args": dict(current_log_fields()),
+            })
+
+    def summary(self) -> Dict[str, object]:
+        wall = time.perf_counter() - self.started
+        phases = {
+            name: {
+                "count": len(values),
+                "total_s": round(sum(values), 4),
+                "p50_s": round(_percentile(values, 50), 4),
+                "p95_s": round(_percentile(values, 95), 4),
+                "max_s": round(max(values), 4),
+            }
+            for name, values in sorted(self.durations.items())
+        }
+        llm_calls = len(self.durations.get(LLM_CALL_SPAN, []))
+        return {
+            "wall_s": round(wall, 3),
+            "total_sleep_s": round(sum(sum(self.durations.get(name, [])) for name in SLEEP_SPANS), 3),
+            "llm_calls": llm_calls,
+            "llm_calls_per_second": round(llm_calls / wall, 3) if wall else 0.0,
+            "phases": phases,
+        }
+
+
+_recorder = PerfRecorder()
+
+
+def reset_perf(collect_events: bool = bool(PERF_TRACE_PATH)) -> None:
+    global _recorder
+    _recorder = PerfRecorder(collect_events)
+
+
+@contextmanager
+def span(name: str):
+    """Times the enclosed block (sync or inside a coroutine) under phase `name`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _recorder.record(name, start, time.perf_counter() - start)
+
+
+def record_duration(name: str, duration: float) -> None:
+    """For durations measured elsewhere (e.g. readiness phase timings or a sleep that already happened)."""
+    _recorder.record(name, time.perf_counter() - duration, duration)
+
+
+def write_perf_report(report_path: str, trace_path: Optional[str] = PERF_TRACE_PATH) -> Dict[str, object]:
+    """
+    Logs and writes the run's per-phase latency table as JSON and, if `trace_path` is set and the
+    recorder collected events, a Chrome trace (open in chrome://tracing or Perfetto) with one track
+    per asyncio task.
+    """
+    summary = _recorder.summary()
+    log_info(f"Run performance: {summary['wall_s']}s wall, {summary['total_sleep_s']}s sleeping, "
+             f"{summary['llm_calls']} LLM calls ({summary['llm_calls_per_second']}/s).")
+    for name, stats in summary["phases"].items():
+        log_info(f"  {name:<24} n={stats['count']:<5} p50={stats['p50_s']:.3f}s p95={stats['p95_s']:.3f}s "
+                 f"max={stats['max_s']:.3f}s total={stats['total_s']:.1f}s")
+    try:
+        with open(report_path, "w", encoding="utf-8") as f_report:
+            json.dump(summary, f_report, indent=2)
+        log_success(f"Wrote performance report to {report_path}")
+        if trace_path and _recorder.collect_events:
+            with open(trace_path, "w", encoding="utf-8") as f_trace:
+                json.dump({"traceEvents": _recorder.events, "displayTimeUnit": "ms"}, f_trace)
+            log_success(f"Wrote trace ({len(_recorder.events)} spans) to {trace_path}")
+    except OSError as e_write:
+        log_warning(f"Could not write performance report: {e_write}")
+    return summary
@@ -0,0 +1,124 @@
+# --- Pipelined Scrape-and-Analyze ---
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+from logger import log_context, log_error, log_info, log_success, log_warning
+from entry_table import EntryParquetWriter
+from models import StudentSubmissionData
+from perf import span
+from submission_analizer import SubmissionAnalyzer
+from utils import PIPELINE_ANALYZER_WORKERS
+
+
+class ScrapeAnalyzePipeline:
+    """
+    Analyzer workers consume students from an asyncio queue while the browser moves on to the next
+    student, so LLM time overlaps browser time. Students already waiting in the queue are analyzed
+    together so batched classification can span them. Rows are kept in submission order and the
+    CSV is assembled by `finish()` (or, with only the rows analyzed so far, by `cancel()`).
+    """
+
+    def __init__(
+        self,
+        analyzer: SubmissionAnalyzer,
+        output_csv_path: str,
+        workers: int = PIPELINE_ANALYZER_WORKERS,
+        entry_writer: Optional[EntryParquetWriter] = None,
+        close_analyzer: bool = True,
+    ):
+        self.analyzer = analyzer
+        self.output_csv_path = output_csv_path
+        self.entry_writer = entry_writer
+        self.close_analyzer = close_analyzer # False when the analyzer is shared with other pipelines
+        self.workers = max(1, workers)
+        # Enough students to fill one batched classification request
+        self.max_students_per_batch = max(1, analyzer.batch_size // analyzer.max_entries)
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._rows: Dict[int, dict] = {}
+        self._submitted = 0
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._worker(n + 1)) for n in range(self.workers)]
+        log_info(f"Pipelined analysis started with {self.workers} analyzer worker(s).")
+
+    def submit(self, student_data: StudentSubmissionData) -> None:
+        self._queue.put_nowait((self._submitted, student_data))
+        self._submitted += 1
+
+    def _drain_ready(self, first_item) -> Tuple[List[Tuple[int, StudentSubmissionData]], bool]:
+        """`first_item` plus whatever else is already queued, so one batched request can span students."""
+        items, stop = [], first_item is None
+        if not stop:
+            items.append(first_item)
+        while not stop and len(items) < self.max_students_per_batch:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            if item is None:
+                stop = True
+            else:
+                items.append(item)
+        return items, stop
+
+    async def _worker(self, worker_num: int) -> None:
+        with log_context(phase="analyze", analyzer_worker=worker_num):
+            stop = False
+            while not stop:
+                items, stop = self._drain_ready(await self._queue.get())
+                try:
+                    if not items:
+                        continue
+                    students = [student_data for _, student_data in items]
+                    log_info(f"[Analyzer {worker_num}] Analyzing {len(students)} student(s) ({self._queue.qsize()} queued).")
+                    try:
+                        with span("analyze.batch"):
+                            rows = await self.analyzer.analyze_students(students)
+                    except Exception as e_analyze:
+                        log_error(f"[Analyzer {worker_num}] Failed to analyze students {[sd.student_id for sd in students]}: {e_analyze}")
+                        rows = [{"student_id": sd.student_id, "student_name": sd.student_name} for sd in students]
+                    for (seq, student_data), row in zip(items, rows):
+                        self._rows[seq] = row
+                        if self.entry_writer:
+                            self.entry_writer.append(student_data, row) # Long table order does not matter; stream it now
+                finally:
+                    for _ in range(len(items) + stop):
+                        self._queue.task_done()
+
+    async def finish(self) -> Optional[str]:
+        """Waits for queued students to be analyzed, then writes the CSV in submission order."""
+        log_info(f"Waiting for analyzer workers to finish {self._queue.qsize()} queued students...")
+        for _ in self._tasks:
+            self._queue.put_nowait(None)
+        await asyncio.gather(*self._tasks)
+        return self._write_results()
+
+    async def cancel(self) -> Optional[str]:
+        """Stops the workers without analyzing the queued students, then writes what was analyzed."""
+        log_warning(f"Cancelling pipelined analysis; {self._queue.qsize()} queued students are left unanalyzed.")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        return self._write_results()
+
+    def _write_results(self) -> Optional[str]:
+        """Closes the analyzer and entry table, then writes the CSV in submission order."""
+        if self.close_analyzer:
+            self.analyzer.close()
+        if self.entry_writer:
+            self.entry_writer.close()
+        if not self._rows:
+            log_warning("No data processed to write to CSV.")
+            return None
+        rows = [self._rows[seq] for seq in sorted(self._rows)]
+        try:
+            self.analyzer.write_csv_chunk(rows, self.output_csv_path, write_header=True)
+        except Exception as e_write:
+            log_error(f"Error writing data to CSV: {e_write}")
+            return None
+        log_success(
+            f"Pipelined analysis wrote {len(rows)} rows to {self.output_csv_path}. "
+            f"Attempted: {self.analyzer.summaries_attempted_count}, Successful: {self.analyzer.summaries_successful_count}."
+        )
+        return self.output_csv_path
@@ -17,3 +17,13 @@ For example:
 ```negative```
 or ```offensive```
 """
+
+ANALIZE_BATCH_TEXT = """
+Tell me if each of the following texts is positive, offensive or negative.
+Every text starts with its ID in square brackets. Return exactly one label for every ID.
+
+Texts:
+{entries}
+
+{format_instructions}
+"""
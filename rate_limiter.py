@@ -0,0 +1,153 @@
+# --- Adaptive LLM Rate Limiting ---
+import asyncio
+import re
+import time
+from typing import Dict, Optional, Tuple
+
+from logger import log_debug, log_event, log_info, log_warning
+from perf import span
+from utils import LLM_REQUESTS_PER_MINUTE, LLM_TOKENS_PER_MINUTE
+
+# Free-tier quotas (requests/min, tokens/min) by model family; None means no token limit is enforced
+DEFAULT_MODEL_LIMITS: Dict[str, Tuple[int, Optional[int]]] = {
+    "gemma": (30, 15000),
+    "gemini": (30, 1000000),
+}
+FALLBACK_MODEL_LIMITS: Tuple[int, Optional[int]] = (15, None)
+
+BACKOFF_FACTOR = 0.5 # Rate multiplier applied on every ResourceExhausted
+MIN_RATE_FACTOR = 0.1
+RECOVERY_STEP = 0.05 # Rate factor regained per successful call
+DEFAULT_RETRY_AFTER_SECONDS = 30
+
+
+def retry_delay_seconds(e: Exception) -> float:
+    """The server-suggested retry delay of a rate-limit error (e.g. ResourceExhausted), or a conservative default."""
+    if hasattr(e, 'retry') and e.retry and hasattr(e.retry, 'delay') and e.retry.delay:
+        return e.retry.delay.total_seconds() if hasattr(e.retry.delay, 'total_seconds') else float(e.retry.delay)
+    # Try to parse from message if not directly available in exception structure
+    match = re.search(r'retry_delay {\s*seconds: (\d+)\s*}', str(e))
+    if match:
+        return float(match.group(1))
+    return DEFAULT_RETRY_AFTER_SECONDS
+
+
+class TokenBucket:
+    """Continuously refilling bucket holding at most one minute of budget."""
+
+    def __init__(self, per_minute: float):
+        self.per_minute = per_minute
+        self.capacity = per_minute
+        self.available = per_minute
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self._updated) * self.per_minute / 60)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` can be taken (requests bigger than the bucket wait for a full one)."""
+        self._refill()
+        missing = min(amount, self.capacity) - self.available
+        return max(0.0, missing * 60 / self.per_minute) if self.per_minute > 0 else float("inf")
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.available -= amount # May go negative when actual usage exceeds the estimate; refill repays it
+
+    def set_rate(self, per_minute: float) -> None:
+        self._refill()
+        self.per_minute = per_minute
+
+
+class AdaptiveRateLimiter:
+    """
+    Request and token buckets for one model. `acquire()` waits until both have budget; a
+    ResourceExhausted pauses every caller for the server's retry delay and halves the rate, and
+    each success after that gradually restores it.
+    """
+
+    def __init__(self, model_name: str, requests_per_minute: int, tokens_per_minute: Optional[int] = None):
+        self.model_name = model_name
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.rate_factor = 1.0
+        self._paused_until = 0.0
+
+    def wait_time(self, estimated_tokens: int = 0) -> float:
+        """Seconds until a call of `estimated_tokens` could start (0 when there is budget now)."""
+        return max(
+            self._paused_until - time.monotonic(),
+            self.requests.wait_time(1),
+            self.tokens.wait_time(estimated_tokens) if self.tokens else 0.0,
+        )
+
+    def headroom(self) -> float:
+        """Fraction of the request bucket still available (can be negative right after a 429)."""
+        self.requests._refill()
+        return self.requests.available / self.requests.capacity if self.requests.capacity else 0.0
+
+    async def acquire(self, estimated_tokens: int = 0) -> None:
+        while True:
+            wait = self.wait_time(estimated_tokens)
+            if wait <= 0:
+                # No await between the check and the take, so concurrent callers cannot both spend the same budget
+                self.requests.take(1)
+                if self.tokens:
+                    self.tokens.take(estimated_tokens)
+                return
+            log_debug("Rate limiter for '%s' waiting %.2fs.", self.model_name, wait)
+            with span("rate_limit.wait"):
+                await asyncio.sleep(wait)
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: Optional[int]) -> None:
+        if self.tokens and actual_tokens is not None:
+            self.tokens.take(actual_tokens - estimated_tokens)
+
+    def on_success(self) -> None:
+        if self.rate_factor < 1.0:
+            self._set_factor(min(1.0, self.rate_factor + RECOVERY_STEP))
+
+    def on_rate_limited(self, retry_after: float) -> None:
+        self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+        self._set_factor(max(MIN_RATE_FACTOR, self.rate_factor * BACKOFF_FACTOR))
+        # Budget spent before the 429 is not trustworthy; start refilling from empty after the pause
+        self.requests.available = min(self.requests.available, 0)
+        log_warning(
+            f"Rate limited on '{self.model_name}': pausing {retry_after:.1f}s, "
+            f"then running at {self.requests.per_minute:.1f} requests/min."
+        )
+        log_event("rate_limited", model=self.model_name, retry_after_s=retry_after, requests_per_minute=round(self.requests.per_minute, 1))
+
+    def _set_factor(self, factor: float) -> None:
+        self.rate_factor = factor
+        self.requests.set_rate(self.requests_per_minute * factor)
+        if self.tokens:
+            self.tokens.set_rate(self.tokens_per_minute * factor)
+
+
+_limiters: Dict[str, AdaptiveRateLimiter] = {}
+
+
+def model_limits(model_name: str) -> Tuple[int, Optional[int]]:
+    """Env overrides (AITA_LLM_RPM / AITA_LLM_TPM) win over the per-family defaults."""
+    requests_per_minute, tokens_per_minute = next(
+        (limits for family, limits in DEFAULT_MODEL_LIMITS.items() if family in model_name.lower()),
+        FALLBACK_MODEL_LIMITS,
+    )
+    return LLM_REQUESTS_PER_MINUTE or requests_per_minute, LLM_TOKENS_PER_MINUTE or tokens_per_minute
+
+
+def get_rate_limiter(model_name: str, limits: Optional[Tuple[int, Optional[int]]] = None) -> AdaptiveRateLimiter:
+    """
+    One shared limiter per model (or per LLM router backend), so every analyzer using it draws from
+    the same quota. `limits` replaces the per-family defaults when the limiter is first created.
+    """
+    if model_name not in _limiters:
+        requests_per_minute, tokens_per_minute = limits or model_limits(model_name)
+        _limiters[model_name] = AdaptiveRateLimiter(model_name, requests_per_minute, tokens_per_minute)
+        log_info(f"Rate limiter for '{model_name}': {requests_per_minute} requests/min, {tokens_per_minute or 'unlimited'} tokens/min.")
+    return _limiters[model_name]
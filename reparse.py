@@ -0,0 +1,152 @@
+# --- Offline Re-Extraction from the HTML Archive ---
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import orjson
+from bs4 import BeautifulSoup
+
+from html_archive import HTML_ARCHIVE_SUFFIX, read_html_archive, student_json_path
+from logger import log_error, log_info, log_success, log_warning
+from models import DiscussionEntry, StudentSubmissionData
+from report_io import COMPILED_REPORT_JSONL_NAME, compiled_report_path, iter_student_records, write_jsonl_report
+from serialization import dump_student, student_from_record
+from speedgrader import (
+    CONTENT_SELECTORS, DATE_SELECTORS_MAP, ENTRY_SELECTOR, ENTRY_SELECTOR_FALLBACK, MAIN_CONTENT_CONTAINER_SELECTOR,
+    NAME_SELECTORS, SUBMISSION_DESCRIPTION_SELECTOR,
+)
+from utils import OUTPUT_FOLDER_NAME, REPARSE_WORKERS
+
+HTML_PARSER = "html.parser" # Pure Python, always available with beautifulsoup4
+
+
+def extract_entries_from_html(html: str) -> Tuple[int, List[dict]]:
+    """
+    (entry element count, [{post_date, content}]) using the same search root, entry selectors and
+    date/content priority lists as EXTRACT_SUBMISSION_SCRIPT. Static HTML has no layout, so every
+    matched element is treated as visible.
+    """
+    soup = BeautifulSoup(html, HTML_PARSER)
+    root = soup
+    main = soup.select_one(MAIN_CONTENT_CONTAINER_SELECTOR)
+    if main:
+        root = main.select_one(SUBMISSION_DESCRIPTION_SELECTOR) or main
+    entry_elements = root.select(ENTRY_SELECTOR) or root.select(ENTRY_SELECTOR_FALLBACK)
+
+    entries = []
+    for entry_element in entry_elements:
+        post_date = None
+        for date_selector, attr_priority in DATE_SELECTORS_MAP.items():
+            date_element = entry_element.select_one(date_selector)
+            if not date_element:
+                continue
+            for attr_type in attr_priority:
+                val = date_element.get_text() if attr_type == "text" else date_element.get(attr_type)
+                if val and val.strip():
+                    post_date = val.strip()
+                    break
+            if post_date:
+                break
+        content = None
+        for content_selector in CONTENT_SELECTORS:
+            content_element = entry_element.select_one(content_selector)
+            text = content_element.get_text() if content_element else None
+            if text and text.strip():
+                content = text.strip()
+                break
+        entries.append({"post_date": post_date, "content": content})
+    return len(entry_elements), entries
+
+
+def _extract_name_from_html(html: str) -> Optional[str]:
+    soup = BeautifulSoup(html, HTML_PARSER)
+    for selector in NAME_SELECTORS:
+        element = soup.select_one(selector)
+        if element and element.get_text().strip():
+            return element.get_text().strip()
+    return None
+
+
+def reparse_student(archive_path: str) -> Optional[dict]:
+    """
+    Re-extracts one archived student and returns the updated StudentSubmissionData, None when the
+    student's JSON is missing, or {"error": ...} when its files cannot be read or parsed, so one bad
+    archive does not abort the whole pool. Runs in a worker process, so it only touches files.
+    """
+    try:
+        return _reparse_student(archive_path)
+    except Exception as e_student:
+        return {"error": f"{type(e_student).__name__}: {e_student}"}
+
+
+def _reparse_student(archive_path: str) -> Optional[dict]:
+    json_path = student_json_path(archive_path)
+    if not os.path.exists(json_path):
+        return None
+    with open(json_path, "rb") as f_student:
+        student_data = student_from_record(orjson.loads(f_student.read()))
+    snapshot = read_html_archive(archive_path)
+    if student_data.student_name == "Name not found":
+        student_data.student_name = _extract_name_from_html(snapshot["page_html"]) or student_data.student_name
+
+    in_frame = bool(snapshot.get("frame_html"))
+    entry_count, raw_entries = extract_entries_from_html(snapshot["frame_html"] if in_frame else snapshot["page_html"])
+    author = student_data.student_name if student_data.student_name != "Name not found" else "Student name not resolved"
+    entries = [
+        DiscussionEntry(author=author, post_date=raw["post_date"] or "Date not found", content=raw["content"] or "Content not found")
+        for raw in raw_entries if raw["post_date"] or raw["content"]
+    ]
+    if entries:
+        status = f"Successfully extracted {len(entries)} entries for student {student_data.student_id}."
+        status += " (from iframe)" if in_frame else " (from main page content)"
+        status += " (re-parsed from archive)"
+    elif entry_count:
+        status = f"Found {entry_count} entry elements for student {student_data.student_id}, but NO meaningful data could be extracted (re-parsed from archive)."
+    else:
+        status = f"No discussion entry elements found for student {student_data.student_id} (re-parsed from archive)."
+    updated = student_data.model_copy(update={"entries": entries, "status": status, "error": None})
+    return {"json_path": json_path, "student": updated, "changed": updated.entries != student_data.entries}
+
+
+def reparse_archive(output_dir: str = OUTPUT_FOLDER_NAME, workers: int = REPARSE_WORKERS, dry_run: bool = False) -> Dict[str, int]:
+    """
+    Re-extracts every archived student across a process pool with the current selector lists,
+    rewrites the per-student JSON files whose entries changed and rebuilds the compiled report.
+    """
+    archive_paths = sorted(glob.glob(os.path.join(output_dir, f"student_*{HTML_ARCHIVE_SUFFIX}")))
+    if not archive_paths:
+        log_warning(f"No HTML archives ({HTML_ARCHIVE_SUFFIX}) found in {output_dir}.")
+        return {"archived": 0, "reparsed": 0, "changed": 0, "failed": 0}
+    workers = workers or os.cpu_count() or 1
+    log_info(f"Re-parsing {len(archive_paths)} archived students across {workers} processes...")
+
+    reparsed: Dict[str, StudentSubmissionData] = {}
+    changed = failed = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunksize = max(1, len(archive_paths) // (workers * 4))
+        for archive_path, result in zip(archive_paths, pool.map(reparse_student, archive_paths, chunksize=chunksize)):
+            if result is None:
+                log_warning(f"Skipping {archive_path}: no matching student JSON.")
+                continue
+            if "error" in result:
+                failed += 1
+                log_error(f"Could not re-parse {archive_path}: {result['error']}. Keeping the existing student JSON.")
+                continue
+            reparsed[result["student"].student_id] = result["student"]
+            if result["changed"]:
+                changed += 1
+                if not dry_run:
+                    with open(result["json_path"], "wb") as f_out:
+                        f_out.write(dump_student(result["student"]))
+    log_success(f"Re-parsed {len(reparsed)} students; entries changed for {changed}" + (f"; {failed} failed." if failed else "."))
+
+    report_path = compiled_report_path(output_dir)
+    if changed and not dry_run and os.path.exists(report_path):
+        try:
+            students = [reparsed.get(record.get("student_id")) or student_from_record(record) for record in iter_student_records(report_path)]
+        except (OSError, ValueError) as e_report:
+            log_error(f"Could not read compiled report {report_path}: {e_report}")
+        else:
+            write_jsonl_report(students, os.path.join(output_dir, COMPILED_REPORT_JSONL_NAME))
+    return {"archived": len(archive_paths), "reparsed": len(reparsed), "changed": changed, "failed": failed}
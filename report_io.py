@@ -0,0 +1,104 @@
+# --- Compiled Report I/O ---
+import os
+from typing import Iterable, Iterator, Optional
+
+import orjson
+
+from logger import log_error, log_success, log_warning
+from models import StudentSubmissionData
+from serialization import StudentRecord, dump_student
+from utils import OUTPUT_FOLDER_NAME, sanitize_filename
+
+COMPILED_REPORT_JSONL_NAME = "ALL_students_compiled_report.jsonl"
+LEGACY_COMPILED_REPORT_JSON_NAME = "ALL_students_compiled_report.json"
+
+
+def compiled_report_path(output_dir: str = OUTPUT_FOLDER_NAME) -> str:
+    """The JSONL report if present, else a legacy JSON-array report from older runs."""
+    jsonl_path = os.path.join(output_dir, COMPILED_REPORT_JSONL_NAME)
+    legacy_path = os.path.join(output_dir, LEGACY_COMPILED_REPORT_JSON_NAME)
+    if not os.path.exists(jsonl_path) and os.path.exists(legacy_path):
+        return legacy_path
+    return jsonl_path
+
+
+class JsonlReportWriter:
+    """
+    Append-only compiled report: one compact StudentSubmissionData per line, flushed as each student
+    finishes so partial results are usable mid-run and nothing accumulates in memory.
+    """
+
+    def __init__(self, path: str, truncate: bool = True):
+        self.path = path
+        self.records_written = 0
+        self._file = open(path, "wb" if truncate else "ab")
+
+    def append(self, student_data: StudentSubmissionData) -> None:
+        self._file.write(dump_student(student_data) + b"\n")
+        self._file.flush()
+        self.records_written += 1
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def write_jsonl_report(students: Iterable[StudentSubmissionData], path: str) -> int:
+    try:
+        with JsonlReportWriter(path) as writer:
+            for student_data in students:
+                writer.append(student_data)
+        log_success(f"Saved compiled report ({writer.records_written} students) to: {path}")
+        return writer.records_written
+    except OSError as e_write:
+        log_error(f"Failed to save compiled report {path}: {e_write}")
+        return 0
+
+
+def save_student_data(student_data: StudentSubmissionData, output_dir: str = OUTPUT_FOLDER_NAME) -> Optional[str]:
+    s_id = sanitize_filename(student_data.student_id)
+    s_name = sanitize_filename(student_data.student_name if student_data.student_name != "Name not found" else "UnknownName")
+    individual_filename = os.path.join(output_dir, f"student_{s_id}_{s_name}.json")
+    try:
+        with open(individual_filename, "wb") as f_out:
+            f_out.write(dump_student(student_data))
+        log_success(f"Saved data for {s_name} ({s_id}) to {individual_filename}")
+        return individual_filename
+    except Exception as e_save_ind:
+        log_error(f"Failed to save individual file {individual_filename}: {e_save_ind}")
+        return None
+
+
+def iter_student_records(path: str) -> Iterator[dict]:
+    """
+    Yields one raw student dict at a time. JSONL is streamed line by line; a legacy
+    JSON-array report has to be loaded whole, so it is only supported for old output.
+    """
+    if not path.endswith(".jsonl"):
+        with open(path, "rb") as f_report:
+            records = orjson.loads(f_report.read())
+        if not isinstance(records, list):
+            raise ValueError(f"JSON report {path} is not a list as expected.")
+        yield from records
+        return
+    with open(path, "rb") as f_report:
+        for line_number, line in enumerate(f_report, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield orjson.loads(line)
+            except orjson.JSONDecodeError as e_line:
+                # A crash mid-write can leave a truncated last line; skip it rather than lose the report
+                log_warning(f"Skipping unreadable line {line_number} in {path}: {e_line}")
+
+
+def iter_compact_records(path: str) -> Iterator[StudentRecord]:
+    """iter_student_records as sentinel-free StudentRecord objects, for passes that only count or filter."""
+    for record in iter_student_records(path):
+        yield StudentRecord.from_dict(record)
@@ -0,0 +1,73 @@
+# --- Fast Student Serialization ---
+from typing import List, Optional
+
+from models import DiscussionEntry, StudentSubmissionData
+
+# Placeholder strings the extractors store when a field could not be read: each field's model default.
+# A field is only cleaned against its own default, so e.g. an author of "Student name not resolved"
+# (what the extractor writes when the name was missing) stays a real value and survives the round trip.
+ENTRY_SENTINELS = {name: field.default for name, field in DiscussionEntry.model_fields.items()}
+STUDENT_SENTINELS = {name: field.default for name, field in StudentSubmissionData.model_fields.items() if isinstance(field.default, str)}
+
+
+def dump_student(student_data: StudentSubmissionData) -> bytes:
+    """
+    Compact JSON without the fields still at their defaults (sentinels, empty entries, None status).
+    Loading through StudentSubmissionData restores them, so nothing is lost.
+    """
+    return student_data.model_dump_json(exclude_defaults=True).encode("utf-8")
+
+
+def student_from_record(record: dict) -> StudentSubmissionData:
+    """
+    Model from a parsed record (orjson.loads). Validation runs in pydantic-core and is cheaper than
+    model_construct's Python-level field filling, so trusted files are validated all the same.
+    """
+    return StudentSubmissionData.model_validate(record)
+
+
+def _clean(record: dict, name: str, sentinels: dict) -> Optional[str]:
+    value = record.get(name)
+    return None if value == sentinels.get(name) else value
+
+
+class EntryRecord:
+    __slots__ = ("author", "post_date", "content")
+
+    def __init__(self, author: Optional[str] = None, post_date: Optional[str] = None, content: Optional[str] = None):
+        self.author = author
+        self.post_date = post_date
+        self.content = content
+
+
+class StudentRecord:
+    """
+    Lightweight, sentinel-free view of a student for bulk passes over many reports: plain
+    attributes in __slots__, None where the model would hold "... not found".
+    """
+
+    __slots__ = ("student_id", "student_name", "entries", "status", "error")
+
+    def __init__(self, student_id: Optional[str], student_name: Optional[str], entries: List[EntryRecord], status: Optional[str] = None, error: Optional[str] = None):
+        self.student_id = student_id
+        self.student_name = student_name
+        self.entries = entries
+        self.status = status
+        self.error = error
+
+    @classmethod
+    def from_dict(cls, record: dict) -> "StudentRecord":
+        return cls(
+            _clean(record, "student_id", STUDENT_SENTINELS),
+            _clean(record, "student_name", STUDENT_SENTINELS),
+            [EntryRecord(*(_clean(e, name, ENTRY_SENTINELS) for name in EntryRecord.__slots__)) for e in record.get("entries", [])],
+            record.get("status"),
+            record.get("error"),
+        )
+
+    def to_model(self) -> StudentSubmissionData:
+        """Back to the pydantic model; None fields fall back to the model's sentinel defaults."""
+        return StudentSubmissionData.model_validate({
+            **{name: getattr(self, name) for name in ("student_id", "student_name", "status", "error") if getattr(self, name) is not None},
+            "entries": [{name: getattr(e, name) for name in EntryRecord.__slots__ if getattr(e, name) is not None} for e in self.entries],
+        })
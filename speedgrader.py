@@ -0,0 +1,248 @@
+# --- SpeedGrader DOM selectors, URLs and in-page scripts ---
+import re
+from typing import Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
+
+# Shared by the Playwright locator path and the single-pass in-page extraction,
+# so both apply exactly the same selector priority lists.
+
+NAME_SELECTORS = ["span.ui-selectmenu-status span.ui-selectmenu-item-header", "#speedgrader_selected_student_label"]
+NO_SUBMISSION_INDICATOR_SELECTOR = "div#this_student_does_not_have_a_submission"
+IFRAME_HOLDER_SELECTOR = "div#iframe_holder"
+IFRAME_SELECTOR = "iframe#speedgrader_iframe"
+MAIN_CONTENT_CONTAINER_SELECTOR = "div#content.ic-Layout-contentMain"
+SUBMISSION_DESCRIPTION_SELECTOR = "div.submission_description"
+
+ENTRY_SELECTOR = "div.discussion_entry.communication_message"
+ENTRY_SELECTOR_FALLBACK = "article.discussion-entry, div.comment_holder > div.comment"
+
+# Selector -> attribute priority ('text' means the element's text content)
+DATE_SELECTORS_MAP = {
+    'div.header div.post_date.time_ago_date': ['data-timestamp', 'title', 'text'],
+    '.discussion-header-content time': ['datetime', 'title', 'text'],
+    '.posted_at time': ['datetime', 'title', 'text'],
+}
+CONTENT_SELECTORS = [
+    'div.content div.message.user_content.enhanced', '.message_body', '.entry_content'
+]
+
+NEXT_BUTTON_SELECTOR = "button#next-student-button, button[aria-label='Next Student'], button[data-testid='next-student-button']"
+ROSTER_OPTION_SELECTOR = "select#students_selectmenu option, [data-student-id]"
+STUDENT_LINK_SELECTOR = "a[href*='student_id='], option[value*='student_id=']"
+
+
+def build_student_url(speedgrader_url: str, student_id: str) -> str:
+    """Returns `speedgrader_url` pointed at `student_id`, keeping every other query parameter."""
+    parts = urlparse(speedgrader_url)
+    query = parse_qs(parts.query)
+    query["student_id"] = [str(student_id)]
+    return urlunparse(parts._replace(query=urlencode(query, doseq=True)))
+
+
+def build_assignment_url(speedgrader_url: str, course_id: str, assignment_id: str) -> str:
+    """SpeedGrader for another course/assignment on the same Canvas host, opening on the first student."""
+    parts = urlparse(speedgrader_url)
+    path = re.sub(r"/courses/\d+", f"/courses/{course_id}", parts.path)
+    return urlunparse(parts._replace(path=path, query=urlencode({"assignment_id": assignment_id})))
+
+
+def build_speedgrader_json_url(speedgrader_url: str) -> str:
+    """SpeedGrader's own data endpoint (`.../speed_grader.json?assignment_id=X`), used for per-student submission hints."""
+    parts = urlparse(speedgrader_url)
+    assignment_id = parse_qs(parts.query).get("assignment_id", [""])[0]
+    return urlunparse(parts._replace(path=parts.path.rstrip("/") + ".json", query=urlencode({"assignment_id": assignment_id})))
+
+
+def parse_assignment_ids(speedgrader_url: str) -> Tuple[Optional[str], Optional[str]]:
+    """(course_id, assignment_id) of a SpeedGrader URL, either None when absent."""
+    parts = urlparse(speedgrader_url or "")
+    course_match = re.search(r"/courses/(\d+)", parts.path)
+    return course_match.group(1) if course_match else None, parse_qs(parts.query).get("assignment_id", [None])[0]
+
+
+def submission_hint(submission: dict) -> str:
+    """Changes whenever the student posts again (Canvas re-submits discussion submissions on every entry)."""
+    return "|".join(str(submission.get(key)) for key in ("workflow_state", "submitted_at", "attempt"))
+
+
+def roster_script_config() -> dict:
+    return {"rosterOptionSelector": ROSTER_OPTION_SELECTOR, "studentLinkSelector": STUDENT_LINK_SELECTOR}
+
+
+def extraction_script_config(read_page_state: bool) -> dict:
+    """Argument for EXTRACT_SUBMISSION_SCRIPT. `read_page_state` is False when evaluating inside the submission iframe."""
+    return {
+        "readPageState": read_page_state,
+        "nameSelectors": NAME_SELECTORS,
+        "noSubmissionSelector": NO_SUBMISSION_INDICATOR_SELECTOR,
+        "iframeHolderSelector": IFRAME_HOLDER_SELECTOR,
+        "iframeSelector": IFRAME_SELECTOR,
+        "mainContentSelector": MAIN_CONTENT_CONTAINER_SELECTOR,
+        "submissionDescriptionSelector": SUBMISSION_DESCRIPTION_SELECTOR,
+        "entrySelector": ENTRY_SELECTOR,
+        "entrySelectorFallback": ENTRY_SELECTOR_FALLBACK,
+        "dateSelectors": [[sel, attrs] for sel, attrs in DATE_SELECTORS_MAP.items()],
+        "contentSelectors": CONTENT_SELECTORS,
+    }
+
+
+# Runs the whole extraction in one browser round trip. On the main page it also reads the
+# student name, the "no submission" indicator and (when same-origin) walks into the
+# submission iframe. If the iframe is cross-origin it reports `iframe_accessible: false`
+# and the caller re-runs the script inside that frame with readPageState=false.
+EXTRACT_SUBMISSION_SCRIPT = """
+(cfg) => {
+    const isVisible = (el) => {
+        if (!el || !el.isConnected) return false;
+        const view = el.ownerDocument.defaultView;
+        const style = view ? view.getComputedStyle(el) : null;
+        if (style && (style.visibility === 'hidden' || style.display === 'none')) return false;
+        const rect = el.getBoundingClientRect();
+        return rect.width > 0 && rect.height > 0;
+    };
+    const result = {
+        raw_name: null,
+        no_submission: false,
+        iframe_present: false,
+        iframe_accessible: false,
+        iframe_ready: false,
+        scope: 'main',
+        search_root: 'scope',
+        entry_count: 0,
+        entries: [],
+    };
+
+    let scopeDoc = document;
+    if (cfg.readPageState) {
+        for (const sel of cfg.nameSelectors) {
+            const el = document.querySelector(sel);
+            if (el && isVisible(el) && el.textContent) { result.raw_name = el.textContent; break; }
+        }
+        if (isVisible(document.querySelector(cfg.noSubmissionSelector))) {
+            result.no_submission = true;
+            return result;
+        }
+        const holder = document.querySelector(cfg.iframeHolderSelector);
+        const iframe = document.querySelector(cfg.iframeSelector);
+        if (holder && isVisible(holder) && iframe && isVisible(iframe)) {
+            result.iframe_present = true;
+            let frameDoc = null;
+            try { frameDoc = iframe.contentDocument; } catch (e) { frameDoc = null; }
+            if (!frameDoc) return result;
+            result.iframe_accessible = true;
+            if (!frameDoc.body || !isVisible(frameDoc.body)) return result;
+            result.iframe_ready = true;
+            result.scope = 'iframe';
+            scopeDoc = frameDoc;
+        }
+    }
+
+    let root = scopeDoc;
+    const main = scopeDoc.querySelector(cfg.mainContentSelector);
+    if (main && isVisible(main)) {
+        const desc = main.querySelector(cfg.submissionDescriptionSelector);
+        if (desc && isVisible(desc)) { root = desc; result.search_root = cfg.submissionDescriptionSelector; }
+        else { root = main; result.search_root = cfg.mainContentSelector; }
+    }
+
+    let entryEls = root.querySelectorAll(cfg.entrySelector);
+    if (!entryEls.length) entryEls = root.querySelectorAll(cfg.entrySelectorFallback);
+    result.entry_count = entryEls.length;
+
+    for (const entryEl of entryEls) {
+        let postDate = null;
+        for (const [sel, attrs] of cfg.dateSelectors) {
+            const el = entryEl.querySelector(sel);
+            if (!el) continue;
+            for (const attr of attrs) {
+                const val = attr === 'text' ? el.textContent : el.getAttribute(attr);
+                if (val && val.trim()) { postDate = val.trim(); break; }
+            }
+            if (postDate) break;
+        }
+        let content = null;
+        for (const sel of cfg.contentSelectors) {
+            const el = entryEl.querySelector(sel);
+            if (!el) continue;
+            const text = el.textContent;
+            if (text && text.trim()) { content = text.trim(); break; }
+        }
+        result.entries.push({ post_date: postDate, content: content });
+    }
+    return result;
+}
+"""
+
+
+# Reads the student roster once: the SpeedGrader student dropdown first, then any
+# `student_id=` links on the page. Returns [{student_id, student_name}] in page order.
+READ_ROSTER_SCRIPT = """
+(cfg) => {
+    const roster = [];
+    const seen = new Set();
+    const add = (id, name) => {
+        if (!id || seen.has(id)) return;
+        seen.add(id);
+        roster.push({ student_id: id, student_name: (name || '').trim() });
+    };
+    const idFromHref = (href) => {
+        const match = /student_id=(\\d+)/.exec(href || '');
+        return match ? match[1] : null;
+    };
+    for (const el of document.querySelectorAll(cfg.rosterOptionSelector)) {
+        const raw = el.getAttribute('data-student-id') || el.value || '';
+        add(/^\\d+$/.test(raw) ? raw : idFromHref(raw), el.textContent);
+    }
+    if (!roster.length) {
+        for (const el of document.querySelectorAll(cfg.studentLinkSelector)) {
+            add(idFromHref(el.getAttribute('href') || el.value), el.textContent);
+        }
+    }
+    return roster;
+}
+"""
+
+
+# Cheap snapshot of what changes when SpeedGrader switches student; used as the "previous" state
+# by the readiness waits after clicking Next Student.
+NAVIGATION_SNAPSHOT_SCRIPT = """
+(cfg) => {
+    let label = null;
+    for (const sel of cfg.nameSelectors) {
+        const el = document.querySelector(sel);
+        if (el && el.textContent && el.textContent.trim()) { label = el.textContent.trim(); break; }
+    }
+    const iframe = document.querySelector(cfg.iframeSelector);
+    return { url: location.href, label: label, iframe_src: iframe ? iframe.getAttribute('src') : null };
+}
+"""
+
+STUDENT_URL_READY_PREDICATE = """
+(a) => {
+    const match = /student_id=(\\d+)/.exec(location.href);
+    if (!match) return false;
+    return a.expectedStudentId ? match[1] === a.expectedStudentId : location.href !== a.previousUrl;
+}
+"""
+
+STUDENT_LABEL_READY_PREDICATE = """
+(a) => {
+    for (const sel of a.nameSelectors) {
+        const el = document.querySelector(sel);
+        if (el && el.textContent && el.textContent.trim()) return el.textContent.trim() !== a.previousLabel;
+    }
+    return false;
+}
+"""
+
+# Resolves once the submission iframe points at a new document, or when there is no iframe to wait for
+IFRAME_SRC_READY_PREDICATE = """
+(a) => {
+    const noSubmission = document.querySelector(a.noSubmissionSelector);
+    if (noSubmission && noSubmission.getClientRects().length) return true;
+    const iframe = document.querySelector(a.iframeSelector);
+    if (!iframe) return true;
+    const src = iframe.getAttribute('src');
+    return !!src && src !== a.previousSrc;
+}
+"""
@@ -0,0 +1,223 @@
+# --- Streamlit Operations Console ---
+# Usage (from the repository root):
+#   streamlit run streamlit_app.py
+# Jobs run as `python cli.py ...` in background processes; this page only tails their event logs
+# and reads finished outputs through cached loaders, so it stays responsive during a long crawl.
+import glob
+import json
+import os
+import re
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+import pandas as pd
+import streamlit as st
+
+from job_runner import EventLogTail, RunProgress, list_jobs, start_job, stop_job
+from report_io import compiled_report_path, iter_compact_records
+from utils import ANALYZED_CSV_NAME, ANALYZED_PARQUET_NAME, OUTPUT_FOLDER_NAME, PERF_REPORT_NAME
+
+REFRESH_SECONDS = 2
+CONSOLE_TAIL_BYTES = 4000
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;]*m") # The CLI prints colored lines
+
+st.set_page_config(page_title="AITA Operations Console", layout="wide")
+
+
+# --- Cached, Invalidation-Aware Loaders ---
+# Each loader takes the file's (mtime, size) signature as an argument, so st.cache_data serves
+# reruns from memory and reloads only after the file has actually been rewritten.
+def file_signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def load_report_summary(path: str, signature: Tuple[int, int]) -> pd.DataFrame:
+    """One row per student from the compiled report (never the per-student JSON files)."""
+    return pd.DataFrame([
+        {
+            "student_id": record.student_id,
+            "student_name": record.student_name,
+            "entries": len(record.entries),
+            "without_content": sum(entry.content is None for entry in record.entries),
+            "error": record.error,
+        }
+        for record in iter_compact_records(path)
+    ])
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def load_entry_table(path: str, signature: Tuple[int, int]) -> pd.DataFrame:
+    return pd.read_parquet(path)
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def load_analyzed_csv(path: str, signature: Tuple[int, int]) -> pd.DataFrame:
+    return pd.read_csv(path)
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def load_perf_report(path: str, signature: Tuple[int, int]) -> dict:
+    with open(path, "r", encoding="utf-8") as f_perf:
+        return json.load(f_perf)
+
+
+def cached_load(loader, path: str):
+    """`loader(path)` through the cache, or None if the file is missing or unreadable (e.g. still being written)."""
+    signature = file_signature(path)
+    if signature is None:
+        return None
+    try:
+        return loader(path, signature)
+    except Exception as e_load:
+        st.caption(f"Could not read {path} yet: {e_load}")
+        return None
+
+
+# --- Job Launcher ---
+def render_launcher() -> None:
+    st.sidebar.header("Start a job")
+    command = st.sidebar.selectbox("Command", ["scrape", "fetch", "batch", "analyze", "reparse"])
+    cli_args = [command]
+    if command in ("fetch", "batch"):
+        jobs = st.sidebar.text_area("Assignments (COURSE_ID:ASSIGNMENT_ID, one per line)", help="Empty: the AITA_SPEEDGRADER_URL assignment (fetch only)")
+        cli_args += [line.strip() for line in jobs.splitlines() if line.strip()]
+    if command == "fetch" and st.sidebar.checkbox("Analyze afterwards"):
+        cli_args.append("--analyze")
+    if command == "analyze":
+        backends = st.sidebar.text_input("LLM backends", help="Default: AITA_LLM_BACKENDS")
+        if backends:
+            cli_args += ["--backends", backends]
+    if command == "reparse" and st.sidebar.checkbox("Dry run"):
+        cli_args.append("--dry-run")
+    if st.sidebar.button("Start", type="primary", disabled=command == "batch" and len(cli_args) == 1):
+        job = start_job(cli_args)
+        st.session_state["selected_job"] = job["job_id"]
+        st.sidebar.success(f"Started job {job['job_id']} (pid {job['pid']}).")
+
+
+# --- Live Progress ---
+def job_progress(job: dict) -> RunProgress:
+    """The job's RunProgress, advanced by the records appended to its event log since the last rerun."""
+    tails = st.session_state.setdefault("event_tails", {})
+    if job["job_id"] not in tails:
+        tails[job["job_id"]] = (EventLogTail(job["events_path"]), RunProgress())
+    tail, progress = tails[job["job_id"]]
+    progress.apply(tail.read_new())
+    return progress
+
+
+def render_progress(job: dict, progress: RunProgress) -> None:
+    done, total = progress.students_saved, progress.total_students
+    st.progress(min(1.0, done / total) if total else 0.0, text=f"{done}/{total or '?'} students saved ({progress.phase or 'starting'})")
+    columns = st.columns(5)
+    columns[0].metric("Students/min (last minute)", progress.students_per_minute(recent=True))
+    columns[1].metric("Students/min (run)", progress.students_per_minute())
+    columns[2].metric("Entries", progress.entries)
+    columns[3].metric("Failed students", progress.students_failed)
+    analysis = progress.analysis
+    columns[4].metric("Entries analyzed", f"{analysis['successful'] or 0}/{analysis['eligible'] or analysis['attempted'] or 0}")
+    if progress.students_skipped:
+        st.caption(f"{progress.students_skipped} students loaded from the checkpoint without crawling.")
+    if progress.last_ts:
+        idle = (datetime.now(timezone.utc) - progress.last_ts).total_seconds()
+        st.caption(f"Last event {idle:.0f}s ago.")
+
+    if progress.rate_limits:
+        now = datetime.now(timezone.utc)
+        st.subheader("Rate limits")
+        st.dataframe(pd.DataFrame([
+            {
+                "model": model,
+                "times limited": state["count"],
+                "requests/min now": state["requests_per_minute"],
+                "paused for": max(0.0, round(state["retry_after_s"] - (now - datetime.fromisoformat(state["ts"])).total_seconds(), 1)),
+            }
+            for model, state in progress.rate_limits.items()
+        ]), hide_index=True)
+    if progress.messages:
+        with st.expander(f"Warnings and errors ({len(progress.messages)} most recent)"):
+            for record in reversed(progress.messages):
+                st.text(f"{record['ts'][11:19]} [{record['level']}] {record.get('message', '')}")
+    with st.expander("Console output"):
+        try:
+            with open(job["console_path"], "rb") as f_console:
+                f_console.seek(max(0, os.path.getsize(job["console_path"]) - CONSOLE_TAIL_BYTES))
+                st.code(ANSI_ESCAPE.sub("", f_console.read().decode("utf-8", errors="replace")))
+        except OSError:
+            st.caption("No console output yet.")
+
+
+@st.fragment(run_every=REFRESH_SECONDS)
+def live_job_panel() -> None:
+    """Reruns on its own every REFRESH_SECONDS, leaving the rest of the page (and its loaders) alone."""
+    jobs = list_jobs()
+    if not jobs:
+        st.info("No jobs yet. Start one from the sidebar.")
+        return
+    job_ids = [job["job_id"] for job in jobs]
+    selected = st.session_state.get("selected_job")
+    index = job_ids.index(selected) if selected in job_ids else 0
+    job = jobs[st.selectbox("Job", range(len(jobs)), index=index, format_func=lambda i: f"{job_ids[i]}  cli.py {' '.join(jobs[i]['args'])}  [{jobs[i]['status']}]")]
+    st.session_state["selected_job"] = job["job_id"]
+    if job["status"] == "running" and st.button("Stop job"):
+        stop_job(job)
+    render_progress(job, job_progress(job))
+
+
+# --- Results ---
+def render_results() -> None:
+    st.header("Results")
+    output_dirs = [OUTPUT_FOLDER_NAME] + sorted(glob.glob(os.path.join(OUTPUT_FOLDER_NAME, "course_*_assignment_*")))
+    output_dir = st.selectbox("Output folder", output_dirs)
+    st.button("Refresh results") # Any rerun reloads exactly the files whose signature changed
+
+    students = cached_load(load_report_summary, compiled_report_path(output_dir))
+    if students is None:
+        st.info(f"No compiled report in {output_dir} yet.")
+        return
+    columns = st.columns(3)
+    columns[0].metric("Students", len(students))
+    columns[1].metric("With entries", int((students["entries"] > 0).sum()) if len(students) else 0)
+    columns[2].metric("Entries", int(students["entries"].sum()) if len(students) else 0)
+
+    # The Parquet footer is written at the end of analysis; during a run fall back to the CSV appended per chunk
+    entries = cached_load(load_entry_table, os.path.join(output_dir, ANALYZED_PARQUET_NAME))
+    if entries is not None:
+        label_counts = entries["label"].astype("string").fillna("unlabeled").value_counts()
+        st.subheader("Labels")
+        st.bar_chart(label_counts)
+        labels = st.multiselect("Show labels", sorted(label_counts.index))
+        shown = entries[entries["label"].astype("string").isin(labels)] if labels else entries
+        st.dataframe(shown[["student_name", "entry_index", "post_date", "label", "content"]], hide_index=True)
+    else:
+        analyzed = cached_load(load_analyzed_csv, os.path.join(output_dir, ANALYZED_CSV_NAME))
+        if analyzed is not None:
+            from local_classifier import extract_label
+            labels = Counter(
+                extract_label(str(value)) or "unlabeled"
+                for column in analyzed.columns if column.endswith("_summary")
+                for value in analyzed[column].dropna()
+            )
+            st.subheader("Labels (analysis in progress)")
+            st.bar_chart(pd.Series(labels))
+            st.dataframe(analyzed, hide_index=True)
+    with st.expander("Students"):
+        st.dataframe(students, hide_index=True)
+
+    perf = cached_load(load_perf_report, os.path.join(OUTPUT_FOLDER_NAME, PERF_REPORT_NAME))
+    if perf:
+        with st.expander("Performance of the last run"):
+            st.write(f"{perf['wall_s']}s wall, {perf['total_sleep_s']}s sleeping on rate limits, {perf['llm_calls']} LLM calls ({perf['llm_calls_per_second']}/s).")
+            st.dataframe(pd.DataFrame(perf["phases"]).T)
+
+
+st.title("AITA Operations Console")
+render_launcher()
+live_job_panel()
+render_results()
@@ -1,204 +1,447 @@
+import asyncio
 import json
 import os
 import traceback
-import time # Import for time.sleep()
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
 
-from langchain_google_genai import ChatGoogleGenerativeAI
-import pandas as pd
-from langchain_core.messages import HumanMessage
 import google.api_core.exceptions # For specific exception handling
 
 # Assuming these are your custom imports
-from logger import log_info, log_success, log_warning, log_error, log_debug, log_step
-from models import StudentSubmissionData # Assuming DiscussionEntry is part of models or handled by StudentSubmissionData
-from prompts import ANALIZE_TEXT # Assuming this is your prompt string
-from utils import OUTPUT_FOLDER_NAME
+from dedupe import NearDuplicateIndex, create_dedupe_index
+from entry_table import EntryParquetWriter
+from llm_cache import ClassificationCache, open_classification_cache
+from local_classifier import LocalClassifier, extract_label, train_local_classifier
+from logger import log_info, log_success, log_warning, log_error, log_debug, log_event, log_step
+from models import BatchClassification, StudentSubmissionData # Assuming DiscussionEntry is part of models or handled by StudentSubmissionData
+from perf import LLM_CALL_SPAN, span
+from prompts import ANALIZE_BATCH_TEXT, ANALIZE_TEXT # Assuming this is your prompt string
+from llm_router import LLMRouter, create_llm_router
+from rate_limiter import get_rate_limiter, retry_delay_seconds
+from report_io import compiled_report_path, iter_student_records
+from serialization import student_from_record
+from utils import (
+    ANALYSIS_BATCH_SIZE, ANALYZED_CSV_NAME, ANALYZED_PARQUET_NAME, ANALYZER_CONCURRENCY, LOCAL_CLASSIFIER_THRESHOLD,
+    ANALYZER_MODEL_NAME, LLM_BACKENDS, OUTPUT_FOLDER_NAME, PARQUET_OUTPUT, SPEEDGRADER_URL,
+)
+
+if TYPE_CHECKING:
+    from langchain_core.output_parsers import PydanticOutputParser
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+CSV_CHUNK_SIZE = 50 # Students per CSV append
+MAX_RATE_LIMIT_RETRIES = 3
+SUMMARY_OUTPUT_TOKENS_ESTIMATE = 256
+BATCH_OUTPUT_TOKENS_PER_ENTRY = 24
+
+
+@lru_cache(maxsize=None)
+def _batch_parser() -> "PydanticOutputParser":
+    # Deferred like HumanMessage in _ainvoke_limited: langchain_core takes most of a second to import
+    from langchain_core.output_parsers import PydanticOutputParser
+    return PydanticOutputParser(pydantic_object=BatchClassification)
+
+
+def llm_cache_model_names(llm) -> List[str]:
+    """Models whose cached results `llm` may reuse: every backend of a router, else the model itself."""
+    if isinstance(llm, LLMRouter):
+        return llm.model_names
+    return [getattr(llm, 'model', getattr(llm, 'model_name', 'Unknown Model'))]
 
 
 class SubmissionAnalyzer:
-    def __init__(self, llm_instance: ChatGoogleGenerativeAI, max_entries: int = 4):
+    def __init__(
+        self,
+        llm_instance: "ChatGoogleGenerativeAI",
+        max_entries: int = 4,
+        concurrency: int = ANALYZER_CONCURRENCY,
+        batch_size: int = ANALYSIS_BATCH_SIZE,
+        cache: Optional[ClassificationCache] = None,
+        local_classifier: Optional[LocalClassifier] = None,
+        local_threshold: float = LOCAL_CLASSIFIER_THRESHOLD,
+        dedupe_index: Optional[NearDuplicateIndex] = None,
+    ):
         self.llm = llm_instance
         self.max_entries = max_entries
         # Safely get model name, LangChain objects might have different attribute names
         model_name = getattr(self.llm, 'model', getattr(self.llm, 'model_name', 'Unknown Model'))
-        log_info(f"SubmissionAnalyzer initialized with LLM: {model_name} and max_entries: {self.max_entries}")
+        self.batch_size = batch_size
+        self.model_name = model_name
+        self.cache_model_names = llm_cache_model_names(self.llm)
+        self.cache = cache
+        self.local_classifier = local_classifier
+        self.local_threshold = local_threshold
+        self.local_labeled_count = 0
+        self.dedupe_index = dedupe_index
+        self._group_labels: Dict[str, str] = {} # Representative text -> label, across chunks
+        self.dedupe_saved_count = 0
+        # A router paces and fails over between its backends' own limiters
+        self.rate_limiter = None if isinstance(self.llm, LLMRouter) else get_rate_limiter(model_name)
+        if isinstance(self.llm, LLMRouter):
+            concurrency = max(concurrency, sum(backend.concurrency for backend in self.llm.backends))
+        log_info(f"SubmissionAnalyzer initialized with LLM: {model_name}, max_entries: {self.max_entries}, concurrency: {concurrency}, batch_size: {batch_size}")
+        self._llm_slots = asyncio.Semaphore(concurrency) # Bounds in-flight LLM calls across all students
+        self.total_summaries_eligible = 0 # 0 means unknown (e.g. pipelined runs)
+        self.summaries_attempted_count = 0
+        self.summaries_successful_count = 0
 
-    def _get_summary(self, content: str) -> str:
+    async def _ainvoke_limited(self, prompt: str, expected_output_tokens: int = SUMMARY_OUTPUT_TOKENS_ESTIMATE) -> Tuple[str, str]:
+        """
+        One LLM call through the concurrency slots and rate limiter; retries ResourceExhausted, re-raising
+        the last one. Returns (reply, name of the model that answered), the latter keying the cache.
+        """
+        from langchain_core.messages import HumanMessage
+        estimated_tokens = len(prompt) // 4 + expected_output_tokens # ~4 characters per token
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            try:
+                async with self._llm_slots:
+                    if self.rate_limiter:
+                        await self.rate_limiter.acquire(estimated_tokens)
+                        with span(LLM_CALL_SPAN):
+                            response = await self.llm.ainvoke([HumanMessage(content=prompt)])
+                        answered_by = self.model_name
+                    else: # The router times each backend call itself, excluding its rate-limit waits
+                        response, backend = await self.llm.ainvoke_with_backend([HumanMessage(content=prompt)])
+                        answered_by = backend.model_name
+                if self.rate_limiter:
+                    usage = getattr(response, 'usage_metadata', None) or {}
+                    self.rate_limiter.record_usage(estimated_tokens, usage.get('total_tokens'))
+                    self.rate_limiter.on_success()
+                return response.content.strip(), answered_by
+            except google.api_core.exceptions.ResourceExhausted as e:
+                log_error(f"RATE LIMIT HIT for model '{self.model_name}' (attempt {attempt + 1}). Details: {e}")
+                if self.rate_limiter:
+                    # Pauses every caller sharing this model, not just this one
+                    self.rate_limiter.on_rate_limited(retry_delay_seconds(e))
+                if attempt == MAX_RATE_LIMIT_RETRIES:
+                    raise
+
+    async def _get_summary(self, content: str) -> str:
         if not content or content == "Content not found":
             log_debug("No content provided or default content found, skipping summary.")
             return "No content to summarize"
+        answered_by = self.model_name # Errors are not tied to one backend
         try:
-            prompt = ANALIZE_TEXT.format(text=content)
-            log_debug(f"Attempting to summarize content (first 100 chars): {content[:100]}...")
-
-            # Use synchronous invoke
-            response = self.llm.invoke([HumanMessage(content=prompt)])
-            summary = response.content.strip()
-            log_success(f"Summary generated (first 50 chars): {summary[:50]}...")
-            return summary
-        except google.api_core.exceptions.ResourceExhausted as e:
-            model_name = getattr(self.llm, 'model', getattr(self.llm, 'model_name', 'Unknown Model'))
-            log_error(f"RATE LIMIT HIT for model '{model_name}'. Details: {e}")
-            # Extract retry delay if possible, otherwise use a default
-            retry_after = 30 # Default retry delay
-            if hasattr(e, 'retry') and e.retry and hasattr(e.retry, 'delay') and e.retry.delay:
-                retry_after = e.retry.delay.total_seconds() if hasattr(e.retry.delay, 'total_seconds') else e.retry.delay
-                log_warning(f"API suggests retry after {retry_after} seconds.")
-            else: # Try to parse from message if not directly available in exception structure
-                match = re.search(r'retry_delay {\s*seconds: (\d+)\s*}', str(e))
-                if match:
-                    retry_after = int(match.group(1))
-                    log_warning(f"Parsed retry_delay from error message: {retry_after} seconds.")
-
-            return f"Error: Rate limit hit. Suggested retry after {retry_after}s."
+            log_debug("Attempting to summarize content (first 100 chars): %.100s...", content)
+            reply, answered_by = await self._ainvoke_limited(ANALIZE_TEXT.format(text=content))
+            # Same bare label the batched path writes, so the summary columns have one format
+            summary = extract_label(reply) or f"Error: Unrecognized classification: {reply[:50]}"
+            log_success(f"Summary generated: {summary[:50]}")
+        except google.api_core.exceptions.ResourceExhausted:
+            summary = f"Error: Rate limit hit {MAX_RATE_LIMIT_RETRIES + 1} times."
         except Exception as e:
             log_error(f"Error generating summary: {e}")
             # traceback.print_exc() # Optionally keep for full debugging
-            return "Error: Failed to generate summary"
+            summary = "Error: Failed to generate summary"
+        if self.cache:
+            self.cache.put(answered_by, ANALIZE_TEXT, content, summary, is_error=summary.startswith("Error:"))
+        return summary
+
+    def _cached_label(self, content: str) -> Optional[str]:
+        """A label from an earlier run, from either prompt (both yield a label for the same content)."""
+        if not self.cache:
+            return None
+        cached = self.cache.get(self.cache_model_names, (ANALIZE_BATCH_TEXT, ANALIZE_TEXT), content)
+        return extract_label(cached) or cached # Older runs cached the raw single-entry reply
 
-    def process_json_report(self, json_file_path: str, output_csv_path: str):
-        log_info(f"Starting processing of JSON report: {json_file_path}")
+    async def _classify_batch(self, items: List[Tuple[str, str]]) -> Dict[str, str]:
+        """
+        Labels many (entry_id, content) pairs with one request. Returns the labels the model gave
+        for known IDs; anything missing (or a failed call) is left for the caller to retry singly.
+        """
+        entries_text = "\n\n".join(f"[{entry_id}]\n{content}" for entry_id, content in items)
+        prompt = ANALIZE_BATCH_TEXT.format(entries=entries_text, format_instructions=_batch_parser().get_format_instructions())
         try:
-            with open(json_file_path, 'r', encoding='utf-8') as f:
-                all_students_data_raw = json.load(f)
-            log_success(f"Successfully loaded data for {len(all_students_data_raw)} students from {json_file_path}")
+            log_debug("Classifying batch of %d entries in one request...", len(items))
+            response_text, answered_by = await self._ainvoke_limited(prompt, expected_output_tokens=BATCH_OUTPUT_TOKENS_PER_ENTRY * len(items))
+            parsed: BatchClassification = _batch_parser().parse(response_text)
+        except Exception as e:
+            log_warning(f"Batch classification of {len(items)} entries failed; retrying them individually. Details: {e}")
+            return {}
+        contents = dict(items)
+        labels = {c.entry_id: c.label for c in parsed.classifications if c.entry_id in contents}
+        if self.cache:
+            for entry_id, label in labels.items():
+                self.cache.put(answered_by, ANALIZE_BATCH_TEXT, contents[entry_id], label)
+        log_success(f"Batch classified {len(labels)}/{len(items)} entries.")
+        return labels
+
+    def _build_row(self, student_data: StudentSubmissionData) -> Tuple[dict, List[Tuple[str, str]]]:
+        """The CSV row of one student, plus (summary column, content) pairs still needing a label."""
+        log_debug("Student %s has %d entries (according to Pydantic).", student_data.student_id, len(student_data.entries))
+        if not student_data.entries:
+            log_debug("  No entries found for student %s in the parsed data.", student_data.student_id)
+
+        row = {
+            "student_id": student_data.student_id,
+            "student_name": student_data.student_name,
+        }
+        # Initialize all possible entry columns to None
+        for entry_col_num in range(1, self.max_entries + 1):
+            row[f"entry_{entry_col_num}_date"] = None
+            row[f"entry_{entry_col_num}_content"] = None
+            row[f"entry_{entry_col_num}_summary"] = None
+
+        if len(student_data.entries) > self.max_entries:
+            log_warning(f"Student {student_data.student_id} has more than {self.max_entries} entries. Only processing first {self.max_entries}.")
+
+        pending = []
+        for j, entry in enumerate(student_data.entries[:self.max_entries]):
+            entry_csv_col_idx = j + 1
+            log_debug("  Student %s, Parsed Entry %d/%d: post_date='%s', content_preview='%.50s...'",
+                      student_data.student_id, entry_csv_col_idx, len(student_data.entries), entry.post_date, entry.content or '')
+
+            row[f"entry_{entry_csv_col_idx}_date"] = entry.post_date
+            row[f"entry_{entry_csv_col_idx}_content"] = entry.content
+
+            if entry.content and entry.content != "Content not found":
+                self.summaries_attempted_count += 1
+                log_info(f"  Queued summary {self.summaries_attempted_count}/{self.total_summaries_eligible or '?'} for student {student_data.student_id}, entry {entry_csv_col_idx}...")
+                pending.append((f"entry_{entry_csv_col_idx}_summary", entry.content))
+            else:
+                log_warning(f"  Student {student_data.student_id}, Entry {entry_csv_col_idx}: Content NOT valid for summarization. "
+                            f"Content: '{entry.content}'")
+                row[f"entry_{entry_csv_col_idx}_summary"] = "Content unsuitable for summary"
+        return row, pending
+
+    async def analyze_students(self, students: List[StudentSubmissionData]) -> List[dict]:
+        """
+        CSV rows for `students`. Identical and near-duplicate texts are grouped so each group is
+        classified once. With batching on, the group texts are packed into requests of `batch_size`
+        entries keyed by per-call IDs ("e0", "e1", ...; student IDs are not unique in every report);
+        entries the model drops are retried with the single-entry prompt.
+        """
+        rows = []
+        groups: Dict[str, List[Tuple[dict, str]]] = {} # text to classify -> [(row, summary column)]
+        group_ids: Dict[str, str] = {} # text to classify -> its group's ID in this call
+        for student_data in students:
+            row, student_pending = self._build_row(student_data)
+            rows.append(row)
+            for summary_key, content in student_pending:
+                text = self.dedupe_index.representative(content) if self.dedupe_index else content
+                if text not in groups:
+                    groups[text] = []
+                    group_ids[text] = f"e{len(group_ids)}"
+                groups[text].append((row, summary_key))
+        self.dedupe_saved_count += sum(len(members) - 1 for members in groups.values())
+        pending = {group_ids[text]: text for text in groups} # entry_id -> content
+
+        labels: Dict[str, str] = {}
+        for entry_id, content in pending.items():
+            cached = self._group_labels.get(content) or self._cached_label(content)
+            if cached is not None:
+                labels[entry_id] = cached
+        if labels:
+            log_info(f"Reused {len(labels)}/{len(pending)} earlier classifications.")
+
+        uncached = [(entry_id, content) for entry_id, content in pending.items() if entry_id not in labels]
+        if self.local_classifier and uncached:
+            # One vectorized pass; only entries the local model is unsure about are sent to the LLM
+            with span("local_classifier.predict"):
+                predictions = self.local_classifier.predict([content for _, content in uncached])
+            confident = {
+                entry_id: label for (entry_id, _), (label, confidence) in zip(uncached, predictions)
+                if confidence >= self.local_threshold
+            }
+            labels.update(confident)
+            self.local_labeled_count += len(confident)
+            uncached = [(entry_id, content) for entry_id, content in uncached if entry_id not in confident]
+            log_info(f"Local classifier labeled {len(confident)} entries; {len(uncached)} below {self.local_threshold:.2f} confidence go to the LLM.")
+
+        if self.batch_size > 1 and len(uncached) > 1:
+            items = uncached
+            batches = [items[i:i + self.batch_size] for i in range(0, len(items), self.batch_size)]
+            for batch_labels in await asyncio.gather(*(self._classify_batch(batch) for batch in batches)):
+                labels.update(batch_labels)
+
+        retry_ids = [entry_id for entry_id in pending if entry_id not in labels]
+        if self.batch_size > 1 and len(uncached) > 1 and retry_ids:
+            log_warning(f"{len(retry_ids)} entries missing from batch responses; classifying them individually.")
+        for entry_id, summary in zip(retry_ids, await asyncio.gather(*(self._get_summary(pending[entry_id]) for entry_id in retry_ids))):
+            labels[entry_id] = summary
+
+        for text, members in groups.items():
+            label = labels[group_ids[text]]
+            succeeded = bool(label) and not label.startswith("Error:")
+            if succeeded and self.dedupe_index:
+                self._group_labels[text] = label # Later chunks reuse it for their members of this group
+            for row, summary_key in members:
+                row[summary_key] = label
+                if succeeded:
+                    self.summaries_successful_count += 1
+        log_event(
+            "analysis_progress", students=len(students), attempted=self.summaries_attempted_count,
+            successful=self.summaries_successful_count, eligible=self.total_summaries_eligible or None,
+        )
+        return rows
+
+    async def analyze_student(self, student_data: StudentSubmissionData) -> dict:
+        """Summarizes up to `max_entries` entries of one student and returns its CSV row."""
+        return (await self.analyze_students([student_data]))[0]
+
+    def close(self) -> None:
+        if self.dedupe_index:
+            self.dedupe_index.log_summary()
+        if self.dedupe_saved_count:
+            log_info(f"Grouping identical and near-duplicate entries saved {self.dedupe_saved_count} classifications.")
+        if self.local_classifier:
+            log_info(f"Local classifier labeled {self.local_labeled_count} entries without an LLM call.")
+        if isinstance(self.llm, LLMRouter):
+            self.llm.log_summary()
+        if self.cache:
+            self.cache.log_summary()
+            self.cache.close()
+
+    def _count_eligible(self, student_data_dict: dict) -> int:
+        return sum(
+            1 for entry in student_data_dict.get("entries", [])[:self.max_entries]
+            if entry.get("content") and entry.get("content") != "Content not found"
+        )
+
+    def _csv_columns(self) -> list:
+        columns = ["student_id", "student_name"]
+        for k_idx in range(1, self.max_entries + 1):
+            columns.extend([f"entry_{k_idx}_date", f"entry_{k_idx}_content", f"entry_{k_idx}_summary"])
+        return columns
+
+    def write_csv_chunk(self, rows: list, output_csv_path: str, write_header: bool) -> None:
+        import pandas as pd # Deferred so analyzer startup does not pay for pandas until the first chunk is written
+        df = pd.DataFrame(rows, columns=self._csv_columns()) # Missing columns are filled with NaN
+        df.to_csv(output_csv_path, mode="w" if write_header else "a", header=write_header, index=False, encoding='utf-8')
+
+    async def process_json_report(
+        self,
+        json_file_path: str,
+        output_csv_path: str,
+        chunk_size: int = CSV_CHUNK_SIZE,
+        entry_writer: Optional[EntryParquetWriter] = None,
+    ):
+        """
+        Streams the compiled report (JSONL, or a legacy JSON array) and analyzes `chunk_size` students
+        at a time concurrently (bounded by the LLM slots and rate limiter), appending each chunk to the
+        CSV (and the long-format `entry_writer`, if any) so memory stays flat and output fills in mid-run.
+        """
+        log_info(f"Starting processing of report: {json_file_path}")
+        total_students = 0
+        total_summaries_eligible = 0
+        try:
+            # Cheap streaming pre-pass so progress logging knows the total
+            for student_data_dict in iter_student_records(json_file_path):
+                total_students += 1
+                total_summaries_eligible += self._count_eligible(student_data_dict)
+            log_success(f"Found data for {total_students} students in {json_file_path}")
         except FileNotFoundError:
-            log_error(f"JSON report file not found: {json_file_path}")
+            log_error(f"Report file not found: {json_file_path}")
             return
-        except json.JSONDecodeError as e:
-            log_error(f"Error decoding JSON from file {json_file_path}: {e}")
+        except (json.JSONDecodeError, ValueError) as e:
+            log_error(f"Error decoding report {json_file_path}: {e}")
             return
         except Exception as e:
-            log_error(f"An unexpected error occurred loading JSON file {json_file_path}: {e}")
-            return
-
-        if not isinstance(all_students_data_raw, list):
-            log_error("JSON data is not a list as expected.")
+            log_error(f"An unexpected error occurred loading report {json_file_path}: {e}")
             return
 
-        # Determine delay based on common free tier limits (conservative)
-        llm_model_name = getattr(self.llm, 'model', getattr(self.llm, 'model_name', '')).lower()
-        # Default to 30 RPM (2.1 sec/request)
-        # Use 60 RPM (1.1 sec/request) if gemini model detected (and not gemma)
-        # Gemma models on free tier via Gemini API might be 15-30 RPM
-        delay_seconds = 2.1
-        if 'gemini' in llm_model_name and 'gemma' not in llm_model_name:
-            delay_seconds = 1.1
-        elif 'gemma' in llm_model_name: # Potentially more restrictive
-            delay_seconds = 4.1 # ~15 RPM
-        log_info(f"Using base summarization delay of {delay_seconds:.1f} seconds between API calls (model: {llm_model_name}).")
-
-        processed_rows = []
-        total_summaries_eligible = 0
-        summaries_attempted_count = 0
-        summaries_successful_count = 0
-
-        for student_data_dict in all_students_data_raw:
-            total_summaries_eligible += sum(
-                1 for entry in student_data_dict.get("entries", [])[:self.max_entries]
-                if entry.get("content") and entry.get("content") != "Content not found"
-            )
+        pending_students = []
+        rows_written = 0
+        self.total_summaries_eligible = total_summaries_eligible
+        self.summaries_attempted_count = 0
+        self.summaries_successful_count = 0
 
         log_info(f"Found {total_summaries_eligible} entries eligible for summarization across all students.")
 
-        for i, student_data_dict in enumerate(all_students_data_raw):
-            # Parse with Pydantic for easier access and validation if needed
-            student_data = StudentSubmissionData(**student_data_dict)
+        for i, student_data_dict in enumerate(iter_student_records(json_file_path)):
+            student_data = student_from_record(student_data_dict)
             log_step(i + 1, f"Processing student: {student_data.student_name} (ID: {student_data.student_id})")
-            log_debug(f"Student {student_data.student_id} has {len(student_data.entries)} entries (according to Pydantic).")
-            if not student_data.entries:
-                log_debug(f"  No entries found for student {student_data.student_id} in the parsed data.")
+            pending_students.append(student_data)
+            if len(pending_students) >= chunk_size:
+                with span("analyze.chunk"):
+                    pending_rows = await self.analyze_students(pending_students)
+                try:
+                    self.write_csv_chunk(pending_rows, output_csv_path, write_header=rows_written == 0)
+                    if entry_writer:
+                        for student_data, row in zip(pending_students, pending_rows):
+                            entry_writer.append(student_data, row)
+                except Exception as e:
+                    log_error(f"Error writing data to CSV: {e}")
+                    traceback.print_exc()
+                    return
+                rows_written += len(pending_rows)
+                log_debug("Flushed %d/%s rows to %s.", rows_written, total_students, output_csv_path)
+                pending_students = []
 
-            row = {
-                "student_id": student_data.student_id,
-                "student_name": student_data.student_name,
-            }
-            # Initialize all possible entry columns to None
-            for entry_col_num in range(1, self.max_entries + 1):
-                row[f"entry_{entry_col_num}_date"] = None
-                row[f"entry_{entry_col_num}_content"] = None
-                row[f"entry_{entry_col_num}_summary"] = None
-
-            for j, entry in enumerate(student_data.entries):
-                if j < self.max_entries:
-                    entry_csv_col_idx = j + 1
-                    log_debug(f"  Student {student_data.student_id}, Parsed Entry {entry_csv_col_idx}/{len(student_data.entries)}: "
-                              f"post_date='{entry.post_date}', content_preview='{(entry.content or '')[:50]}...'")
-
-                    row[f"entry_{entry_csv_col_idx}_date"] = entry.post_date
-                    row[f"entry_{entry_csv_col_idx}_content"] = entry.content
-
-                    if entry.content and entry.content != "Content not found":
-                        summaries_attempted_count += 1
-                        log_info(f"  Attempting summary {summaries_attempted_count}/{total_summaries_eligible} for student {student_data.student_id}, entry {entry_csv_col_idx}...")
-                        summary = self._get_summary(entry.content)
-                        row[f"entry_{entry_csv_col_idx}_summary"] = summary
-
-                        if summary and not summary.startswith("Error:"):
-                            summaries_successful_count +=1
-                        
-                        # Handle rate limit sleeps
-                        current_sleep = delay_seconds
-                        if "Rate limit hit" in summary:
-                            # Try to parse suggested retry_after from the summary string itself
-                            match = re.search(r'Suggested retry after (\d+\.?\d*)s', summary)
-                            if match:
-                                current_sleep = float(match.group(1)) + 0.5 # Add a small buffer
-                                log_warning(f"Rate limit hit. Will sleep for parsed {current_sleep:.1f} seconds.")
-                            else:
-                                current_sleep = 30 # Default longer sleep if parsing fails
-                                log_warning(f"Rate limit hit. Will sleep for default {current_sleep} seconds.")
-                        
-                        if summaries_attempted_count < total_summaries_eligible: # Don't sleep after the very last summary attempt
-                            log_debug(f"  Sleeping for {current_sleep:.1f} seconds before next API call...")
-                            time.sleep(current_sleep)
-                    else:
-                        log_warning(f"  Student {student_data.student_id}, Entry {entry_csv_col_idx}: Content NOT valid for summarization. "
-                                    f"Content: '{entry.content}'")
-                        row[f"entry_{entry_csv_col_idx}_summary"] = "Content unsuitable for summary"
-                else: # Should not be strictly necessary if slice [:self.max_entries] is used above, but good for clarity
-                    log_warning(f"Student {student_data.student_id} has more than {self.max_entries} entries. Only processing first {self.max_entries}.")
-                    break
-            processed_rows.append(row)
-
-        log_success(f"Finished all summary attempts. Total eligible: {total_summaries_eligible}, Attempted: {summaries_attempted_count}, Successful: {summaries_successful_count}.")
-
-        if not processed_rows:
+        with span("analyze.chunk"):
+            pending_rows = await self.analyze_students(pending_students)
+
+        log_success(f"Finished all summary attempts. Total eligible: {total_summaries_eligible}, Attempted: {self.summaries_attempted_count}, Successful: {self.summaries_successful_count}.")
+
+        if not pending_rows and not rows_written:
             log_warning("No data processed to write to CSV.")
             return
 
         try:
-            df = pd.DataFrame(processed_rows)
-            columns = ["student_id", "student_name"]
-            for k_idx in range(1, self.max_entries + 1):
-                columns.extend([f"entry_{k_idx}_date", f"entry_{k_idx}_content", f"entry_{k_idx}_summary"])
-
-            for col in columns:
-                if col not in df.columns:
-                    df[col] = None  # Or use "N/A" if you prefer
-
-            df = df[columns]
-            df.to_csv(output_csv_path, index=False, encoding='utf-8')
-            log_success(f"Successfully wrote processed data to CSV: {output_csv_path}")
+            if pending_rows:
+                self.write_csv_chunk(pending_rows, output_csv_path, write_header=rows_written == 0)
+                rows_written += len(pending_rows)
+            if entry_writer:
+                for student_data, row in zip(pending_students, pending_rows):
+                    entry_writer.append(student_data, row)
+            log_success(f"Successfully wrote {rows_written} rows of processed data to CSV: {output_csv_path}")
         except Exception as e:
             log_error(f"Error writing data to CSV: {e}")
             traceback.print_exc()
 
 
-def run_submission_analysis(llm_instance: ChatGoogleGenerativeAI):
+def create_analyzer_llm(model_name: str = ANALYZER_MODEL_NAME, backends: str = LLM_BACKENDS) -> Union["ChatGoogleGenerativeAI", LLMRouter]:
     """
-    Function to run the submission analysis part synchronously.
+    The analysis chat model, imported and built only when a run actually needs it: an LLMRouter
+    when `backends` (AITA_LLM_BACKENDS) is set, otherwise `model_name` alone.
     """
-    log_info("Starting submission analysis process...")
-    analyzer = SubmissionAnalyzer(llm_instance=llm_instance, max_entries=4)
+    if backends:
+        return create_llm_router(backends)
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(model=model_name)
 
-    json_report_path = os.path.join(OUTPUT_FOLDER_NAME, "ALL_students_compiled_report.json")
-    csv_output_path = os.path.join(OUTPUT_FOLDER_NAME, "analyzed_student_submissions.csv")
 
+def create_submission_analyzer(llm_instance: "ChatGoogleGenerativeAI", max_entries: int = 4) -> SubmissionAnalyzer:
+    """
+    An analyzer wired to the configured LLM cache, near-duplicate index and, when it has enough
+    cached labels, the local classifier.
+    """
+    cache = open_classification_cache()
+    return SubmissionAnalyzer(
+        llm_instance=llm_instance,
+        max_entries=max_entries,
+        cache=cache,
+        local_classifier=train_local_classifier(cache, llm_cache_model_names(llm_instance)),
+        dedupe_index=create_dedupe_index(),
+    )
+
+
+async def run_submission_analysis(
+    llm_instance: "ChatGoogleGenerativeAI",
+    output_dir: str = OUTPUT_FOLDER_NAME,
+    speedgrader_url: str = SPEEDGRADER_URL,
+):
+    """
+    Function to run the submission analysis part over the compiled report in `output_dir`.
+    """
+    log_info("Starting submission analysis process...")
+    json_report_path = compiled_report_path(output_dir)
+    csv_output_path = os.path.join(output_dir, ANALYZED_CSV_NAME)
     if not os.path.exists(json_report_path):
-        log_error(f"Cannot perform analysis: Compiled JSON report '{json_report_path}' not found.")
+        log_error(f"Cannot perform analysis: Compiled report '{json_report_path}' not found.")
         log_warning("Please ensure the main data extraction script (main function) runs successfully first.")
         return
 
-    analyzer.process_json_report(json_file_path=json_report_path, output_csv_path=csv_output_path)
+    analyzer = None
+    entry_writer = None
+    try:
+        analyzer = create_submission_analyzer(llm_instance=llm_instance, max_entries=4)
+        # Opened only once the report is known to exist, since opening truncates the previous table
+        entry_writer = EntryParquetWriter(os.path.join(output_dir, ANALYZED_PARQUET_NAME), speedgrader_url) if PARQUET_OUTPUT else None
+        await analyzer.process_json_report(json_file_path=json_report_path, output_csv_path=csv_output_path, entry_writer=entry_writer)
+    finally:
+        if analyzer:
+            analyzer.close()
+        if entry_writer:
+            entry_writer.close()
     log_info("Submission analysis process finished.")
@@ -0,0 +1,6 @@
+# --- Test Setup ---
+# The project is a set of flat top-level modules; make them importable from tests/.
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,54 @@
+import asyncio
+import json
+from html import unescape
+
+from benchmarks.canvas_mock_server import MOCK_TOKEN, TEACHER_ID, CanvasMockServer
+from canvas_api import PER_PAGE, CanvasApiClient, _flatten_entries, _session_cookies, fetch_assignment_students
+
+
+def _fetch(server: CanvasMockServer):
+    async def run():
+        async with CanvasApiClient(server.base_url, token=MOCK_TOKEN) as client:
+            return await fetch_assignment_students(client, "1", "1"), client.requests_made
+    return asyncio.run(run())
+
+
+def test_fetch_follows_pagination_and_retries_the_cold_view():
+    with CanvasMockServer(student_count=PER_PAGE * 2 + 5) as server:
+        students, requests_made = _fetch(server)
+        assert server.view_not_ready == 0
+    assert [s.student_id for s in students] == server.student_ids
+    # Assignment, three pages of users, and the view twice (503 first)
+    assert requests_made == 6
+
+
+def test_fetch_keeps_nested_replies_and_drops_deleted_and_teacher_entries():
+    with CanvasMockServer(student_count=12) as server:
+        students, _ = _fetch(server)
+    assert TEACHER_ID not in {int(s.student_id) for s in students}
+    for student_data in students:
+        expected = server.entries[student_data.student_id]
+        assert [e.content for e in student_data.entries] == [unescape(e["content"]).strip() for e in expected]
+        assert student_data.entries or "does not have a submission" in student_data.status
+    assert any(entry["replies"] for entry in server.topic_view["view"])
+
+
+def test_flatten_entries_skips_deleted_but_keeps_their_replies():
+    view = [
+        {"id": 1, "deleted": True, "replies": [{"id": 2, "replies": [{"id": 3, "replies": []}]}]},
+        {"id": 4, "replies": []},
+    ]
+    assert [e["id"] for e in _flatten_entries(view)] == [2, 3, 4]
+
+
+def test_session_cookies_match_the_host_and_its_parent_domains_only(tmp_path):
+    state_path = tmp_path / "storage_state.json"
+    state_path.write_text(json.dumps({"cookies": [
+        {"name": "host_only", "value": "1", "domain": "canvas.example.edu"},
+        {"name": "parent", "value": "2", "domain": ".example.edu"},
+        {"name": "lookalike", "value": "3", "domain": "anvas.example.edu"},
+        {"name": "other", "value": "4", "domain": "example.com"},
+        {"name": "no_domain", "value": "5"},
+    ]}))
+    assert _session_cookies("https://canvas.example.edu", str(state_path)) == {"host_only": "1", "parent": "2"}
+    assert _session_cookies("https://canvas.example.edu", str(tmp_path / "missing.json")) == {}
@@ -0,0 +1,48 @@
+import json
+
+from checkpoint import RESUME_MODE_INCREMENTAL, RESUME_MODE_RESUME, CrawlCheckpoint
+from models import DiscussionEntry, StudentSubmissionData
+from report_io import save_student_data
+
+URL = "https://canvas.example.edu/courses/1/gradebook/speed_grader?assignment_id=1"
+
+
+def _student(student_id: str, content: str = "My post.") -> StudentSubmissionData:
+    return StudentSubmissionData(student_id=student_id, student_name=f"Student {student_id}", entries=[DiscussionEntry(content=content)])
+
+
+def _manifest_ids(checkpoint: CrawlCheckpoint):
+    with open(checkpoint.manifest_path, "r", encoding="utf-8") as f_manifest:
+        return set(json.load(f_manifest)["students"])
+
+
+def test_manifest_is_written_in_batches_and_on_close(tmp_path):
+    checkpoint = CrawlCheckpoint(URL, str(tmp_path), save_every=2)
+    for sid in ("1", "2", "3"):
+        checkpoint.record(_student(sid), save_student_data(_student(sid), str(tmp_path)))
+    assert _manifest_ids(checkpoint) == {"1", "2"}
+    checkpoint.close()
+    assert _manifest_ids(checkpoint) == {"1", "2", "3"}
+    assert set(CrawlCheckpoint(URL, str(tmp_path)).students) == {"1", "2", "3"}
+
+
+def test_resume_and_incremental_skips(tmp_path):
+    checkpoint = CrawlCheckpoint(URL, str(tmp_path), mode=RESUME_MODE_RESUME)
+    checkpoint.record(_student("1"), save_student_data(_student("1"), str(tmp_path)), submission_hint="v1")
+    failed = _student("2").model_copy(update={"error": "timeout"})
+    checkpoint.record(failed, save_student_data(failed, str(tmp_path)))
+    checkpoint.close()
+    assert checkpoint.can_skip("1") and not checkpoint.can_skip("2") and not checkpoint.can_skip("3")
+
+    incremental = CrawlCheckpoint(URL, str(tmp_path), mode=RESUME_MODE_INCREMENTAL)
+    assert incremental.can_skip("1", "v1")
+    assert not incremental.can_skip("1", "v2") and not incremental.can_skip("1")
+    assert incremental.is_unchanged(_student("1")) and not incremental.is_unchanged(_student("1", "Edited post."))
+    assert incremental.load_student("1") == _student("1")
+
+
+def test_manifest_of_another_assignment_is_ignored(tmp_path):
+    checkpoint = CrawlCheckpoint(URL, str(tmp_path))
+    checkpoint.record(_student("1"), save_student_data(_student("1"), str(tmp_path)))
+    checkpoint.close()
+    assert CrawlCheckpoint(URL.replace("assignment_id=1", "assignment_id=2"), str(tmp_path)).students == {}
@@ -0,0 +1,22 @@
+from dedupe import NearDuplicateIndex
+
+TEXT = (
+    "I think the reading made a strong case that community gardens improve neighbourhood health, "
+    "because they give people a reason to meet, share food and spend time outdoors every week."
+)
+
+
+def test_exact_and_whitespace_variants_share_a_representative():
+    index = NearDuplicateIndex()
+    assert index.representative(TEXT) == TEXT
+    assert index.representative("  " + TEXT.upper() + "  ") == TEXT
+    assert index.duplicates == 1
+
+
+def test_near_duplicate_maps_to_the_first_text_and_distinct_text_does_not():
+    index = NearDuplicateIndex(threshold=0.7)
+    index.representative(TEXT)
+    assert index.representative(TEXT.replace("every week", "every single week")) == TEXT
+    other = "Quarterly revenue fell because shipping costs rose sharply after the port strike in March."
+    assert index.representative(other) == other
+    assert (index.lookups, index.duplicates) == (3, 1)
@@ -0,0 +1,51 @@
+import asyncio
+
+import pyarrow.parquet as pq
+
+from benchmarks.fake_llm import FakeChatModel
+from entry_table import EntryParquetWriter
+from models import DiscussionEntry, StudentSubmissionData
+from pipeline import ScrapeAnalyzePipeline
+from rate_limiter import AdaptiveRateLimiter
+from submission_analizer import SubmissionAnalyzer
+
+URL = "https://canvas.example.edu/courses/1/gradebook/speed_grader?assignment_id=2"
+
+
+def _pipeline(tmp_path, latency_s: float) -> ScrapeAnalyzePipeline:
+    llm = FakeChatModel(latency_s=latency_s)
+    analyzer = SubmissionAnalyzer(llm_instance=llm, max_entries=4, batch_size=4)
+    analyzer.rate_limiter = AdaptiveRateLimiter(llm.model, 60000)
+    writer = EntryParquetWriter(str(tmp_path / "entries.parquet"), URL)
+    return ScrapeAnalyzePipeline(analyzer, str(tmp_path / "analyzed.csv"), workers=1, entry_writer=writer)
+
+
+def _student(n: int) -> StudentSubmissionData:
+    return StudentSubmissionData(student_id=str(n), entries=[DiscussionEntry(post_date="2025-05-01T14:00:00Z", content=f"Post number {n}.")])
+
+
+def test_cancel_keeps_analyzed_rows_and_closes_the_parquet_file(tmp_path):
+    async def run():
+        pipeline = _pipeline(tmp_path, latency_s=0.2)
+        pipeline.start()
+        pipeline.submit(_student(1))
+        await asyncio.sleep(0.5) # The first student is analyzed
+        for n in range(2, 6):
+            pipeline.submit(_student(n))
+        await asyncio.sleep(0.05)
+        return await pipeline.cancel()
+
+    assert asyncio.run(run()) == str(tmp_path / "analyzed.csv")
+    assert pq.read_table(tmp_path / "entries.parquet").column("student_id").to_pylist()[0] == "1"
+
+
+def test_finish_analyzes_every_submitted_student(tmp_path):
+    async def run():
+        pipeline = _pipeline(tmp_path, latency_s=0)
+        pipeline.start()
+        for n in range(1, 6):
+            pipeline.submit(_student(n))
+        return await pipeline.finish()
+
+    asyncio.run(run())
+    assert sorted(pq.read_table(tmp_path / "entries.parquet").column("student_id").to_pylist()) == ["1", "2", "3", "4", "5"]
@@ -0,0 +1,39 @@
+import asyncio
+import time
+
+from rate_limiter import BACKOFF_FACTOR, RECOVERY_STEP, AdaptiveRateLimiter, TokenBucket
+
+
+def test_token_bucket_waits_for_the_missing_budget():
+    bucket = TokenBucket(60) # One per second
+    bucket.take(60)
+    assert 0.9 < bucket.wait_time(1) <= 1.0
+    assert bucket.wait_time(1000) <= 60.0 # Bigger than the bucket: wait for a full one
+
+
+def test_acquire_spends_request_and_token_budget():
+    limiter = AdaptiveRateLimiter("test-model", 2, 1000)
+    asyncio.run(limiter.acquire(400))
+    asyncio.run(limiter.acquire(400))
+    assert limiter.wait_time(0) > 0 # Request bucket is empty
+    assert limiter.tokens.available < 250 # 200 left, plus what refilled (1000/min) while the test ran
+
+
+def test_rate_limit_pauses_backs_off_and_recovers():
+    limiter = AdaptiveRateLimiter("test-model", 600)
+    limiter.on_rate_limited(5)
+    assert limiter.wait_time() > 4
+    assert limiter.requests.per_minute == 600 * BACKOFF_FACTOR
+    limiter.on_success()
+    assert limiter.rate_factor == BACKOFF_FACTOR + RECOVERY_STEP
+    for _ in range(100):
+        limiter.on_success()
+    assert limiter.rate_factor == 1.0 and limiter.requests.per_minute == 600
+
+
+def test_acquire_waits_out_an_empty_bucket():
+    limiter = AdaptiveRateLimiter("test-model", 600) # One every 0.1s once drained
+    limiter.requests.available = 0
+    start = time.monotonic()
+    asyncio.run(limiter.acquire())
+    assert 0.05 < time.monotonic() - start < 1.0
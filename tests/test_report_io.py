@@ -0,0 +1,31 @@
+from models import DiscussionEntry, StudentSubmissionData
+from report_io import JsonlReportWriter, compiled_report_path, iter_compact_records, iter_student_records, write_jsonl_report
+from serialization import student_from_record
+
+STUDENTS = [
+    StudentSubmissionData(student_id="1", student_name="Ada", entries=[DiscussionEntry(author="Ada", post_date="2025-05-01", content="Post.")]),
+    StudentSubmissionData(student_id="2", student_name="Grace", status="This student does not have a submission for this assignment."),
+    StudentSubmissionData(error="Page did not load"),
+]
+
+
+def test_jsonl_report_round_trips(tmp_path):
+    path = str(tmp_path / "report.jsonl")
+    assert write_jsonl_report(STUDENTS, path) == len(STUDENTS)
+    assert [student_from_record(record) for record in iter_student_records(path)] == STUDENTS
+    records = list(iter_compact_records(path))
+    assert [r.student_id for r in records] == ["1", "2", None]
+    assert records[0].entries[0].content == "Post." and records[2].error == "Page did not load"
+
+
+def test_truncated_last_line_is_skipped(tmp_path):
+    path = str(tmp_path / "report.jsonl")
+    with JsonlReportWriter(path) as writer:
+        writer.append(STUDENTS[0])
+    with open(path, "ab") as f_report:
+        f_report.write(b'{"student_id": "2", "entr') # A crash mid-write
+    assert [record["student_id"] for record in iter_student_records(path)] == ["1"]
+
+
+def test_compiled_report_path_prefers_jsonl(tmp_path):
+    assert compiled_report_path(str(tmp_path)).endswith(".jsonl")
@@ -0,0 +1,39 @@
+import orjson
+
+from models import DiscussionEntry, StudentSubmissionData
+from serialization import StudentRecord, dump_student, student_from_record
+
+
+def _round_trip(student_data: StudentSubmissionData) -> StudentSubmissionData:
+    return StudentRecord.from_dict(orjson.loads(dump_student(student_data))).to_model()
+
+
+def test_unresolved_author_survives_the_round_trip():
+    # What the extractor writes as the author when the student name could not be read
+    student_data = StudentSubmissionData(
+        student_id="42",
+        entries=[DiscussionEntry(author="Student name not resolved", post_date="2025-05-01T14:00:00Z", content="My post.")],
+    )
+    assert _round_trip(student_data) == student_data
+    assert StudentRecord.from_dict(orjson.loads(dump_student(student_data))).entries[0].author == "Student name not resolved"
+
+
+def test_fields_are_cleaned_only_against_their_own_default():
+    student_data = StudentSubmissionData(
+        student_name="Content not found",
+        entries=[DiscussionEntry(author="Name not found", content="Date not found")],
+    )
+    record = StudentRecord.from_dict(orjson.loads(dump_student(student_data)))
+    assert record.student_id is None
+    assert record.student_name == "Content not found"
+    assert (record.entries[0].author, record.entries[0].post_date, record.entries[0].content) == ("Name not found", None, "Date not found")
+    assert record.to_model() == student_data
+
+
+def test_compact_dump_reloads_to_the_same_model():
+    student_data = StudentSubmissionData(
+        student_id="7", student_name="Ada", status="ok", error=None,
+        entries=[DiscussionEntry(author="Ada", post_date="2025-05-01T14:00:00Z", content="Ünïcode text."), DiscussionEntry()],
+    )
+    assert student_from_record(orjson.loads(dump_student(student_data))) == student_data
+    assert _round_trip(student_data) == student_data
@@ -0,0 +1,64 @@
+import asyncio
+
+from benchmarks.fake_llm import FakeChatModel, fake_label
+from llm_cache import ClassificationCache
+from llm_router import LLMBackend, LLMRouter
+from models import DiscussionEntry, StudentSubmissionData
+from prompts import ANALIZE_BATCH_TEXT, ANALIZE_TEXT
+from rate_limiter import AdaptiveRateLimiter
+from submission_analizer import SubmissionAnalyzer
+
+
+def _analyzer(batch_size: int) -> SubmissionAnalyzer:
+    llm = FakeChatModel(latency_s=0)
+    analyzer = SubmissionAnalyzer(llm_instance=llm, max_entries=4, batch_size=batch_size)
+    analyzer.rate_limiter = AdaptiveRateLimiter(llm.model, 60000)
+    return analyzer
+
+
+def _student(student_id: str, *contents: str) -> StudentSubmissionData:
+    entries = [DiscussionEntry(author="A", post_date="2025-05-01T14:00:00Z", content=c) for c in contents]
+    return StudentSubmissionData(student_id=student_id, entries=entries)
+
+
+def _texts_with_distinct_labels():
+    """Texts whose fake labels are not all equal, so a mixed-up mapping shows up."""
+    texts = [f"Entry text number {i} about the reading." for i in range(40)]
+    first = fake_label(texts[0])
+    return texts[0], next(t for t in texts if fake_label(t) != first)
+
+
+def test_batch_ids_do_not_collide_for_repeated_student_ids():
+    text_a, text_b = _texts_with_distinct_labels()
+    # Legacy reports can hold several students whose ID could not be read
+    students = [_student("ID not found", text_a), _student("ID not found", text_b), _student("42", text_a, text_b)]
+    rows = asyncio.run(_analyzer(batch_size=10).analyze_students(students))
+    assert rows[0]["entry_1_summary"] == fake_label(text_a)
+    assert rows[1]["entry_1_summary"] == fake_label(text_b)
+    assert (rows[2]["entry_1_summary"], rows[2]["entry_2_summary"]) == (fake_label(text_a), fake_label(text_b))
+
+
+def test_single_entry_fallback_writes_bare_labels():
+    text_a, text_b = _texts_with_distinct_labels()
+    rows = asyncio.run(_analyzer(batch_size=1).analyze_students([_student("1", text_a, text_b)]))
+    assert (rows[0]["entry_1_summary"], rows[0]["entry_2_summary"]) == (fake_label(text_a), fake_label(text_b))
+
+
+def test_router_caches_under_the_backend_that_answered(tmp_path):
+    text_a, _ = _texts_with_distinct_labels()
+    # The first backend is saturated, so the second one answers
+    busy, idle = FakeChatModel(model="busy-model", latency_s=0), FakeChatModel(model="idle-model", latency_s=0)
+    busy_limiter = AdaptiveRateLimiter(busy.model, 60000)
+    busy_limiter.on_rate_limited(60)
+    router = LLMRouter([
+        LLMBackend("busy", busy, busy_limiter, 1),
+        LLMBackend("idle", idle, AdaptiveRateLimiter(idle.model, 60000), 1),
+    ])
+    cache = ClassificationCache(str(tmp_path / "cache.sqlite"))
+    analyzer = SubmissionAnalyzer(llm_instance=router, max_entries=4, batch_size=10, cache=cache)
+    rows = asyncio.run(analyzer.analyze_students([_student("1", text_a)]))
+    assert rows[0]["entry_1_summary"] == fake_label(text_a)
+    assert (busy.calls, idle.calls) == (0, 1)
+    assert cache.get(["idle-model"], (ANALIZE_BATCH_TEXT, ANALIZE_TEXT), text_a) == fake_label(text_a)
+    assert cache.get(["busy-model"], (ANALIZE_BATCH_TEXT, ANALIZE_TEXT), text_a) is None
+    cache.close()
@@ -1,9 +1,83 @@
 
 # --- Constants ---
+import os
 import re
 
+from dotenv import load_dotenv
+
+# Every module reads its settings from here at import time, so .env has to be loaded first
+load_dotenv()
 
 OUTPUT_FOLDER_NAME = "student_submissions_output"
+# DEBUG, INFO, SUCCESS, WARNING or ERROR; disabled levels skip formatting and debug-only browser calls
+LOG_LEVEL = os.getenv("AITA_LOG_LEVEL", "INFO")
+# Optional JSON-lines sink with run_id / student_id / phase fields on every record
+LOG_JSONL_PATH = os.getenv("AITA_LOG_JSONL", "")
+# Per-phase latency report written at the end of each run; the Chrome trace file is optional
+PERF_REPORT_NAME = "perf_report.json"
+PERF_TRACE_PATH = os.getenv("AITA_PERF_TRACE", "")
+# Job folders (command, pid, event log, console output) of runs started from the Streamlit console
+CONSOLE_RUNS_DIR = os.getenv("AITA_CONSOLE_RUNS_DIR", os.path.join(".cache", "console_runs"))
+# "single_pass" runs one in-page script per frame; "locators" uses the per-selector Playwright path
+EXTRACTION_MODE = os.getenv("AITA_EXTRACTION_MODE", "single_pass")
+SPEEDGRADER_URL = os.getenv(
+    "AITA_SPEEDGRADER_URL",
+    "https://usu.instructure.com/courses/780705/gradebook/speed_grader?assignment_id=4809230&student_id=1812493",
+)
+# "parallel" navigates tabs straight to each student_id; "sequential" clicks Next Student
+CRAWL_MODE = os.getenv("AITA_CRAWL_MODE", "parallel")
+CRAWL_CONCURRENCY = int(os.getenv("AITA_CRAWL_CONCURRENCY", "4"))
+# "off", "resume" (skip students already checkpointed) or "incremental" (skip students with unchanged submissions)
+CRAWL_RESUME_MODE = os.getenv("AITA_RESUME_MODE", "off")
+# Abort images/fonts/media/analytics once authenticated; stylesheets are opt-in because visibility checks rely on CSS
+LEAN_SCRAPE = os.getenv("AITA_LEAN_SCRAPE", "true").lower() == "true"
+LEAN_BLOCK_STYLESHEETS = os.getenv("AITA_LEAN_BLOCK_STYLESHEETS", "false").lower() == "true"
+# Cookies + localStorage saved after a successful login and reused while still valid
+SESSION_STATE_PATH = os.getenv("AITA_SESSION_STATE_PATH", os.path.join(".auth", "storage_state.json"))
+# Analyze students while the crawl is still running instead of after the browser closes
+PIPELINE_ANALYSIS = os.getenv("AITA_PIPELINE_ANALYSIS", "true").lower() == "true"
+PIPELINE_ANALYZER_WORKERS = int(os.getenv("AITA_PIPELINE_ANALYZER_WORKERS", "4"))
+ANALYZED_CSV_NAME = "analyzed_student_submissions.csv"
+# In-flight LLM calls per analyzer (at least 1); the per-model rate limiter paces them to the quota
+ANALYZER_CONCURRENCY = max(1, int(os.getenv("AITA_ANALYZER_CONCURRENCY", "8")))
+# Entries packed into one classification request (1 = one request per entry with ANALIZE_TEXT)
+ANALYSIS_BATCH_SIZE = int(os.getenv("AITA_ANALYSIS_BATCH_SIZE", "10"))
+# Quota overrides for the analyzer model (0 = per-family default)
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("AITA_LLM_RPM", "0"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("AITA_LLM_TPM", "0"))
+# On-disk cache of classifications keyed by (model, prompt template, normalized content)
+LLM_CACHE = os.getenv("AITA_LLM_CACHE", "true").lower() == "true"
+LLM_CACHE_PATH = os.getenv("AITA_LLM_CACHE_PATH", os.path.join(".cache", "llm_classifications.sqlite3"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("AITA_LLM_CACHE_MAX_ENTRIES", "100000"))
+LLM_CACHE_MAX_AGE_DAYS = float(os.getenv("AITA_LLM_CACHE_MAX_AGE_DAYS", "90"))
+LLM_CACHE_ERRORS = os.getenv("AITA_LLM_CACHE_ERRORS", "false").lower() == "true" # Serve cached error results instead of retrying
+# TF-IDF + logistic regression trained on cached LLM labels; entries below the threshold still go to the LLM
+LOCAL_CLASSIFIER = os.getenv("AITA_LOCAL_CLASSIFIER", "true").lower() == "true"
+LOCAL_CLASSIFIER_THRESHOLD = float(os.getenv("AITA_LOCAL_CLASSIFIER_THRESHOLD", "0.8"))
+LOCAL_CLASSIFIER_MIN_SAMPLES = int(os.getenv("AITA_LOCAL_CLASSIFIER_MIN_SAMPLES", "50"))
+# Classify one representative per group of near-identical entries (MinHash estimate of word-shingle Jaccard similarity)
+DEDUPE = os.getenv("AITA_DEDUPE", "true").lower() == "true"
+DEDUPE_THRESHOLD = float(os.getenv("AITA_DEDUPE_THRESHOLD", "0.9"))
+DEDUPE_NUM_PERM = 128
+DEDUPE_SHINGLE_SIZE = 3
+# Assignments crawled concurrently by `cli.py batch`; each writes to OUTPUT_FOLDER_NAME/course_<id>_assignment_<id>/
+BATCH_JOB_CONCURRENCY = int(os.getenv("AITA_BATCH_JOB_CONCURRENCY", "2"))
+# Canvas REST API ingestion (`cli.py fetch`): a token from Account > Settings, else the saved browser session's cookies
+CANVAS_API_TOKEN = os.getenv("AITA_CANVAS_TOKEN", "")
+CANVAS_API_MAX_CONNECTIONS = int(os.getenv("AITA_CANVAS_API_MAX_CONNECTIONS", "8"))
+# zstd-compressed page + submission-frame HTML saved next to each student's JSON, re-parsable offline with `cli.py reparse`
+HTML_ARCHIVE = os.getenv("AITA_HTML_ARCHIVE", "true").lower() == "true"
+HTML_ARCHIVE_LEVEL = int(os.getenv("AITA_HTML_ARCHIVE_LEVEL", "10"))
+REPARSE_WORKERS = int(os.getenv("AITA_REPARSE_WORKERS", "0")) # 0 = one process per CPU
+# Long-format (one row per student entry) Parquet table written next to the CSV
+PARQUET_OUTPUT = os.getenv("AITA_PARQUET_OUTPUT", "true").lower() == "true"
+ANALYZED_PARQUET_NAME = "analyzed_entries.parquet"
+PARQUET_ROW_GROUP_SIZE = int(os.getenv("AITA_PARQUET_ROW_GROUP_SIZE", "5000"))
+# Chat models for the login agent and for classifying entries
+AUTH_MODEL_NAME = os.getenv("AITA_AUTH_MODEL", "gemini-2.0-flash-lite")
+ANALYZER_MODEL_NAME = os.getenv("AITA_ANALYZER_MODEL", "gemma-3-27b-it")
+LLM_BACKENDS = os.getenv("AITA_LLM_BACKENDS", "") # Comma-separated provider:model[@target][;rpm=N...] specs for the LLM router
+OLLAMA_BASE_URL = os.getenv("AITA_OLLAMA_BASE_URL", "http://localhost:11434")
 # If GOOGLE_API_KEY is needed by the authenticator agent
 # if not os.getenv('GOOGLE_API_KEY'):
 #     raise ValueError('GOOGLE_API_KEY is not set. Please add it to your environment variables if your Agent uses it.')
@@ -13,4 +87,9 @@ OUTPUT_FOLDER_NAME = "student_submissions_output"
 def sanitize_filename(name: str) -> str:
     name = re.sub(r'[^\w\s-]', '', name) # Remove invalid chars
     name = re.sub(r'\s+', '_', name).strip('_') # Replace spaces with underscores
-    return name 
\ No newline at end of file
+    return name 
+
+
+# --- Helper: Per-Assignment Output Folder ---
+def assignment_output_dir(course_id: str, assignment_id: str, base_dir: str = OUTPUT_FOLDER_NAME) -> str:
+    return os.path.join(base_dir, f"course_{course_id}_assignment_{assignment_id}")